@@ -0,0 +1,222 @@
+# batch_panel.py
+"""Fönster för batch-uppdatering av flera repos (scripts/batch_update.py)"""
+import queue
+import time
+import tkinter as tk
+from pathlib import Path
+from tkinter import filedialog, messagebox, ttk
+
+# scripts/ ligger på sys.path via package_manager_gui
+from batch_update import CANCELLED, DEFAULT_JOBS, FAILED, OK, RUNNING, run_batch, short_error, summarize
+from jobs import JobCancelled
+from update_packages import parse_args
+
+STATUS_TEXT = {
+    RUNNING: "⏳ {stage}...",
+    OK: "✅ {stage}",
+    FAILED: "❌ {stage} failed",
+    CANCELLED: "⛔ cancelled",
+}
+
+
+class BatchPanel:
+    """Repo-lista, alternativ och en tabell med status per repo
+
+    Körningen är ett vanligt jobb i appens JobRunner, så appens knappar
+    låses och Cancel avbryter repos som inte hunnit starta. Progress från
+    run_batch (på jobbets tråd) läggs i en kö som töms på Tk-tråden med
+    root.after, som i JobRunner.
+    """
+
+    def __init__(self, app, poll_ms=50):
+        self.app = app
+        self.poll_ms = poll_ms
+        self._events = queue.Queue()
+        self._running = False
+        self._rows = {}  # repo path -> rad i tabellen
+
+        self.window = tk.Toplevel(app.root)
+        self.window.title("🗂 Batch Update")
+        self.window.geometry("760x560")
+        self.window.configure(bg="#1e1e1e")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.create_widgets()
+
+    def create_widgets(self):
+        frame = ttk.Frame(self.window, padding="20")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        # Repo-lista, en per rad
+        ttk.Label(frame, text="Repositories (one per line):").grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
+        self.repos_text = tk.Text(frame, height=7, bg="#252526", fg="#ffffff", insertbackground="#ffffff",
+                                  font=("Consolas", 9))
+        self.repos_text.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        repos = self.app.settings.get("batch_repos") or [self.app.path_entry.get()]
+        self.repos_text.insert("1.0", "\n".join(repos))
+        ttk.Button(frame, text="➕ Add Repo", command=self.add_repo).grid(row=2, column=0, sticky=tk.W, pady=(0, 10))
+
+        # Alternativ
+        options = ttk.Frame(frame)
+        options.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+
+        ttk.Label(options, text="Commit message:").pack(side=tk.LEFT, padx=(0, 5))
+        self.commit_entry = ttk.Entry(options, width=30)
+        self.commit_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.commit_entry.insert(0, self.app.commit_entry.get() or "🤖 Update package list")
+
+        ttk.Label(options, text="Jobs:").pack(side=tk.LEFT, padx=(10, 5))
+        self.jobs_var = tk.IntVar(value=DEFAULT_JOBS)
+        ttk.Spinbox(options, from_=1, to=64, width=4, textvariable=self.jobs_var).pack(side=tk.LEFT)
+
+        self.pull_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options, text="Pull first", variable=self.pull_var).pack(side=tk.LEFT, padx=(10, 0))
+        self.push_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options, text="Push", variable=self.push_var).pack(side=tk.LEFT, padx=(10, 0))
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+        self.run_button = ttk.Button(buttons, text="🚀 Run Batch", command=self.run)
+        self.run_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.cancel_button = ttk.Button(buttons, text="⛔ Cancel", command=self.app.cancel_job, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        self.summary_label = ttk.Label(buttons, text="")
+        self.summary_label.pack(side=tk.LEFT, padx=10)
+
+        # Status per repo
+        columns = ("Repo", "Status", "Detail")
+        self.tree = ttk.Treeview(frame, columns=columns, show="headings", height=10)
+        self.tree.heading("Repo", text="Repository")
+        self.tree.heading("Status", text="Status")
+        self.tree.heading("Detail", text="Detail")
+        self.tree.column("Repo", width=200)
+        self.tree.column("Status", width=130)
+        self.tree.column("Detail", width=360)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=5, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=5, column=1, sticky=(tk.N, tk.S))
+
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(5, weight=1)
+
+    def lift(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    @property
+    def closed(self):
+        return not self.window.winfo_exists()
+
+    def close(self):
+        if self._running:
+            self.app.cancel_job()
+        self.window.destroy()
+
+    def add_repo(self):
+        path = filedialog.askdirectory(parent=self.window, initialdir=self.app.path_entry.get())
+        if path:
+            text = self.repos_text.get("1.0", tk.END).rstrip("\n")
+            self.repos_text.delete("1.0", tk.END)
+            self.repos_text.insert("1.0", f"{text}\n{path}" if text else path)
+
+    def repo_list(self):
+        lines = self.repos_text.get("1.0", tk.END).splitlines()
+        return [line.strip() for line in lines if line.strip()]
+
+    # ---------------- Körning ----------------
+
+    def run(self):
+        repos = self.repo_list()
+        if not repos:
+            messagebox.showwarning("No repositories", "Add at least one repository.", parent=self.window)
+            return
+        commit = (self.commit_entry.get() or "🤖 Update package list").strip()
+        try:
+            jobs = max(1, int(self.jobs_var.get()))
+        except (tk.TclError, ValueError):
+            jobs = DEFAULT_JOBS
+        pull_first = self.pull_var.get()
+        push = self.push_var.get()
+        argv = ["--base-url", self.app.base_url] if self.app.base_url else []
+        if self.app.badges:
+            argv.append("--badges")
+        sync_args = parse_args(argv)
+        self.app.remember_setting("batch_repos", repos)
+
+        self.tree.delete(*self.tree.get_children())
+        self._rows = {}
+        for repo in repos:
+            path = str(Path(repo).expanduser().resolve())
+            if path not in self._rows:
+                self._rows[path] = self.tree.insert("", tk.END, values=(Path(path).name, "⏸ queued", path))
+
+        def work(job):
+            def progress(result):
+                self._events.put(result)
+                if result["status"] != RUNNING:
+                    name = Path(result["repo"]).name
+                    if result["status"] == OK:
+                        job.log(f"  ✅ {name}: {result['detail'] or result['stage']}")
+                    else:
+                        job.log(f"  ❌ {name}: {result['stage']} {result['status']}: {short_error(result)}")
+                    job.progress(f"Batch: {name} {result['stage']} {result['status']}")
+
+            job.log(f"🗂 Batch update of {len(repos)} repos ({jobs} jobs)")
+            results = run_batch(repos, sync_args, jobs, pull_first, commit, push,
+                                on_progress=progress, cancelled=lambda: job.cancelled)
+            job.check_cancelled()
+            return results
+
+        def done(results, error):
+            self._running = False
+            self._drain()
+            # Aktuellt repo kan ha fått nya commits eller en ny README
+            current = str(Path(self.app.path_entry.get()).expanduser().resolve())
+            if current in self._rows:
+                self.app.load_packages()
+            if self.closed:
+                return
+            self.run_button.configure(state=tk.NORMAL)
+            self.cancel_button.configure(state=tk.DISABLED)
+            if isinstance(error, JobCancelled):
+                self.app.log("⛔ Batch update cancelled")
+                self.summary_label.configure(text="Cancelled")
+            elif error:
+                self.app.log(f"❌ Batch update failed: {error}")
+                messagebox.showerror("Error", f"Batch update failed:\n{error}", parent=self.window)
+            else:
+                lines = summarize(results, time.perf_counter() - started)
+                self.summary_label.configure(text=lines[0].split(":", 1)[-1].strip())
+                for line in lines:
+                    self.app.log(line)
+                if len(lines) > 1:
+                    messagebox.showwarning("Batch update", "\n".join(lines), parent=self.window)
+
+        started = time.perf_counter()
+        if not self.app.start_job("Batch update", work, done):
+            return
+        self._running = True
+        self.run_button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.summary_label.configure(text="")
+        self.window.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._drain()
+        if self._running and not self.closed:
+            self.window.after(self.poll_ms, self._poll)
+
+    def _drain(self):
+        while True:
+            try:
+                result = self._events.get_nowait()
+            except queue.Empty:
+                return
+            if self.closed:
+                continue
+            row = self._rows.get(result["repo"])
+            if row is None:
+                continue
+            status = STATUS_TEXT[result["status"]].format(stage=result["stage"])
+            detail = result["detail"] if result["status"] in (OK, RUNNING) else short_error(result)
+            self.tree.item(row, values=(Path(result["repo"]).name, status, detail or result["repo"]))
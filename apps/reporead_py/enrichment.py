@@ -0,0 +1,121 @@
+# enrichment.py
+"""Hämta versioner/beskrivningar i bakgrunden och fyll i tabellen löpande"""
+import queue
+import time
+
+# scripts/ ligger på sys.path via package_manager_gui
+from metrics import metrics
+
+DEFAULT_TTL = 3600
+# Tak för den adaptiva takten; 429 sänker den ändå automatiskt
+ENRICH_MAX_RATE = 200.0
+
+
+class VersionEnricher:
+    """Parallell uppslagning av package-info med TTL-memo
+
+    fetch(name) körs på en trådpool med max concurrency samtidiga anrop och
+    returnerar en PackageRecord eller None. Resultaten läggs i en kö som
+    töms från Tk-tråden med root.after; on_results(records) får alla som
+    hunnit bli klara sedan förra tick, så tabellen uppdateras i batchar.
+    """
+
+    def __init__(self, root, fetch, on_results, on_done=None, concurrency=8, ttl=DEFAULT_TTL, poll_ms=100):
+        self.root = root
+        self.fetch = fetch
+        self.on_results = on_results
+        self.on_done = on_done
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self.poll_ms = poll_ms
+        self._executor = None
+        self._results = queue.Queue()
+        self._memo = {}
+        self._pending = set()
+        self._polling = False
+        self._fetched = []
+        self._failed = 0
+
+    @property
+    def busy(self):
+        return bool(self._pending)
+
+    def remember(self, records):
+        """Lägg in redan kända resultat (t.ex. färska rader ur metadata-databasen)"""
+        expires = time.monotonic() + self.ttl
+        for record in records:
+            self._memo[record.package] = (expires, record)
+
+    def cached(self, name):
+        entry = self._memo.get(name)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def request(self, names):
+        """Slå upp names; memo-träffar levereras direkt, resten hämtas
+
+        Returnerar antalet som skickades till trådpoolen.
+        """
+        hits = []
+        submitted = 0
+        for name in names:
+            record = self.cached(name)
+            if record is not None:
+                hits.append(record)
+            elif name not in self._pending:
+                if self._executor is None:
+                    # Skapas först när något behöver hämtas (snabbare uppstart)
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="enrich")
+                self._pending.add(name)
+                self._executor.submit(self._work, name)
+                submitted += 1
+
+        if hits:
+            self.on_results(hits)
+        if submitted and not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return submitted
+
+    def _work(self, name):
+        try:
+            with metrics.span("enrich.fetch"):
+                record = self.fetch(name)
+        except Exception:
+            record = None
+        self._results.put((name, record))
+
+    def _poll(self):
+        records = []
+        while True:
+            try:
+                name, record = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.discard(name)
+            if record is None:
+                self._failed += 1
+                continue
+            self._memo[name] = (time.monotonic() + self.ttl, record)
+            records.append(record)
+
+        if records:
+            self._fetched.extend(records)
+            self.on_results(records)
+
+        if self._pending:
+            self.root.after(self.poll_ms, self._poll)
+            return
+
+        self._polling = False
+        fetched, failed = self._fetched, self._failed
+        self._fetched, self._failed = [], 0
+        if self.on_done:
+            self.on_done(fetched, failed)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
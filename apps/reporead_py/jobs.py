@@ -0,0 +1,159 @@
+# jobs.py
+"""Bakgrundsjobb för Tk-appen (git, fil-I/O) utan att frysa main loop"""
+import queue
+import subprocess
+import threading
+
+# scripts/ ligger på sys.path via package_manager_gui
+from metrics import metrics
+
+
+class JobCancelled(Exception):
+    """Jobbet avbröts av användaren"""
+
+
+class Job:
+    """Handtag som jobbfunktionen får: logga, rapportera progress, kolla avbrott
+
+    Metoderna är trådsäkra och rör aldrig Tk direkt, allt går via kön.
+    """
+
+    def __init__(self, name, events):
+        self.name = name
+        self._events = events
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.name)
+
+    def log(self, message):
+        self._events.put(("log", message))
+
+    def progress(self, text):
+        self._events.put(("progress", text))
+
+    def run(self, args, cwd, input=None, poll_interval=0.1, env=None):
+        """Kör ett kommando, avbrytbart. Returnerar CompletedProcess."""
+        self.check_cancelled()
+        with metrics.span(".".join(args[:2])):
+            return self._run(args, cwd, input, poll_interval, env)
+
+    def _run(self, args, cwd, input, poll_interval, env=None):
+        proc = subprocess.Popen(
+            args,
+            cwd=cwd,
+            env=env,
+            stdin=subprocess.PIPE if input is not None else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        while True:
+            try:
+                stdout, stderr = proc.communicate(input, timeout=poll_interval)
+                break
+            except subprocess.TimeoutExpired:
+                # input får bara skickas första varvet, communicate skriver resten
+                input = None
+                if self._cancel.is_set():
+                    proc.terminate()
+                    try:
+                        proc.communicate(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        proc.kill()
+                        proc.communicate()
+                    raise JobCancelled(self.name)
+        return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
+
+
+class JobRunner:
+    """Kör ett jobb i taget på en worker-tråd
+
+    Händelser från workern läggs i en trådsäker kö som töms från Tk-tråden
+    med root.after, så callbacks (on_log, on_progress, on_done) körs alltid
+    på main loop.
+    """
+
+    def __init__(self, root, on_log, on_progress=None, on_busy=None, poll_ms=50):
+        self.root = root
+        self.on_log = on_log
+        self.on_progress = on_progress
+        self.on_busy = on_busy
+        self.poll_ms = poll_ms
+        self._events = queue.Queue()
+        self._job = None
+
+    @property
+    def busy(self):
+        return self._job is not None
+
+    def start(self, name, func, on_done=None):
+        """Starta func(job) i bakgrunden
+
+        on_done(result, error) anropas på Tk-tråden när jobbet är klart;
+        error är None, ett undantag, eller JobCancelled. Returnerar False om
+        ett annat jobb redan körs.
+        """
+        if self._job is not None:
+            return False
+
+        job = Job(name, self._events)
+        self._job = job
+        if self.on_busy:
+            self.on_busy(True)
+        if self.on_progress:
+            self.on_progress(f"{name}...")
+
+        def worker():
+            result, error = None, None
+            try:
+                with metrics.span(f"job.{name}"):
+                    result = func(job)
+            except Exception as e:
+                error = e
+            self._events.put(("done", (job, on_done, result, error)))
+
+        threading.Thread(target=worker, name=f"job-{name}", daemon=True).start()
+        self.root.after(self.poll_ms, self._poll)
+        return True
+
+    def cancel(self):
+        if self._job is not None:
+            self._job.cancel()
+            if self.on_progress:
+                self.on_progress(f"Cancelling {self._job.name}...")
+
+    def _poll(self):
+        finished = None
+        while True:
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                self.on_log(payload)
+            elif kind == "progress" and self.on_progress:
+                self.on_progress(payload)
+            elif kind == "done":
+                finished = payload
+
+        if finished is None:
+            self.root.after(self.poll_ms, self._poll)
+            return
+
+        job, on_done, result, error = finished
+        self._job = None
+        if self.on_busy:
+            self.on_busy(False)
+        if self.on_progress:
+            self.on_progress("Cancelled" if isinstance(error, JobCancelled) else "Idle")
+        if on_done:
+            on_done(result, error)
@@ -0,0 +1,90 @@
+# log_sink.py
+"""Buffrad logg för Tk-loggpanelen"""
+import tkinter as tk
+from collections import deque
+
+
+class LogSink:
+    """Ringbuffer som flushas till en Text-widget i samlade batchar
+
+    write() lägger bara raden i en deque; en timer (root.after) skriver alla
+    väntande rader med en enda insert och trimmar widgeten till capacity
+    rader. Kan spegla loggen till en roterande fil (också i batchar).
+    Anropas från Tk-tråden.
+    """
+
+    def __init__(self, root, widget, capacity=5000, flush_ms=100, log_file=None,
+                 file_max_bytes=1024 * 1024, file_backups=3):
+        self.root = root
+        self.widget = widget
+        self.capacity = capacity
+        self.flush_ms = flush_ms
+
+        self.lines = deque(maxlen=capacity)
+        self._pending = deque(maxlen=capacity)
+        self._file_pending = []
+        self._widget_lines = 0
+        self._flush_scheduled = False
+
+        self._file_logger = None
+        if log_file:
+            # logging kostar ~15 ms att importera, bara när filspegling används
+            import logging
+            import logging.handlers
+
+            handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=file_max_bytes, backupCount=file_backups, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger = logging.getLogger(f"reporead.log_sink.{id(self)}")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+
+    def write(self, line):
+        self.lines.append(line)
+        self._pending.append(line)
+        if self._file_logger:
+            self._file_pending.append(line)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after(self.flush_ms, self.flush)
+
+    def flush(self):
+        """Skriv väntande rader till widgeten i en batch"""
+        self._flush_scheduled = False
+        if self._file_pending:
+            self._file_logger.info("\n".join(self._file_pending))
+            self._file_pending.clear()
+        if not self._pending:
+            return
+
+        text = "\n".join(self._pending) + "\n"
+        count = text.count("\n")
+        self._pending.clear()
+
+        self.widget.insert(tk.END, text)
+        self._widget_lines += count
+
+        # Trimma äldsta raderna så att widgeten inte växer obegränsat
+        excess = self._widget_lines - self.capacity
+        if excess > 0:
+            self.widget.delete("1.0", f"{excess + 1}.0")
+            self._widget_lines -= excess
+
+        self.widget.see(tk.END)
+
+    def clear(self):
+        self.lines.clear()
+        self._pending.clear()
+        self.widget.delete("1.0", tk.END)
+        self._widget_lines = 0
+
+    def close(self):
+        if self._file_logger:
+            if self._file_pending:
+                self._file_logger.info("\n".join(self._file_pending))
+                self._file_pending.clear()
+            for handler in list(self._file_logger.handlers):
+                handler.close()
+                self._file_logger.removeHandler(handler)
@@ -1,20 +1,72 @@
 # package_manager_gui.py
+import time
+
+# Referenspunkt för time-to-first-paint (--exit-after-paint)
+_STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import subprocess
 from pathlib import Path
+import json
 import re
+import sys
+import threading
 from datetime import datetime
 
+# Delade moduler (PackageCollection m.m.) ligger i scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+
+from metrics import metrics
+from package_registry import PackageCollection, PackageRecord
+from package_store import PackageStore, default_db_path
+from output_sinks import HtmlSink, JsonSink, MarkdownSink, default_meta, render_markdown, run_pipeline
+from readme_table import ReadmeTableCache, has_metrics
+from enrichment import DEFAULT_TTL, ENRICH_MAX_RATE, VersionEnricher
+from jobs import JobCancelled, JobRunner
+from log_sink import LogSink
+from package_table import PackageTable
+from search_index import SearchIndex
+
+
+# Tidsstämpeln i README-foten, se render_readme
+LAST_UPDATED_PATTERN = re.compile(r"\*\*Last updated:\*\* `([^`]+) UTC`")
+
+# Max tid per omgång när sökindexet byggs om på idle-tid
+INDEX_SLICE_SECONDS = 0.008
+
+# Senast använda repo path m.m., så uppstarten slipper leta i filsystemet
+SETTINGS_PATH = Path.home() / ".reporead.json"
+
+
+def load_settings(path=SETTINGS_PATH):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_settings(settings, path=SETTINGS_PATH):
+    try:
+        Path(path).write_text(json.dumps(settings, indent=2) + "\n", encoding="utf-8")
+    except OSError:
+        pass
+
 
 class PackageManagerApp:
-    def __init__(self, root):
+    def __init__(self, root, log_capacity=5000, log_file=None, watch=False, watch_interval_ms=1000,
+                 enrich=True, base_url=None, enrich_concurrency=8, enrich_ttl=DEFAULT_TTL, badges=False):
         self.root = root
+        self.badges = badges
+        self.log_capacity = log_capacity
+        self.log_file = log_file
+        self.watch_interval_ms = watch_interval_ms
+        self.base_url = base_url
         self.root.title("📦 GLLB-Apps Package Manager")
         self.root.geometry("900x750")
         self.root.configure(bg="#1e1e1e")
 
-        # Sök efter repo path automatiskt
+        # Senast använda repo path, annars sök automatiskt
+        self.settings = load_settings()
         self.repo_path = self.find_repo_path()
 
         # Stil
@@ -23,8 +75,25 @@ class PackageManagerApp:
         # GUI
         self.create_widgets()
 
-        # Auto-load vid start
-        self.load_packages()
+        self.enricher = None
+        if enrich:
+            self.enricher = VersionEnricher(
+                self.root,
+                fetch=self.fetch_package_info,
+                on_results=self.apply_enrichment,
+                on_done=self.enrichment_done,
+                concurrency=enrich_concurrency,
+                ttl=enrich_ttl,
+            )
+        self._scraper = None
+        self._scraper_lock = threading.Lock()
+
+        # Auto-load när fönstret väl visats, så första ritningen inte väntar på I/O
+        self._map_binding = self.root.bind("<Map>", self._on_first_map, add="+")
+
+        if watch:
+            self.watch_var.set(True)
+            self.toggle_watch()
 
     def setup_style(self):
         """Konfigurera dark theme"""
@@ -54,8 +123,18 @@ class PackageManagerApp:
         )
         style.map("Treeview", background=[("selected", select_bg)])
 
+    def _on_first_map(self, event):
+        if event.widget is not self.root:
+            return
+        self.root.unbind("<Map>", self._map_binding)
+        self.root.after_idle(self.load_packages)
+
     def find_repo_path(self):
-        """Hitta repo path automatiskt"""
+        """Senast använda repo path, annars hitta automatiskt"""
+        cached = self.settings.get("repo_path")
+        if cached and (Path(cached) / ".git").exists():
+            return Path(cached)
+
         cwd = Path.cwd()
         if (cwd / ".git").exists():
             return cwd
@@ -97,6 +176,19 @@ class PackageManagerApp:
         list_frame = ttk.LabelFrame(main_frame, text="Current Packages", padding="10")
         list_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
 
+        # Sök: filtrerar tabellen medan man skriver
+        search_frame = ttk.Frame(list_frame)
+        search_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 8))
+
+        ttk.Label(search_frame, text="🔍 Search:").pack(side=tk.LEFT, padx=(0, 10))
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.search_entry.bind("<Escape>", lambda e: self.search_var.set(""))
+        self.search_status = ttk.Label(search_frame, text="")
+        self.search_status.pack(side=tk.LEFT, padx=(10, 0))
+        self.search_var.trace_add("write", self.apply_search)
+
         # Treeview
         columns = ("Package", "Version", "Source")
         self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=10)
@@ -109,17 +201,23 @@ class PackageManagerApp:
         self.tree.column("Version", width=120)
         self.tree.column("Source", width=180)
 
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL)
+
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
 
-        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        # Diff-baserad modell (kopplar även ihop scrollbaren)
+        self.table = PackageTable(self.tree, scrollbar)
 
         # Buttons (fetch borttagen)
         btn_frame = ttk.Frame(main_frame)
         btn_frame.grid(row=3, column=0, columnspan=3, pady=(10, 10))
 
         ttk.Button(btn_frame, text="🔄 Refresh from README", command=self.load_packages).pack(side=tk.LEFT, padx=5)
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btn_frame, text="👁 Watch README", variable=self.watch_var, command=self.toggle_watch).pack(
+            side=tk.LEFT, padx=5
+        )
         ttk.Button(btn_frame, text="➕ Add Package", command=self.add_package_dialog).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="➖ Remove Selected", command=self.remove_package).pack(side=tk.LEFT, padx=5)
 
@@ -135,11 +233,26 @@ class PackageManagerApp:
         btn_frame2 = ttk.Frame(action_frame)
         btn_frame2.grid(row=2, column=0, sticky=(tk.W, tk.E))
 
-        ttk.Button(btn_frame2, text="⬇️ Pull Latest", command=self.pull_from_github).pack(side=tk.LEFT, padx=5)
-        ttk.Button(btn_frame2, text="💾 Generate README", command=self.generate_readme).pack(side=tk.LEFT, padx=5)
-        ttk.Button(btn_frame2, text="🚀 Generate & Force Push", command=self.generate_and_push).pack(
-            side=tk.LEFT, padx=5
-        )
+        self.job_buttons = [
+            ttk.Button(btn_frame2, text="⬇️ Pull Latest", command=self.pull_from_github),
+            ttk.Button(btn_frame2, text="💾 Generate README", command=self.generate_readme),
+            ttk.Button(btn_frame2, text="🚀 Generate & Force Push", command=self.generate_and_push),
+            ttk.Button(btn_frame2, text="🗂 Batch Update...", command=self.open_batch_panel),
+        ]
+        for button in self.job_buttons:
+            button.pack(side=tk.LEFT, padx=5)
+
+        self.cancel_button = ttk.Button(btn_frame2, text="⛔ Cancel", command=self.cancel_job, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        # Progress för bakgrundsjobb
+        progress_frame = ttk.Frame(action_frame)
+        progress_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+
+        self.progress_bar = ttk.Progressbar(progress_frame, mode="indeterminate", length=200)
+        self.progress_bar.pack(side=tk.LEFT, padx=5)
+        self.progress_label = ttk.Label(progress_frame, text="Idle")
+        self.progress_label.pack(side=tk.LEFT, padx=5)
 
         # Log
         log_frame = ttk.LabelFrame(main_frame, text="Log", padding="10")
@@ -149,6 +262,7 @@ class PackageManagerApp:
             log_frame, height=8, bg="#1e1e1e", fg="#ffffff", font=("Consolas", 9)
         )
         self.log_text.pack(fill=tk.BOTH, expand=True)
+        self.log_sink = LogSink(self.root, self.log_text, capacity=self.log_capacity, log_file=self.log_file)
 
         # Configure grid weights
         self.root.columnconfigure(0, weight=1)
@@ -157,17 +271,32 @@ class PackageManagerApp:
         main_frame.rowconfigure(2, weight=1)
         main_frame.rowconfigure(5, weight=1)
         list_frame.columnconfigure(0, weight=1)
-        list_frame.rowconfigure(0, weight=1)
+        list_frame.rowconfigure(1, weight=1)
         action_frame.columnconfigure(0, weight=1)
 
-        self.packages = []
+        self.packages = PackageCollection()
+        self.packages_edited = False
+        self.search_index = SearchIndex()
+        self._index_pending = None  # namn kvar att indexera vid en ombyggnad
+        self._index_after = None
+        self._query = ""
+        self._matches = None  # namn som matchar _query, None utan sökning
+        self._readme_cache = None
+        self._store_run = None
+        self._watch_after = None
+        self._batch_panel = None
+
+        self.jobs = JobRunner(
+            self.root,
+            on_log=self.log,
+            on_progress=lambda text: self.progress_label.configure(text=text),
+            on_busy=self.set_busy,
+        )
 
     def log(self, message):
         """Logga meddelande"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update()
+        self.log_sink.write(f"[{timestamp}] {message}")
 
     def browse_repo(self):
         """Välj repo directory"""
@@ -178,40 +307,234 @@ class PackageManagerApp:
             self.path_entry.delete(0, tk.END)
             self.path_entry.insert(0, path)
             self.repo_path = Path(path)
+            self.remember_repo_path(path)
+
+    def remember_repo_path(self, path):
+        """Spara repo path till nästa start (bara om den ändrats)"""
+        self.remember_setting("repo_path", str(path))
+
+    def remember_setting(self, key, value):
+        """Spara en inställning till nästa start (bara om den ändrats)"""
+        if self.settings.get(key) != value:
+            self.settings[key] = value
+            save_settings(self.settings)
+
+    def readme_cache(self):
+        """Cache för README i aktuell repo path"""
+        readme_path = Path(self.path_entry.get()) / "README.md"
+        if self._readme_cache is None or self._readme_cache.path != readme_path:
+            self._readme_cache = ReadmeTableCache(readme_path)
+        return self._readme_cache
 
     def load_packages(self):
-        """Läs packages från README"""
+        """Läs packages från metadata-databasen om den finns, annars från README"""
+        repo_path = Path(self.path_entry.get())
+        if (repo_path / ".git").exists():
+            self.remember_repo_path(repo_path)
+
+        store_path = default_db_path(repo_path)
+        if store_path.exists() and self.load_packages_from_store(store_path, repo_path):
+            return
+
         self.log("📖 Reading packages from README...")
 
-        readme_path = Path(self.path_entry.get()) / "README.md"
+        cache = self.readme_cache()
 
-        if not readme_path.exists():
-            self.log(f"❌ README not found: {readme_path}")
+        if not cache.path.exists():
+            self.log(f"❌ README not found: {cache.path}")
             return
 
         try:
-            content = readme_path.read_text(encoding="utf-8")
-
-            # Extrahera packages från markdown table: | **name** |
-            pattern = r"\|\s*\*\*([^*]+)\*\*\s*\|"
-            matches = re.findall(pattern, content)
-
-            self.packages = []
-            for package_name in matches:
-                self.packages.append(
-                    {
-                        "package": package_name.strip(),
-                        "version": "Unknown",
-                        "source": "README",
-                    }
-                )
+            names, changed = cache.load()
+
+            # Oförändrad fil och inga egna ändringar: inget att göra (om listan
+            # inte kom från databasen, som README inte längre stämmer med)
+            if not changed and not self.packages_edited and self._store_run is None:
+                self.log(f"ℹ️ README unchanged ({len(self.packages)} packages)")
+                return
+
+            self.packages = PackageCollection(PackageRecord(name, source="README") for name in names)
+            self.packages_edited = False
+            self._store_run = None
 
             self.update_tree()
             self.log(f"✅ Loaded {len(self.packages)} packages from README")
+            self.enrich_versions()
 
         except Exception as e:
             self.log(f"❌ Error reading README: {e}")
 
+    def load_packages_from_store(self, store_path, repo_path):
+        """Packages från senaste sync-körningen (en indexerad fråga)
+
+        Returnerar False om databasen inte har någon körning än, eller om
+        README inte är den som körningen skrev (t.ex. efter en pull av en
+        README som CI genererat); då får README avgöra.
+        """
+        try:
+            with PackageStore(store_path) as store:
+                last = store.last_run()
+                if last is None:
+                    return False
+                records = store.get_records(run_id=last['id'])
+        except Exception as e:
+            self.log(f"❌ Error reading metadata store: {e}")
+            return False
+
+        if not self.store_matches_readme(repo_path, records):
+            self.log(f"ℹ️ README differs from the last sync run in {store_path.name}")
+            return False
+        if last['id'] == self._store_run and not self.packages_edited:
+            self.log(f"ℹ️ Metadata store unchanged ({len(self.packages)} packages)")
+            return True
+
+        # Samma packages som sync skrev till README, men med versioner och score
+        for record in records:
+            record.source = "README"
+        self.packages = PackageCollection(records)
+        self.packages_edited = False
+        self._store_run = last['id']
+
+        self.update_tree()
+        self.log(f"✅ Loaded {len(self.packages)} packages from {store_path.name}")
+        self.enrich_versions()
+        return True
+
+    @staticmethod
+    def store_matches_readme(repo_path, records):
+        """Om README genererades från just de här posterna
+
+        Manifestet skrivs tillsammans med README och har README:s hash samt
+        namn och version per rad. Stämmer hashen med filen på disk och
+        namnen och versionerna med körningen är README körningens egen.
+        """
+        from update_packages import MANIFEST_NAME, read_manifest, readme_file_hash
+
+        manifest = read_manifest(Path(repo_path) / MANIFEST_NAME)
+        if manifest is None:
+            return False
+        versions, meta = manifest
+        if meta.get("readme_hash") != readme_file_hash(Path(repo_path) / "README.md"):
+            return False
+        return versions == {record.package: record.version for record in records}
+
+    # ---------------- Version enrichment ----------------
+
+    def fetch_package_info(self, name):
+        """Körs på enricherns trådpool"""
+        with self._scraper_lock:
+            if self._scraper is None:
+                # requests laddas här, på en worker-tråd, inte vid uppstart
+                from update_packages import DEFAULT_BASE_URL, PubDevScraper
+
+                self._scraper = PubDevScraper(
+                    self.base_url or DEFAULT_BASE_URL,
+                    pool_size=self.enricher.concurrency,
+                    max_rate=ENRICH_MAX_RATE,
+                )
+        return self._scraper.get_package_info(name)
+
+    def enrich_versions(self, names=None):
+        """Fyll i version/beskrivning i bakgrunden för packages som saknar det"""
+        if self.enricher is None:
+            return
+        if names is None:
+            names = [pkg.package for pkg in self.packages if pkg.version == "Unknown"]
+        names = [name for name in names if name in self.packages]
+        if not names:
+            return
+
+        # Färska rader i metadata-databasen räknas som memo-träffar
+        store_path = default_db_path(self.path_entry.get())
+        if store_path.exists():
+            try:
+                with PackageStore(store_path) as store:
+                    stale = set(store.stale_names(names, self.enricher.ttl))
+                    self.enricher.remember(store.get_records([name for name in names if name not in stale]))
+            except Exception as e:
+                self.log(f"⚠️ Metadata store unavailable: {e}")
+
+        submitted = self.enricher.request(names)
+        if submitted:
+            self.log(f"🏷 Fetching versions for {submitted} packages...")
+
+    def apply_enrichment(self, records):
+        """Uppdatera rader på plats när resultat kommer in (Tk-tråden)"""
+        for record in records:
+            pkg = self.packages.get(record.package)
+            if pkg is None:
+                continue
+            pkg = PackageRecord(
+                pkg.package, record.version, record.description, pkg.source,
+                record.points, record.likes, record.popularity,
+            )
+            self.packages.upsert(pkg)
+            self.index_package(pkg)
+            self.table.upsert(pkg.package, self.row_values(pkg))
+        self.update_search_status()
+
+    def enrichment_done(self, fetched, failed):
+        if fetched:
+            try:
+                with PackageStore(default_db_path(self.path_entry.get())) as store:
+                    store.save_records(fetched)
+            except Exception as e:
+                self.log(f"⚠️ Could not save versions: {e}")
+        self.log(f"🏷 Versions updated: {len(fetched)} fetched, {failed} failed")
+
+    def toggle_watch(self):
+        """Slå på/av automatisk omläsning när README ändras på disk"""
+        if self._watch_after is not None:
+            self.root.after_cancel(self._watch_after)
+            self._watch_after = None
+
+        if self.watch_var.get():
+            self.log("👁 Watching README for changes")
+            self._watch_after = self.root.after(self.watch_interval_ms, self.poll_readme)
+        else:
+            self.log("👁 Stopped watching README")
+
+    def poll_readme(self):
+        """Polla README (bara os.stat om inget ändrats)"""
+        self._watch_after = None
+        if not self.watch_var.get():
+            return
+
+        cache = self.readme_cache()
+        if cache.changed_on_disk() and cache.path.exists():
+            try:
+                self.apply_readme_changes()
+            except Exception as e:
+                self.log(f"❌ Error reading README: {e}")
+
+        self._watch_after = self.root.after(self.watch_interval_ms, self.poll_readme)
+
+    def apply_readme_changes(self):
+        """Applicera skillnaden mot README inkrementellt (manuellt tillagda packages behålls)"""
+        names, changed = self.readme_cache().load()
+        if not changed:
+            return
+
+        in_readme = set(names)
+        removed = [pkg.package for pkg in self.packages if pkg.source == "README" and pkg.package not in in_readme]
+        for name in removed:
+            self.packages.remove(name)
+            self.unindex_package(name)
+            self.table.remove(name)
+
+        added = []
+        for name in names:
+            if name not in self.packages:
+                pkg = PackageRecord(name, source="README")
+                self.packages.add(pkg)
+                self.index_package(pkg)
+                self.table.upsert(name, self.row_values(pkg))
+                added.append(name)
+        self.update_search_status()
+
+        self.log(f"🔄 README changed on disk: +{len(added)} / -{len(removed)} packages")
+        self.enrich_versions(added)
+
     def add_package_dialog(self):
         """Dialog för att lägga till package manuellt + validering"""
         dialog = tk.Toplevel(self.root)
@@ -245,13 +568,19 @@ class PackageManagerApp:
                 )
                 return
 
-            if name in [p["package"] for p in self.packages]:
+            if name in self.packages:
                 messagebox.showwarning("Duplicate", f"Package '{name}' already exists!")
                 return
 
-            self.packages.append({"package": name, "version": "Unknown", "source": "Manual"})
-            self.update_tree()
+            pkg = PackageRecord(name, source="Manual")
+            self.packages.add(pkg)
+            self.packages_edited = True
+            self.index_package(pkg)
+            self.table.upsert(name, self.row_values(pkg))
+            self.table.see(name)
+            self.update_search_status()
             self.log(f"✅ Added package: {name}")
+            self.enrich_versions([name])
             dialog.destroy()
 
         btn_frame = ttk.Frame(frame)
@@ -264,187 +593,355 @@ class PackageManagerApp:
 
     def remove_package(self):
         """Ta bort vald package"""
-        selection = self.tree.selection()
+        selection = self.table.selected_names()
         if not selection:
             messagebox.showwarning("No Selection", "Please select a package to remove")
             return
 
-        item = self.tree.item(selection[0])
-        package_name = item["values"][0]
+        # Item-id är package-namnet
+        package_name = selection[0]
 
         if messagebox.askyesno("Confirm", f"Remove package '{package_name}'?"):
-            self.packages = [p for p in self.packages if p["package"] != package_name]
-            self.update_tree()
+            self.packages.remove(package_name)
+            self.packages_edited = True
+            self.unindex_package(package_name)
+            self.table.remove(package_name)
+            self.update_search_status()
             self.log(f"🗑️ Removed package: {package_name}")
 
+    @staticmethod
+    def row_values(pkg):
+        return (pkg.package, pkg.version, pkg.source)
+
     def update_tree(self):
-        """Uppdatera treeview"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Synka treeview mot self.packages (bara ändrade rader skickas till Tk)"""
+        self.table.set_rows({pkg.package: self.row_values(pkg) for pkg in self.packages})
+        self.rebuild_search_index()
+        self.update_search_status()
+
+    # ---------------- Sök ----------------
+
+    def rebuild_search_index(self):
+        """Bygg om sökindexet i omgångar på idle-tid (50k packages tar ~1 s totalt)
+
+        Ändringar under tiden går direkt in i det nya indexet via
+        index_package, och en aktiv sökning körs om när indexet är klart.
+        """
+        if self._index_after is not None:
+            self.root.after_cancel(self._index_after)
+        self.search_index = SearchIndex()
+        self._index_pending = iter(self.packages.names())
+        self._index_after = self.root.after_idle(self._index_slice)
+
+    def _index_slice(self):
+        self._index_after = None
+        stop_at = time.perf_counter() + INDEX_SLICE_SECONDS
+        for name in self._index_pending:
+            pkg = self.packages.get(name)
+            if pkg is not None:
+                self.search_index.add(pkg.package, pkg.description)
+            if time.perf_counter() >= stop_at:
+                self._index_after = self.root.after(1, self._index_slice)
+                return
+        self._index_pending = None
+        if self._query:
+            self.apply_search(force=True)
+
+    def index_package(self, pkg):
+        """Håll sökindex och aktuella träffar i synk med ett nytt eller ändrat package
+
+        Anropas före table.upsert, som då visar eller döljer raden.
+        """
+        self.search_index.add(pkg.package, pkg.description)
+        if self._matches is not None:
+            if self.search_index.matches(pkg.package, self._query):
+                self._matches.add(pkg.package)
+            else:
+                self._matches.discard(pkg.package)
 
-        for pkg in sorted(self.packages, key=lambda x: x["package"]):
-            self.tree.insert("", tk.END, values=(pkg["package"], pkg["version"], pkg["source"]))
+    def unindex_package(self, name):
+        self.search_index.remove(name)
+        if self._matches is not None:
+            self._matches.discard(name)
+
+    def apply_search(self, *_, force=False):
+        """Filtrera tabellen vid varje tangenttryckning (indexuppslag + diff av raderna)"""
+        query = " ".join(self.search_var.get().lower().split())
+        if query == self._query and not force:
+            return
+        self._query = query
+        if self._index_pending is not None and query:
+            # Körs igen från _index_slice när indexet är klart
+            self.update_search_status()
+            return
+        with metrics.span("gui.search"):
+            self._matches = self.search_index.search(query)
+            self.table.set_filter(self._matches)
+        self.update_search_status()
+
+    def update_search_status(self):
+        if self._index_pending is not None and self._query:
+            self.search_status.configure(text="Indexing...")
+        elif self._matches is None:
+            self.search_status.configure(text="")
+        else:
+            self.search_status.configure(text=f"{self.table.visible_count} of {len(self.table)}")
+
+    # ---------------- Background jobs ----------------
+
+    def set_busy(self, busy):
+        """Lås knapparna medan ett jobb körs"""
+        state = tk.DISABLED if busy else tk.NORMAL
+        for button in self.job_buttons:
+            button.configure(state=state)
+        self.cancel_button.configure(state=tk.NORMAL if busy else tk.DISABLED)
+        if busy:
+            self.progress_bar.start(10)
+        else:
+            self.progress_bar.stop()
+
+    def start_job(self, name, func, on_done=None):
+        if not self.jobs.start(name, func, on_done):
+            messagebox.showwarning("Busy", "Another operation is already running.")
+            return False
+        return True
+
+    def cancel_job(self):
+        if self.jobs.busy:
+            self.log("⛔ Cancelling...")
+            self.jobs.cancel()
 
     # ---------------- Git helpers ----------------
 
     def pull_from_github(self):
         """Pull senaste ändringar från GitHub"""
         self.log("⬇️ Pulling from GitHub...")
+        repo_path = Path(self.path_entry.get())
 
-        try:
-            repo_path = Path(self.path_entry.get())
-
-            result = subprocess.run(
-                ["git", "pull", "--no-rebase", "-X", "ours"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-            )
-
-            if result.returncode == 0:
-                output = (result.stdout or "").strip()
-                if output:
-                    for line in output.split("\n"):
-                        if line.strip():
-                            self.log(f"  {line.strip()}")
-
-                if "already up to date" in output.lower():
-                    self.log("  ℹ️ Already up to date")
-                else:
-                    self.log("✅ Pull complete!")
+        def work(job):
+            result = job.run(["git", "pull", "--no-rebase", "-X", "ours"], cwd=repo_path)
 
-                self.load_packages()
-            else:
+            if result.returncode != 0:
                 err = (result.stderr or "").strip()
-                self.log(f"  ❌ {err}")
-                messagebox.showerror("Git Error", err or "Unknown git error")
+                job.log(f"  ❌ {err}")
+                raise RuntimeError(err or "Unknown git error")
 
-        except Exception as e:
-            self.log(f"❌ Error: {e}")
-            messagebox.showerror("Error", f"Failed to pull:\n{e}")
+            output = (result.stdout or "").strip()
+            if output:
+                for line in output.split("\n"):
+                    if line.strip():
+                        job.log(f"  {line.strip()}")
 
-    def generate_readme(self):
-        """Generera ny README"""
-        self.log("📝 Generating README...")
+            if "already up to date" in output.lower():
+                job.log("  ℹ️ Already up to date")
+            else:
+                job.log("✅ Pull complete!")
+
+        def done(result, error):
+            if isinstance(error, JobCancelled):
+                self.log("⛔ Pull cancelled")
+            elif isinstance(error, RuntimeError):
+                messagebox.showerror("Git Error", str(error))
+            elif error:
+                self.log(f"❌ Error: {error}")
+                messagebox.showerror("Error", f"Failed to pull:\n{error}")
+            else:
+                self.load_packages()
 
-        try:
-            timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-
-            lines = [
-                "# 📦 GLLB-Apps Dart Packages\n",
-                "My published packages on pub.dev\n",
-                "| Package | Version | Pub Points | Popularity | Link |",
-                "|---------|---------|------------|------------|------|",
-            ]
-
-            for pkg in sorted(self.packages, key=lambda x: x["package"]):
-                name = pkg["package"]
-                lines.append(
-                    f"| **{name}** | "
-                    f"![version](https://img.shields.io/pub/v/{name}.svg?color=blue) | "
-                    f"![points](https://img.shields.io/pub/points/{name}?color=green) | "
-                    f"![popularity](https://img.shields.io/pub/popularity/{name}?color=orange) | "
-                    f"[pub.dev](https://pub.dev/packages/{name}) |"
-                )
+        self.start_job("git pull", work, done)
 
-            lines.extend(
-                [
-                    "\n---",
-                    f"**Last updated:** `{timestamp} UTC` 🤖",
-                    "\n*Auto-updated daily at 03:00 UTC via GitHub Actions*",
-                ]
-            )
+    def open_batch_panel(self):
+        """Fönster för pull/generate/commit/push i flera repos parallellt"""
+        if self._batch_panel is not None and not self._batch_panel.closed:
+            self._batch_panel.lift()
+            return
+        # Laddas först här, så uppstarten slipper sync-modulerna
+        from batch_panel import BatchPanel
+
+        self._batch_panel = BatchPanel(self)
+
+    def readme_packages(self):
+        """Packages och badges-läge för README (Tk-tråden)
+
+        Rader som enrichern inte hunnit fylla i hämtas ur metadata-databasen.
+        Saknas version eller score ändå renderas tabellen med badges (som
+        hämtas vid visning) istället för statiska kolumner fulla av "–".
+        """
+        if self.badges:
+            return list(self.packages), True
+
+        missing = [pkg.package for pkg in self.packages if not has_metrics(pkg)]
+        store_path = default_db_path(self.path_entry.get())
+        if missing and store_path.exists():
+            try:
+                with PackageStore(store_path) as store:
+                    stored = [record for record in store.get_records(missing) if has_metrics(record)]
+            except Exception as e:
+                self.log(f"⚠️ Metadata store unavailable: {e}")
+            else:
+                self.apply_enrichment(stored)
+                missing = [pkg.package for pkg in self.packages if not has_metrics(pkg)]
+
+        if missing:
+            self.log(f"⚠️ {len(missing)} packages have no version or score yet, using badges in README")
+            return list(self.packages), True
+        return list(self.packages), False
+
+    @staticmethod
+    def render_readme(packages, badges=False, timestamp=None):
+        """Rendera README-innehåll från en ögonblicksbild av packages"""
+        return render_markdown(packages, badges=badges, timestamp=timestamp)
+
+    @staticmethod
+    def write_outputs(job, repo_path, packages, badges=False):
+        """README, index.html och packages.json i ett pass (körs i bakgrunden)"""
+        job.log("📝 Generating README, index.html and packages.json...")
+        sinks = [
+            MarkdownSink(repo_path / "README.md", badges=badges),
+            HtmlSink(repo_path / "index.html"),
+            JsonSink(repo_path / "packages.json"),
+        ]
+        run_pipeline(packages, sinks, default_meta())
+        for sink in sinks:
+            job.log(f"✅ Generated: {sink.path}")
 
-            readme_path = Path(self.path_entry.get()) / "README.md"
-            readme_path.write_text("\n".join(lines), encoding="utf-8")
+    def generate_readme(self):
+        """Generera ny README (och index.html/packages.json)"""
+        repo_path = Path(self.path_entry.get())
+        # Ögonblicksbild på Tk-tråden; samlingen kan ändras medan jobbet kör
+        packages, badges = self.readme_packages()
 
-            self.log(f"✅ README generated: {readme_path}")
+        def done(result, error):
+            if error and not isinstance(error, JobCancelled):
+                self.log(f"❌ Error generating README: {error}")
+                messagebox.showerror("Error", f"Failed to generate README:\n{error}")
 
-        except Exception as e:
-            self.log(f"❌ Error generating README: {e}")
-            messagebox.showerror("Error", f"Failed to generate README:\n{e}")
+        self.start_job(
+            "Generate README", lambda job: self.write_outputs(job, repo_path, packages, badges), done
+        )
 
     def generate_and_push(self):
-        """Generera README och force-pusha till GitHub (alltid force push)"""
-        repo_path = Path(self.path_entry.get())
-
-        self.log(f"📂 Working in: {repo_path}")
+        """Generera README, committa med git plumbing och force-pusha
 
-        # 1) Generera README först
-        self.generate_readme()
+        Om README (med oförändrad tidsstämpel) redan matchar HEAD görs
+        ingenting, inte heller push.
+        """
+        from git_plumbing import blob_hash, commit_files, head_entries
 
-        # 2) Git add
-        self.log("📝 git add README.md")
+        repo_path = Path(self.path_entry.get())
+        packages, badges = self.readme_packages()
+        content = self.render_readme(packages, badges)
+        # Samma innehåll med befintlig tidsstämpel avgör om något ändrats
         try:
-            subprocess.run(
-                ["git", "add", "README.md"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-        except Exception as e:
-            self.log(f"❌ git add failed: {e}")
-            messagebox.showerror("Error", f"git add failed:\n{e}")
-            return
-
-        # 3) Commit (OK om inget att committa)
-        self.log("💾 git commit")
+            match = LAST_UPDATED_PATTERN.search((repo_path / "README.md").read_text(encoding="utf-8"))
+        except OSError:
+            match = None
+        unchanged = self.render_readme(packages, badges, match.group(1)) if match else content
         commit_msg = (self.commit_entry.get() or "🤖 Update package list").strip()
 
-        try:
-            commit_result = subprocess.run(
-                ["git", "commit", "-m", commit_msg],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-            )
-
-            combined = ((commit_result.stdout or "") + (commit_result.stderr or "")).lower()
-            if "nothing to commit" in combined:
-                self.log("  ℹ️ Nothing to commit (README unchanged)")
-            else:
-                if commit_result.stdout:
-                    self.log(f"  {commit_result.stdout.strip()}")
-                if commit_result.stderr:
-                    self.log(f"  {commit_result.stderr.strip()}")
-
-        except Exception as e:
-            self.log(f"❌ Commit error: {e}")
-            messagebox.showerror("Error", f"git commit failed:\n{e}")
-            return
+        self.log(f"📂 Working in: {repo_path}")
 
-        # 4) ALWAYS force push (säkrast: force-with-lease)
-        self.log("🚀 git push --force-with-lease")
-        try:
-            push_result = subprocess.run(
-                ["git", "push", "--force-with-lease"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-            )
+        def work(job):
+            # 1) Jämför mot HEAD (en process, hashen räknas i minnet)
+            job.progress("Comparing with HEAD...")
+            _, blobs = head_entries(repo_path, ["README.md"], run=job.run)
+            if blobs["README.md"] == blob_hash(unchanged.encode("utf-8")):
+                job.log("  ℹ️ README matches HEAD, nothing to commit or push")
+                return False
+
+            # 2) Skriv README och committa utan porcelain
+            job.progress("Committing...")
+            job.log("💾 Committing README.md")
+            commit = commit_files(repo_path, {"README.md": content.encode("utf-8")}, commit_msg, run=job.run)
+            job.log(f"✅ README generated: {repo_path / 'README.md'}")
+            if commit:
+                job.log(f"  {commit[:7]} {commit_msg}")
+
+            # 3) ALWAYS force push (säkrast: force-with-lease)
+            job.progress("git push...")
+            job.log("🚀 git push --force-with-lease")
+            push_result = job.run(["git", "push", "--force-with-lease"], cwd=repo_path)
 
             if push_result.stdout:
-                self.log(f"  {push_result.stdout.strip()}")
+                job.log(f"  {push_result.stdout.strip()}")
             if push_result.stderr:
-                self.log(f"  {push_result.stderr.strip()}")
-
-            if push_result.returncode == 0:
-                self.log("✅ Force push complete!")
+                job.log(f"  {push_result.stderr.strip()}")
+
+            if push_result.returncode != 0:
+                job.log("❌ Force push failed!")
+                raise RuntimeError(push_result.stderr or "Force push failed")
+
+            job.log("✅ Force push complete!")
+            return True
+
+        def done(result, error):
+            if isinstance(error, JobCancelled):
+                self.log("⛔ Push cancelled")
+            elif error:
+                self.log(f"❌ {error}")
+                messagebox.showerror("Error", str(error))
+            elif result:
                 messagebox.showinfo("Success", "Force push completed successfully! 🎉")
-            else:
-                self.log("❌ Force push failed!")
-                messagebox.showerror("Error", push_result.stderr or "Force push failed")
-
-        except Exception as e:
-            self.log(f"❌ Push error: {e}")
-            messagebox.showerror("Error", str(e))
 
+        self.start_job("Generate & push", work, done)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="GLLB-Apps package manager")
+    parser.add_argument("--log-capacity", type=int, default=5000, help="max lines kept in the log panel")
+    parser.add_argument("--log-file", help="mirror the log to this rotating file")
+    parser.add_argument("--watch", action="store_true", help="reload automatically when README.md changes")
+    parser.add_argument("--watch-interval", type=float, default=1.0, help="watch poll interval in seconds")
+    parser.add_argument("--no-enrich", action="store_true", help="do not look up versions in the background")
+    parser.add_argument("--base-url", help="pub.dev base URL for version lookups")
+    parser.add_argument("--enrich-concurrency", type=int, default=8, help="parallel version lookups")
+    parser.add_argument("--enrich-ttl", type=float, default=DEFAULT_TTL,
+                        help="seconds before a looked-up version is fetched again")
+    parser.add_argument("--badges", action="store_true",
+                        help="render shields.io badges instead of static version/points/likes/popularity text")
+    parser.add_argument("--exit-after-paint", action="store_true",
+                        help="print the time to first paint and exit (startup benchmark)")
+    parser.add_argument("--metrics-json", help="write git/job timing metrics as JSON on exit")
+    parser.add_argument("--metrics-prom", help="write git/job timing metrics as a Prometheus textfile on exit")
+    args = parser.parse_args(argv)
+
+    if args.metrics_json or args.metrics_prom:
+        metrics.enable()
 
-def main():
     root = tk.Tk()
-    app = PackageManagerApp(root)
+    app = PackageManagerApp(
+        root,
+        log_capacity=args.log_capacity,
+        log_file=args.log_file,
+        watch=args.watch,
+        watch_interval_ms=int(args.watch_interval * 1000),
+        enrich=not args.no_enrich,
+        base_url=args.base_url,
+        enrich_concurrency=args.enrich_concurrency,
+        enrich_ttl=args.enrich_ttl,
+        badges=args.badges,
+    )
+
+    if args.exit_after_paint:
+        def painted(event):
+            if event.widget is root:
+                root.update_idletasks()
+                print(f"first_paint_ms={(time.perf_counter() - _STARTED) * 1000:.1f}", flush=True)
+                root.after_idle(root.destroy)
+
+        root.bind("<Map>", painted, add="+")
+
     root.mainloop()
+    if app.enricher is not None:
+        app.enricher.close()
+    app.log_sink.close()
+
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
 
 
 if __name__ == "__main__":
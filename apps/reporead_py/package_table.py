@@ -0,0 +1,348 @@
+# package_table.py
+"""Diff-baserad, virtualiserad tabellmodell för package-Treeview"""
+import tkinter as tk
+from bisect import bisect_left, insort
+from tkinter import ttk
+
+
+class PackageTable:
+    """Håller Treeview i synk med en sorterad modell utan att bygga om allt
+
+    Varje rad har ett stabilt item-id (package-namnet), så insert, delete och
+    update rör bara den rad som ändrats. Upp till virtual_threshold rader
+    materialiseras alla och Treeview scrollar som vanligt. Över gränsen
+    visas bara de rader som ryms i fönstret och scrollbaren styr en offset
+    i modellen istället.
+
+    Ett filter (set_filter) döljer rader utan att ta bort dem ur modellen.
+    Läget (virtuellt eller inte) avgörs av modellens storlek, så att filtrera
+    en stor lista rör bara de rader som syns i fönstret.
+    """
+
+    VIRTUAL_THRESHOLD = 2000
+
+    def __init__(self, tree, scrollbar, virtual_threshold=VIRTUAL_THRESHOLD):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.virtual_threshold = virtual_threshold
+
+        self._all = []  # alla namn, sorterade
+        self._names = []  # synliga namn (efter filter), sorterade
+        self._rows = {}  # namn -> values
+        self._filter = None  # None eller en mängd med namn som ska synas
+        self._virtual = False
+        self._offset = 0
+        self._visible_rows = int(tree.cget("height"))
+        self._shown = {}  # materialiserade rader i virtuellt läge: namn -> values
+        self._selected = set()
+
+        self._use_native_scroll()
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tree.bind(sequence, self._on_wheel, add="+")
+        tree.bind("<Configure>", self._on_configure, add="+")
+
+    def __len__(self):
+        return len(self._all)
+
+    def __contains__(self, name):
+        return name in self._rows
+
+    @property
+    def virtual(self):
+        return self._virtual
+
+    @property
+    def visible_count(self):
+        return len(self._names)
+
+    def _matches(self, name):
+        return self._filter is None or name in self._filter
+
+    def _visible_index(self, name):
+        index = bisect_left(self._names, name)
+        if index < len(self._names) and self._names[index] == name:
+            return index
+        return None
+
+    # ---------------- Modelländringar ----------------
+
+    def set_rows(self, rows):
+        """Synka mot {namn: values}, bara skillnaderna skickas till Tk"""
+        rows = {name: tuple(values) for name, values in rows.items()}
+        removed = [name for name in self._rows if name not in rows]
+        virtual = len(rows) > self.virtual_threshold
+
+        if virtual or self._virtual:
+            # Uppdatera modellen och rendera om fönstret (eller byt läge) en gång
+            self._remember_selection()
+            self._rows = rows
+            self._all = sorted(rows)
+            self._names = self._filtered(self._all)
+            self._selected.difference_update(removed)
+            if virtual != self._virtual:
+                self._rebuild()
+            else:
+                self._offset = min(self._offset, self._max_offset())
+                self._render_window()
+            return
+
+        hidden = [name for name in removed if self._visible_index(name) is not None]
+        if hidden:
+            self.tree.delete(*hidden)
+            for name in hidden:
+                del self._names[bisect_left(self._names, name)]
+        for name in removed:
+            del self._rows[name]
+            del self._all[bisect_left(self._all, name)]
+        for name, values in rows.items():
+            self.upsert(name, values)
+
+    def set_filter(self, names):
+        """Visa bara raderna vars namn finns i names, None visar alla
+
+        names behålls som referens: anroparen kan lägga till och ta bort
+        namn i mängden och sedan anropa upsert för att uppdatera en rad.
+        """
+        self._filter = names
+        visible = self._filtered(self._all)
+        if visible == self._names:
+            return
+
+        if self._virtual:
+            self._remember_selection()
+            self._names = visible
+            self._offset = 0
+            self._render_window()
+            return
+
+        # Diff mot det som syns: ta bort det som försvunnit, sätt in det nya på plats
+        keep = set(visible)
+        gone = [name for name in self._names if name not in keep]
+        if gone:
+            self.tree.delete(*gone)
+        shown = set(self._names)
+        for position, name in enumerate(visible):
+            if name not in shown:
+                self.tree.insert("", position, iid=name, values=self._rows[name])
+        self._names = visible
+
+    def _filtered(self, names):
+        if self._filter is None:
+            return list(names)
+        if len(self._filter) * 8 < len(names):
+            # Få träffar: sortera dem hellre än att gå igenom hela listan
+            return sorted(name for name in self._filter if name in self._rows)
+        matches = self._filter
+        return [name for name in names if name in matches]
+
+    def upsert(self, name, values):
+        """Lägg till eller uppdatera en rad (och visa eller dölj den enligt filtret)"""
+        values = tuple(values)
+        old = self._rows.get(name)
+        self._rows[name] = values
+
+        if old is None:
+            insort(self._all, name)
+            if not self._virtual and len(self._all) > self.virtual_threshold:
+                if self._matches(name):
+                    insort(self._names, name)
+                self._rebuild()
+            elif self._matches(name):
+                self._show(name, values)
+            return
+
+        index = self._visible_index(name)
+        if not self._matches(name):
+            if index is not None:
+                self._hide(index)
+        elif index is None:
+            self._show(name, values)
+        elif old != values:
+            if not self._virtual:
+                self.tree.item(name, values=values)
+            elif name in self._shown:
+                self.tree.item(name, values=values)
+                self._shown[name] = values
+
+    def remove(self, name):
+        """Ta bort en rad"""
+        if name not in self._rows:
+            return
+
+        del self._rows[name]
+        del self._all[bisect_left(self._all, name)]
+        self._selected.discard(name)
+        index = self._visible_index(name)
+
+        if self._virtual and len(self._all) <= self.virtual_threshold:
+            if index is not None:
+                del self._names[index]
+            self._rebuild()
+        elif index is not None:
+            self._hide(index)
+
+    def _show(self, name, values):
+        """Sätt in ett synligt namn som inte redan finns i _names"""
+        index = bisect_left(self._names, name)
+        self._names.insert(index, name)
+
+        if not self._virtual:
+            self.tree.insert("", index, iid=name, values=values)
+        elif index < self._offset:
+            # Håll samma rader i bild när något läggs till ovanför
+            self._offset += 1
+            self._update_scrollbar()
+        elif index < self._offset + self._visible_rows:
+            self._render_window()
+        else:
+            self._update_scrollbar()
+
+    def _hide(self, index):
+        """Ta bort _names[index] ur vyn (raden finns kvar i modellen)"""
+        name = self._names.pop(index)
+
+        if not self._virtual:
+            self.tree.delete(name)
+        elif index < self._offset:
+            self._offset -= 1
+            self._update_scrollbar()
+        elif index < self._offset + self._visible_rows or self._offset > self._max_offset():
+            self._offset = min(self._offset, self._max_offset())
+            self._render_window()
+        else:
+            self._update_scrollbar()
+
+    def selected_names(self):
+        """Valda namn, även de som scrollats ur bild i virtuellt läge"""
+        if not self._virtual:
+            return list(self.tree.selection())
+        self._remember_selection()
+        return sorted(name for name in self._selected if self._visible_index(name) is not None)
+
+    def see(self, name):
+        """Scrolla så att raden syns"""
+        index = self._visible_index(name)
+        if index is None:
+            return
+        if not self._virtual:
+            self.tree.see(name)
+            return
+        if not self._offset <= index < self._offset + self._visible_rows:
+            self._scroll_to(index - self._visible_rows // 2)
+
+    # ---------------- Rendering ----------------
+
+    def _rebuild(self):
+        if self._virtual:
+            self._remember_selection()
+        else:
+            self._selected = set(self.tree.selection())
+        self._selected.intersection_update(self._rows)
+        self.tree.delete(*self.tree.get_children())
+        self._shown = {}
+        self._virtual = len(self._all) > self.virtual_threshold
+
+        if self._virtual:
+            self._use_virtual_scroll()
+            self._offset = min(self._offset, self._max_offset())
+            self._render_window()
+        else:
+            self._offset = 0
+            self._use_native_scroll()
+            for name in self._names:
+                self.tree.insert("", tk.END, iid=name, values=self._rows[name])
+            self.tree.selection_set([name for name in self._selected if name in self._rows])
+
+    def _render_window(self):
+        """Materialisera bara raderna i [offset, offset + visible_rows)"""
+        self._remember_selection()
+        wanted = self._names[self._offset:self._offset + self._visible_rows]
+        wanted_set = set(wanted)
+
+        stale = [name for name in self._shown if name not in wanted_set]
+        if stale:
+            self.tree.delete(*stale)
+            for name in stale:
+                del self._shown[name]
+
+        for position, name in enumerate(wanted):
+            values = self._rows[name]
+            shown = self._shown.get(name)
+            if shown is None:
+                self.tree.insert("", position, iid=name, values=values)
+            else:
+                if self.tree.index(name) != position:
+                    self.tree.move(name, "", position)
+                if shown != values:
+                    self.tree.item(name, values=values)
+            self._shown[name] = values
+
+        self.tree.selection_set([name for name in wanted if name in self._selected])
+        self._update_scrollbar()
+
+    def _remember_selection(self):
+        if not self._virtual:
+            return
+        visible = set(self._shown)
+        self._selected = (self._selected - visible) | (set(self.tree.selection()) & visible)
+
+    # ---------------- Scroll ----------------
+
+    def _use_native_scroll(self):
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.tree.yview)
+
+    def _use_virtual_scroll(self):
+        self.tree.configure(yscrollcommand="")
+        self.scrollbar.configure(command=self._on_scrollbar)
+
+    def _max_offset(self):
+        return max(0, len(self._names) - self._visible_rows)
+
+    def _scroll_to(self, offset):
+        if not self._virtual:
+            return
+        offset = max(0, min(int(offset), self._max_offset()))
+        if offset != self._offset:
+            self._offset = offset
+            self._render_window()
+
+    def _update_scrollbar(self):
+        total = max(1, len(self._names))
+        first = self._offset / total
+        last = min(1.0, (self._offset + self._visible_rows) / total)
+        self.scrollbar.set(first, last)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_to(float(amount) * len(self._names))
+        elif action == "scroll":
+            step = self._visible_rows if unit == "pages" else 1
+            self._scroll_to(self._offset + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if not self._virtual:
+            return None
+        if event.num == 4:
+            delta = -3
+        elif event.num == 5:
+            delta = 3
+        else:
+            delta = -3 if event.delta > 0 else 3
+        self._scroll_to(self._offset + delta)
+        return "break"
+
+    def _on_configure(self, event):
+        if not self._virtual:
+            return
+        row_height = 20
+        try:
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or row_height)
+        except (tk.TclError, ValueError):
+            pass
+        # Dra av ungefär en rad för rubriken
+        rows = max(1, event.height // row_height - 1)
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self._offset = min(self._offset, self._max_offset())
+            self._render_window()
@@ -0,0 +1,170 @@
+# search_index.py
+"""Inkrementellt sökindex över package-namn och beskrivningar"""
+import re
+from bisect import bisect_left, insort
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Kortare termer kan inte slås upp med trigram, de matchar ordprefix istället
+TRIGRAM = 3
+# Antal termresultat som sparas mellan tangenttryckningar
+TERM_CACHE_SIZE = 16
+
+
+def _trigrams(text):
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+def _terms(query):
+    return query.lower().split()
+
+
+class SearchIndex:
+    """Substring-sök i namn (trigram) och prefixsök på ord i namn och beskrivning
+
+    En term med minst tre tecken matchar om den finns någonstans i namnet
+    (snittet av trigrammens postings, kontrollerat med en substring-test)
+    eller är prefix till något ord; kortare termer matchar bara ordprefix,
+    som slås upp med bisect i en sorterad ordlista. Flera termer ska alla
+    matcha. add/remove rör bara ett package:s postings, så indexet hålls i
+    synk med listan utan att byggas om. Beskrivningar indexeras per ord och
+    inte per trigram, vilket håller minnet nere med många packages.
+
+    Resultatet per term sparas tills indexet ändras, så när man skriver
+    "widget c" räknas bara den nya termen fram.
+    """
+
+    def __init__(self):
+        self._docs = {}  # namn -> (namn i gemener, ord)
+        self._trigrams = {}  # trigram -> {namn}
+        self._words = {}  # ord -> {namn}
+        self._sorted_words = []
+        self._term_cache = {}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, name):
+        return name in self._docs
+
+    def names(self):
+        return list(self._docs)
+
+    def add(self, name, description=""):
+        """Lägg till eller uppdatera ett package"""
+        key = name.lower()
+        words = frozenset(WORD_PATTERN.findall(key)) | frozenset(WORD_PATTERN.findall((description or "").lower()))
+        old = self._docs.get(name)
+        if old is not None:
+            if old[1] == words:
+                return
+        self._term_cache.clear()
+        if old is not None:
+            self._unindex_words(name, old[1] - words)
+            words_added = words - old[1]
+        else:
+            for gram in _trigrams(key):
+                self._trigrams.setdefault(gram, set()).add(name)
+            words_added = words
+        self._docs[name] = (key, words)
+        for word in words_added:
+            postings = self._words.get(word)
+            if postings is None:
+                postings = self._words[word] = set()
+                insort(self._sorted_words, word)
+            postings.add(name)
+
+    def remove(self, name):
+        doc = self._docs.pop(name, None)
+        if doc is None:
+            return
+        self._term_cache.clear()
+        key, words = doc
+        for gram in _trigrams(key):
+            postings = self._trigrams[gram]
+            postings.discard(name)
+            if not postings:
+                del self._trigrams[gram]
+        self._unindex_words(name, words)
+
+    def _unindex_words(self, name, words):
+        for word in words:
+            postings = self._words[word]
+            postings.discard(name)
+            if not postings:
+                del self._words[word]
+                del self._sorted_words[bisect_left(self._sorted_words, word)]
+
+    # ---------------- Sökning ----------------
+
+    def search(self, query):
+        """Namn som matchar alla termer i query, eller None för en tom sökning
+
+        Den returnerade mängden är anroparens och får ändras.
+        """
+        terms = _terms(query)
+        if not terms:
+            return None
+        result = None
+        # Längsta termen först ger oftast minst kandidater att snitta mot
+        for term in sorted(set(terms), key=len, reverse=True):
+            if result is None:
+                result = set(self._cached_term(term))
+            else:
+                result &= self._term_matches(term, result)
+            if not result:
+                break
+        return result
+
+    def _cached_term(self, term):
+        matches = self._term_cache.pop(term, None)
+        if matches is None:
+            matches = self._term_matches(term)
+            if len(self._term_cache) >= TERM_CACHE_SIZE:
+                del self._term_cache[next(iter(self._term_cache))]
+        self._term_cache[term] = matches
+        return matches
+
+    def matches(self, name, query):
+        """Om ett enskilt package matchar query (utan att gå via postings)"""
+        doc = self._docs.get(name)
+        if doc is None:
+            return False
+        key, words = doc
+        return all(
+            (len(term) >= TRIGRAM and term in key) or any(word.startswith(term) for word in words)
+            for term in _terms(query)
+        )
+
+    def _term_matches(self, term, within=None):
+        result = self._prefix_matches(term, within)
+        if len(term) >= TRIGRAM:
+            result |= self._substring_matches(term, result)
+        return result
+
+    def _prefix_matches(self, prefix, within=None):
+        """Namn med ett ord som börjar på prefix (begränsat till within om det är billigare)"""
+        words = self._sorted_words
+        start = bisect_left(words, prefix)
+        end = bisect_left(words, prefix + "\uffff", start)
+        postings = [self._words[word] for word in words[start:end]]
+        if within is None:
+            return set().union(*postings)
+        # Ett kort prefix kan täcka nästan alla packages; snittet med en tidigare
+        # terms kandidater först gör att varje postings-lista bara kostar min(längderna)
+        return set().union(*(within & found for found in postings))
+
+    def _substring_matches(self, term, known=frozenset()):
+        """Namn som innehåller term (de i known behöver inte kontrolleras)"""
+        postings = []
+        for gram in _trigrams(term):
+            found = self._trigrams.get(gram)
+            if not found:
+                return set()
+            postings.append(found)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        if len(term) == TRIGRAM:
+            return candidates
+        candidates -= known
+        docs = self._docs
+        return {name for name in candidates if term in docs[name][0]}
@@ -0,0 +1,479 @@
+# scripts/batch_update.py
+"""Uppdatera package-katalogen i många repos på en gång
+
+Varje repo går igenom pull -> generate -> commit -> push, men stegen körs
+för alla repos parallellt på en begränsad processpool (--jobs) och
+metadata hämtas bara en gång:
+
+  1. git pull i alla repos (parallellt)
+  2. package-namn per repo: repots scripts/sources.json om den finns,
+     annars namnen i repots README; varje publisher läses en gång även om
+     flera repos delar den
+  3. metadata för unionen av alla repos packages hämtas en gång, med
+     HTTP-cache och metadata-databas som vanligt (--max-age avgör vad som
+     hämtas om)
+  4. README, index.html och packages.json genereras, committas och
+     pushas i alla repos (parallellt)
+
+Ett repo som fallerar i ett steg hoppas över i resten; övriga fortsätter
+och alla fel sammanfattas i slutet (exit-kod 1 om något repo fallerade).
+
+Exempel:
+    python scripts/batch_update.py ~/src/catalog-a ~/src/catalog-b --commit "🤖 Update packages" --push
+    python scripts/batch_update.py --repos-file repos.txt --jobs 8 -- --max-age 600
+
+Argument efter -- (eller okända flaggor) skickas vidare till
+update_packages.py (scraper, cache, databas, --badges, --force); flaggor
+med värde bör stå efter --, annars tolkas värdet som ett repo.
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import chain
+from pathlib import Path
+
+from git_plumbing import GitError, commit_files, pull, push, read_files
+from metrics import metrics
+from output_sinks import HtmlSink, JsonSink
+from package_registry import PackageRecord
+from package_store import PackageStore
+from readme_table import ReadmeTableCache
+from streaming import batched
+from update_packages import (
+    DEFAULT_SOURCES, MANIFEST_NAME, STORE_BATCH, ReadmeGenerator, build_scraper, load_sources, parse_args,
+)
+
+# git pull/push väntar mest på nätverket, så fler processer än kärnor lönar sig
+DEFAULT_JOBS = 8
+# Samma strategi som "Pull Latest" i GUI:t: lokala ändringar vinner vid konflikt
+PULL_ARGS = ('--no-rebase', '-X', 'ours')
+SOURCES_NAME = Path('scripts') / 'sources.json'
+# Hur ofta avbrott kontrolleras medan ett steg väntar på workers
+POLL_SECONDS = 0.2
+
+RUNNING = 'running'
+OK = 'ok'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+def _result(repo, stage, start, error=None, detail='', **fields):
+    return {
+        'repo': str(repo),
+        'stage': stage,
+        'status': FAILED if error else OK,
+        'error': error,
+        'detail': detail,
+        'seconds': time.perf_counter() - start,
+        **fields,
+    }
+
+
+def read_repo_list(path):
+    """Repos i en fil, ett per rad (tomma rader och # kommentarer hoppas över)"""
+    repos = []
+    for line in Path(path).read_text(encoding='utf-8').splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line:
+            repos.append(line)
+    return repos
+
+
+def unique_repos(repos):
+    """Absoluta sökvägar utan dubbletter, i ursprunglig ordning"""
+    seen = {}
+    for repo in repos:
+        path = Path(repo).expanduser().resolve()
+        seen.setdefault(path, None)
+    return list(seen)
+
+
+# ---------------- Workers (körs i egna processer) ----------------
+
+def pull_repo(repo):
+    """git pull i ett repo"""
+    start = time.perf_counter()
+    if not (Path(repo) / '.git').exists():
+        return _result(repo, 'pull', start, error="not a git repository")
+    try:
+        output = pull(repo, *PULL_ARGS)
+    except (GitError, OSError) as e:
+        return _result(repo, 'pull', start, error=str(e))
+    return _result(repo, 'pull', start, detail=(output.splitlines() or [''])[0])
+
+
+def update_repo(task):
+    """Generera, committa och ev. pusha ett repo
+
+    task är en dict med repo, records (PackageRecord.to_dict, sorterade på
+    namn), fallback_used, badges, force, commit (meddelande eller None)
+    och push. Allt i task går att pickla, så funktionen kan köras i en
+    worker-process.
+    """
+    repo = Path(task['repo'])
+    start = time.perf_counter()
+    stage = 'generate'
+    try:
+        readme_path = repo / 'README.md'
+        manifest_path = repo / MANIFEST_NAME
+        if task['force']:
+            manifest_path.unlink(missing_ok=True)
+        sinks = [HtmlSink(repo / 'index.html'), JsonSink(repo / 'packages.json')]
+        packages = (PackageRecord.from_dict(data) for data in task['records'])
+        changed = ReadmeGenerator.generate_incremental(
+            packages, readme_path, manifest_path, task['fallback_used'], task['badges'], sinks
+        )
+
+        commit = None
+        pushed = False
+        if task['commit']:
+            stage = 'commit'
+            paths = [readme_path, manifest_path, *(sink.path for sink in sinks)]
+            commit = commit_files(repo, read_files(repo, paths), task['commit'])
+            if commit is not None and task['push']:
+                stage = 'push'
+                push(repo)
+                pushed = True
+    except (GitError, OSError, ValueError) as e:
+        return _result(repo, stage, start, error=str(e))
+
+    detail = f"{len(task['records'])} packages"
+    if commit is not None:
+        detail += f", committed {commit[:7]}" + (" and pushed" if pushed else "")
+    elif not changed:
+        detail += ", no changes"
+    return _result(repo, 'update', start, detail=detail, changed=changed, commit=commit, pushed=pushed)
+
+
+# ---------------- Plan och delad hämtning (huvudprocessen) ----------------
+
+def repo_sources(repo):
+    """(sources, README-namn) för ett repo
+
+    Källorna läses från repots scripts/sources.json om den finns; annars
+    är katalogen helt enkelt de packages som redan står i README.
+    """
+    try:
+        readme_names = ReadmeTableCache(Path(repo) / 'README.md').load()[0]
+    except FileNotFoundError:
+        readme_names = []
+    path = Path(repo) / SOURCES_NAME
+    if path.exists():
+        return load_sources(path), readme_names
+    sources = {key: [] for key in DEFAULT_SOURCES}
+    sources['packages'] = list(readme_names)
+    return sources, readme_names
+
+
+def plan_repos(scraper, repos, concurrency, on_progress=None):
+    """Package-namn per repo, med varje publisher läst en gång
+
+    Returnerar ({repo: (sorterade namn, fallback_used)}, [misslyckade
+    resultat]). Om en publisher misslyckas behåller repot namnen som redan
+    står i dess README, som discover_packages gör med förra körningen.
+    """
+    start = time.perf_counter()
+    sources = {}
+    failures = []
+    for repo in repos:
+        if not (Path(repo) / '.git').exists():
+            failures.append(_result(repo, 'plan', start, error="not a git repository"))
+            continue
+        try:
+            sources[repo] = repo_sources(repo)
+        except (OSError, ValueError) as e:
+            failures.append(_result(repo, 'plan', start, error=f"bad {SOURCES_NAME}: {e}"))
+
+    publishers = sorted({publisher for source, _ in sources.values() for publisher in source['publishers']})
+
+    def scan(publisher):
+        errors = []
+        return publisher, list(scraper.scan_publisher(publisher, errors)), errors
+
+    found = {}
+    failed = set()
+    if publishers:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(publishers)))) as pool:
+            for publisher, names, errors in pool.map(scan, publishers):
+                found[publisher] = names
+                if errors:
+                    failed.add(publisher)
+        print(f"🔎 {len(publishers)} publishers scanned in {time.perf_counter() - start:.2f}s"
+              + (f" ({len(failed)} failed)" if failed else ""))
+
+    plans = {}
+    for repo, (source, readme_names) in sources.items():
+        names = set(chain(source['packages'], *(found[publisher] for publisher in source['publishers'])))
+        if failed.intersection(source['publishers']):
+            names.update(readme_names)
+        fallback_used = False
+        if not names and source['fallback']:
+            names = set(source['fallback'])
+            fallback_used = True
+        names.difference_update(source['exclude'])
+        plans[repo] = (sorted(names), fallback_used)
+        if on_progress:
+            on_progress(_result(repo, 'plan', start, detail=f"{len(names)} packages"))
+    return plans, failures
+
+
+def fetch_shared(args, scraper, names):
+    """Metadata för alla names i en hämtning: {namn: PackageRecord}
+
+    Med databasen hämtas bara de som är äldre än --max-age, och
+    misslyckade hämtningar faller tillbaka på senast lagrade data. Posterna
+    sparas med save_records och räknas inte som en sync-körning, eftersom
+    repona har olika kataloger.
+    """
+    store = None if args.no_db else PackageStore(args.db)
+    try:
+        stale = store.stale_names(names, args.max_age) if store is not None else names
+        fetched = {}
+        fetch_stats = {}
+        start = time.perf_counter()
+        infos = scraper.iter_package_infos(stale, args.concurrency, args.deadline, args.buffer, fetch_stats)
+        for batch in batched((info for _, info in infos if info), STORE_BATCH):
+            fetched.update((record.package, record) for record in batch)
+            if store is not None:
+                store.save_records(batch)
+        print(f"⏱  package info: fetched {len(fetched)} of {len(stale)} stale "
+              f"({len(names)} total) in {time.perf_counter() - start:.2f}s")
+        if fetch_stats.get('skipped'):
+            print(f"⚠️  Deadline reached, skipped {fetch_stats['skipped']} packages")
+        if store is None:
+            return fetched
+        return {record.package: record for record in store.get_records(names=names)}
+    finally:
+        if store is not None:
+            store.close()
+
+
+# ---------------- Körning ----------------
+
+def _cancelled(repo, stage):
+    return {'repo': str(repo), 'stage': stage, 'status': CANCELLED, 'error': "cancelled", 'detail': '',
+            'seconds': 0.0}
+
+
+def _run_stage(executor, stage, func, items, workers, on_progress, cancelled):
+    """Kör func(argument) på poolen; ger resultaten i den ordning de blir klara
+
+    items är par (repo, argument). Högst workers skickas till poolen åt
+    gången, så ett repo rapporteras som running först när det faktiskt
+    startar. När cancelled() blir sant startas inga fler; de som redan
+    kör får bli klara och resten ges som cancelled.
+    """
+    items = iter(items)
+    futures = {}
+
+    def submit_next():
+        for repo, arg in items:
+            futures[executor.submit(func, arg)] = (repo, time.perf_counter())
+            if on_progress:
+                on_progress({'repo': str(repo), 'stage': stage, 'status': RUNNING, 'detail': ''})
+            return
+
+    for _ in range(workers):
+        submit_next()
+    while futures:
+        done, _ = wait(futures, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+        for future in done:
+            repo, start = futures.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:  # worker-processen dog, eller resultatet gick inte att pickla
+                result = _result(repo, stage, start, error=f"{type(e).__name__}: {e}")
+            if on_progress:
+                on_progress(result)
+            yield result
+            if cancelled is None or not cancelled():
+                submit_next()
+    for repo, _ in items:
+        result = _cancelled(repo, stage)
+        if on_progress:
+            on_progress(result)
+        yield result
+
+
+def run_batch(repos, sync_args, jobs=DEFAULT_JOBS, pull_first=True, commit=None, push=False,
+              on_progress=None, cancelled=None):
+    """Uppdatera alla repos; returnerar slutresultatet per repo i samma ordning
+
+    on_progress(result) anropas (från den anropande tråden) varje gång ett
+    repo startar eller blir klart med ett steg. result är en dict med
+    repo, stage, status (running, ok, failed, cancelled), detail och error.
+    cancelled är en funktion; när den returnerar sant startas inga fler
+    repos och de som inte hunnit starta markeras som cancelled.
+    """
+    repos = unique_repos(repos)
+    final = {}
+    if not repos:
+        return []
+
+    def finish(result):
+        final[result['repo']] = result
+        return result['status'] == OK
+
+    workers = max(1, min(jobs, len(repos)))
+    # Spawn ger samma beteende på alla plattformar och är säkert även när
+    # anroparen har trådar igång (GUI:t)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        active = repos
+        if pull_first:
+            with metrics.span('batch.pull'):
+                pulled = {
+                    result['repo']
+                    for result in _run_stage(executor, 'pull', pull_repo, [(repo, str(repo)) for repo in repos],
+                                             workers, on_progress, cancelled)
+                    if finish(result)
+                }
+            active = [repo for repo in repos if str(repo) in pulled]
+        if cancelled is not None and cancelled():
+            active = []
+        if not active:
+            return _finalize(repos, final)
+
+        scraper, cache = build_scraper(sync_args)
+        try:
+            with metrics.span('batch.plan'):
+                plans, failures = plan_repos(scraper, active, sync_args.concurrency, on_progress)
+            for result in failures:
+                finish(result)
+                if on_progress:
+                    on_progress(result)
+            union = sorted(set(chain.from_iterable(names for names, _ in plans.values())))
+            print(f"📦 {len(union)} unique packages across {len(plans)} repos")
+            with metrics.span('batch.fetch'):
+                records = fetch_shared(sync_args, scraper, union)
+        finally:
+            scraper.close()
+            if cache is not None:
+                cache.save()
+                print(f"💾 HTTP cache: {cache.summary()}")
+
+        # Byggs en i taget när ett repo startar, så bara workers listor finns samtidigt
+        tasks = (
+            (repo, {
+                'repo': str(repo),
+                'records': [records[name].to_dict() for name in names if name in records],
+                'fallback_used': fallback_used,
+                'badges': sync_args.badges,
+                'force': sync_args.force,
+                'commit': commit,
+                'push': push,
+            })
+            for repo, (names, fallback_used) in plans.items()
+        )
+        with metrics.span('batch.update'):
+            for result in _run_stage(executor, 'update', update_repo, tasks, workers, on_progress, cancelled):
+                finish(result)
+    return _finalize(repos, final)
+
+
+def _finalize(repos, final):
+    """Slutresultat per repo; repos som aldrig nådde uppdateringen räknas som cancelled"""
+    results = []
+    for repo in repos:
+        result = final.get(str(repo))
+        if result is None or (result['status'] == OK and result['stage'] == 'pull'):
+            result = _cancelled(repo, 'update')
+        results.append(result)
+    return results
+
+
+def short_error(result):
+    """Första raden i felet som säger något (hoppar över GitErrors "git push failed:")"""
+    lines = [line.strip() for line in (result.get('error') or '').splitlines() if line.strip()]
+    for line in lines:
+        if not line.endswith('failed:'):
+            return line
+    return lines[0] if lines else ''
+
+
+def summarize(results, elapsed):
+    """Sammanfattningsrader: antal per utfall och alla fel"""
+    failed = [result for result in results if result['status'] == FAILED]
+    cancelled = sum(1 for result in results if result['status'] == CANCELLED)
+    changed = sum(1 for result in results if result['status'] == OK and result.get('changed'))
+    unchanged = len(results) - changed - len(failed) - cancelled
+    line = f"📊 {len(results)} repos in {elapsed:.2f}s: {changed} updated, {unchanged} unchanged, {len(failed)} failed"
+    lines = [line + (f", {cancelled} cancelled" if cancelled else "")]
+    for result in failed:
+        lines.append(f"  ❌ {result['repo']} ({result['stage']}): {short_error(result)}")
+    return lines
+
+
+def print_progress(result):
+    """Progress-rad per repo och steg för CLI:t"""
+    if result['status'] == RUNNING:
+        return
+    name = Path(result['repo']).name
+    if result['status'] == OK:
+        icon = '⬇️ ' if result['stage'] == 'pull' else '🗂 ' if result['stage'] == 'plan' else '✅'
+        print(f"{icon} {name}: {result['detail'] or result['stage']} ({result['seconds']:.2f}s)")
+    else:
+        print(f"❌ {name}: {result['stage']} {result['status']}: {short_error(result)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pull, regenerate, commit and push the package catalogue in many repos at once",
+        epilog="Other arguments (e.g. after --) are passed on to update_packages.py.",
+    )
+    parser.add_argument('repos', nargs='*', type=Path, help="repository directories")
+    parser.add_argument('--repos-file', type=Path, default=None,
+                        help="file with one repository path per line (# starts a comment)")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help="max repos processed in parallel (default: %(default)s)")
+    parser.add_argument('--no-pull', action='store_true', help="do not git pull before updating")
+    parser.add_argument('--commit', metavar='MESSAGE', default=None,
+                        help="commit the generated files in every repo where they differ from HEAD")
+    parser.add_argument('--push', action='store_true',
+                        help="git push every repo that got a new commit (requires --commit)")
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Dela vid -- själv: annars hamnar allt efter -- bland de positionella repos
+    passed = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, passed = argv[:split], argv[split + 1:]
+    args, rest = parser.parse_known_args(argv)
+    sync_args = parse_args(rest + passed)
+    if sync_args.metrics or sync_args.metrics_json or sync_args.metrics_prom:
+        metrics.enable()
+
+    repos = list(args.repos)
+    if args.repos_file:
+        repos.extend(read_repo_list(args.repos_file))
+    if not repos:
+        parser.error("no repositories given")
+    if args.push and not args.commit:
+        parser.error("--push requires --commit")
+
+    print("=" * 60)
+    print(f"🗂  Batch update of {len(repos)} repos ({args.jobs} jobs)")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    results = run_batch(repos, sync_args, args.jobs, not args.no_pull, args.commit, args.push,
+                        on_progress=print_progress)
+    print()
+    for line in summarize(results, time.perf_counter() - start):
+        print(line)
+
+    if metrics.enabled:
+        for line in metrics.summary_lines():
+            print(line)
+        if sync_args.metrics_json:
+            metrics.write_json(sync_args.metrics_json)
+        if sync_args.metrics_prom:
+            metrics.write_prometheus(sync_args.metrics_prom)
+    print("=" * 60)
+    if any(result['status'] != OK for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,808 @@
+# scripts/benchmarks.py
+"""Benchmarks mot en lokal fejk-pub.dev
+
+Exempel:
+    python scripts/benchmarks.py fetch --packages 300 --latency 0.05
+    python scripts/benchmarks.py parse --packages 20000
+    python scripts/benchmarks.py gui-log --lines 100000
+    python scripts/benchmarks.py gui-table --sizes 10000 100000
+    python scripts/benchmarks.py gui-search --packages 50000
+    python scripts/benchmarks.py registry --packages 50000
+    python scripts/benchmarks.py startup --max-import-ms 80 --max-paint-ms 500
+    python scripts/benchmarks.py pipeline --sizes 10000 100000
+    python scripts/benchmarks.py cassette --packages 1000 --latency 0.02
+    python scripts/benchmarks.py faults --packages 300 --slow-rate 0.05 --reset-rate 0.02
+    python scripts/benchmarks.py batch --repos 20 --packages 200 --jobs 8
+    python scripts/benchmarks.py suite --json results.json
+    python scripts/benchmarks.py compare base.json results.json
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from fake_pubdev import FakePubDev
+from package_registry import PackageCollection, PackageRecord
+from readme_table import ReadmeTableCache
+from streaming import DEFAULT_SORT_MEMORY
+from update_packages import PubDevScraper, ReadmeGenerator, build_scraper, parse_args, sync_once
+
+GUI_DIR = Path(__file__).resolve().parent.parent / 'apps' / 'reporead_py'
+
+
+def _gui_root():
+    """Tk-root för GUI-benchmarks, eller None om ingen display finns"""
+    import tkinter as tk
+
+    if str(GUI_DIR) not in sys.path:
+        sys.path.insert(0, str(GUI_DIR))
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"ℹ️  No display available, skipping GUI benchmark ({e})")
+        return None
+    root.withdraw()
+    return root
+
+
+def bench_fetch(args):
+    """Mät get_package_infos för olika concurrency-nivåer"""
+    fake = FakePubDev(package_count=args.packages, latency=args.latency)
+    with fake as base_url:
+        names = fake.package_names
+        print(f"📦 {args.packages} packages, {args.latency * 1000:.0f} ms latency per request")
+        print(f"{'concurrency':>12} {'seconds':>10} {'ok':>6}")
+
+        for concurrency in args.concurrency:
+            scraper = PubDevScraper(base_url, pool_size=concurrency, rate=None)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                infos = scraper.get_package_infos(names, concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            ok = sum(1 for info in infos if info)
+            print(f"{concurrency:>12} {elapsed:>10.3f} {ok:>6}")
+
+
+def _legacy_extract(html_content):
+    """Den tidigare BeautifulSoup-baserade extraktorn (tre pass över ett DOM)"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    packages = set()
+    selectors = [
+        ('a', {'href': lambda x: x and x.startswith('/packages/')}),
+        ('h3.packages-title a', {}),
+        ('.package-name a', {}),
+    ]
+    for tag, attrs in selectors:
+        links = soup.find_all(tag, attrs) if attrs else soup.select(tag)
+        for link in links:
+            href = link.get('href', '')
+            if '/packages/' in href:
+                package_name = href.split('/packages/')[1].split('/')[0].split('?')[0]
+                if package_name:
+                    packages.add(package_name)
+    return list(packages)
+
+
+def _measure(func, *args):
+    """Kör func två gånger: en gång för tid, en gång under tracemalloc för minnestopp"""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_parse(args):
+    """Jämför streaming-parsern med BeautifulSoup på en stor syntetisk sida"""
+    html = FakePubDev(package_count=args.packages).publisher_html()
+    scraper = PubDevScraper()
+    print(f"📄 {args.packages} packages, {len(html) / 1024:.0f} KiB HTML")
+    print(f"{'extractor':>12} {'seconds':>10} {'peak MiB':>10} {'found':>8}")
+
+    candidates = [('streaming', scraper._extract_packages_from_html)]
+    if importlib.util.find_spec('bs4') is not None:
+        candidates.insert(0, ('bs4', _legacy_extract))
+    else:
+        print("ℹ️  beautifulsoup4 not installed, skipping the legacy extractor")
+
+    for label, extract in candidates:
+        found, elapsed, peak = _measure(extract, html)
+        print(f"{label:>12} {elapsed:>10.3f} {peak / (1024 * 1024):>10.1f} {len(found):>8}")
+
+
+def bench_gui_log(args):
+    """Logga många rader via LogSink och mät tid till att widgeten är uppdaterad"""
+    root = _gui_root()
+    if root is None:
+        return
+    from tkinter import scrolledtext
+    from log_sink import LogSink
+
+    widget = scrolledtext.ScrolledText(root)
+    sink = LogSink(root, widget, capacity=args.capacity)
+
+    start = time.perf_counter()
+    for i in range(args.lines):
+        sink.write(f"[00:00:00]   line {i}")
+    sink.flush()
+    root.update_idletasks()
+    elapsed = time.perf_counter() - start
+
+    widget_lines = int(widget.index('end-1c').split('.')[0]) - 1
+    print(f"📝 {args.lines} lines in {elapsed:.3f} s, widget holds {widget_lines} lines")
+    root.destroy()
+
+
+def bench_gui_table(args):
+    """Latens för add/remove i PackageTable jämfört med att bygga om hela trädet"""
+    root = _gui_root()
+    if root is None:
+        return
+    from tkinter import ttk
+    from package_table import PackageTable
+
+    print(f"{'rows':>8} {'mode':>8} {'add ms':>10} {'remove ms':>10}")
+    for size in args.sizes:
+        tree = ttk.Treeview(root, columns=("Package", "Version", "Source"), show="headings")
+        scrollbar = ttk.Scrollbar(root)
+        table = PackageTable(tree, scrollbar)
+        rows = {f"pkg_{i:07d}": (f"pkg_{i:07d}", "1.0.0", "README") for i in range(0, size * 2, 2)}
+        table.set_rows(rows)
+        root.update_idletasks()
+
+        # Udda nummer finns inte i tabellen, jämnt steg håller dem udda
+        step = max(2, (size * 2 // 50) & ~1)
+        probes = [f"pkg_{i:07d}" for i in range(1, size * 2, step)][:50]
+        start = time.perf_counter()
+        for name in probes:
+            table.upsert(name, (name, "1.0.0", "Manual"))
+            root.update_idletasks()
+        add_ms = (time.perf_counter() - start) * 1000 / len(probes)
+
+        start = time.perf_counter()
+        for name in probes:
+            table.remove(name)
+            root.update_idletasks()
+        remove_ms = (time.perf_counter() - start) * 1000 / len(probes)
+
+        mode = "virtual" if table.virtual else "full"
+        print(f"{size:>8} {mode:>8} {add_ms:>10.2f} {remove_ms:>10.2f}")
+        tree.destroy()
+        scrollbar.destroy()
+
+    root.destroy()
+
+
+SEARCH_WORDS = (
+    "flutter dart theme wireframe widget http client state router test mock json cli build parser "
+    "animation firebase auth storage cache async stream icon color layout chart map camera audio video"
+).split()
+
+
+def bench_gui_search(args):
+    """Latens per tangenttryckning: sökindex + filtrering av PackageTable"""
+    root = _gui_root()
+    if root is None:
+        return
+    import random
+    from tkinter import ttk
+    from package_table import PackageTable
+    from search_index import SearchIndex
+
+    rng = random.Random(args.seed)
+    names = [f"{rng.choice(SEARCH_WORDS)}_{rng.choice(SEARCH_WORDS)}_{i}" for i in range(args.packages)]
+    index = SearchIndex()
+    start = time.perf_counter()
+    for name in names:
+        index.add(name, " ".join(rng.choice(SEARCH_WORDS) for _ in range(8)))
+    print(f"🔎 {args.packages} packages indexed in {time.perf_counter() - start:.2f} s")
+
+    tree = ttk.Treeview(root, columns=("Package", "Version", "Source"), show="headings")
+    table = PackageTable(tree, ttk.Scrollbar(root))
+    table.set_rows({name: (name, "1.0.0", "README") for name in names})
+    root.update_idletasks()
+
+    # Skriv query tecken för tecken, sudda sedan ut den igen
+    steps = [args.query[:i] for i in range(1, len(args.query) + 1)]
+    steps += steps[-2::-1] + [""]
+    print(f"{'query':<24} {'matches':>8} {'ms':>8}")
+    worst = 0.0
+    for query in steps:
+        start = time.perf_counter()
+        matches = index.search(query)
+        table.set_filter(matches)
+        root.update_idletasks()
+        elapsed = (time.perf_counter() - start) * 1000
+        worst = max(worst, elapsed)
+        print(f"{query!r:<24} {table.visible_count:>8} {elapsed:>8.2f}")
+    print(f"⏱  worst keystroke: {worst:.2f} ms")
+    root.destroy()
+
+
+def bench_registry(args):
+    """PackageCollection jämfört med en lista av dicts: minne och add/remove/lookup"""
+    names = [f"pkg_{i:07d}" for i in range(args.packages)]
+    probes = names[::max(1, args.packages // 1000)]
+
+    def build_dicts():
+        return [{'package': name, 'version': '1.0.0', 'source': 'README'} for name in names]
+
+    def build_collection():
+        return PackageCollection(PackageRecord(name, '1.0.0', source='README') for name in names)
+
+    print(f"📦 {args.packages} packages, {len(probes)} probes")
+    print(f"{'storage':>12} {'bytes/entry':>12} {'add us':>10} {'lookup us':>10} {'remove us':>10}")
+
+    # Listan gör som GUI:t gjorde förut: dubblettkoll, filtrering, sortering
+    _, _, peak = _measure(build_dicts)
+    packages = build_dicts()
+    start = time.perf_counter()
+    for name in probes:
+        if name + '_x' not in [p['package'] for p in packages]:
+            packages.append({'package': name + '_x', 'version': 'Unknown', 'source': 'Manual'})
+            packages.sort(key=lambda x: x['package'])
+    add_us = (time.perf_counter() - start) * 1e6 / len(probes)
+    start = time.perf_counter()
+    for name in probes:
+        next(p for p in packages if p['package'] == name)
+    lookup_us = (time.perf_counter() - start) * 1e6 / len(probes)
+    start = time.perf_counter()
+    for name in probes:
+        packages = [p for p in packages if p['package'] != name]
+    remove_us = (time.perf_counter() - start) * 1e6 / len(probes)
+    print(f"{'dict list':>12} {peak / args.packages:>12.0f} {add_us:>10.1f} {lookup_us:>10.1f} {remove_us:>10.1f}")
+
+    _, _, peak = _measure(build_collection)
+    collection = build_collection()
+    start = time.perf_counter()
+    for name in probes:
+        collection.add(PackageRecord(name + '_x', source='Manual'))
+    add_us = (time.perf_counter() - start) * 1e6 / len(probes)
+    start = time.perf_counter()
+    for name in probes:
+        collection[name]
+    lookup_us = (time.perf_counter() - start) * 1e6 / len(probes)
+    start = time.perf_counter()
+    for name in probes:
+        collection.remove(name)
+    remove_us = (time.perf_counter() - start) * 1e6 / len(probes)
+    print(f"{'collection':>12} {peak / args.packages:>12.0f} {add_us:>10.1f} {lookup_us:>10.1f} {remove_us:>10.1f}")
+
+
+def _import_times(module, cwd):
+    """{modul: kumulativ importtid i sekunder} för allt som `import module` laddar"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return {}
+    times = {}
+    seen = False
+    # Raderna kommer i post-order: det module laddar står före module själv,
+    # och allt före står under site och interpreterns uppstart
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if name == module:
+            seen = True
+        elif seen and len(parts[2]) - len(parts[2].lstrip()) <= 1:
+            break  # tillbaka på toppnivå: importerat före module
+        if seen:
+            times.setdefault(name, int(parts[1]) / 1e6)
+    return times
+
+
+def _import_seconds(module, cwd, repeat=5):
+    """Kumulativ importtid för module enligt -X importtime (bästa av repeat)"""
+    best = None
+    for _ in range(repeat):
+        seconds = _import_times(module, cwd).get(module)
+        if seconds is not None:
+            best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def _first_paint_seconds(repeat=3):
+    """(time to first paint, hela processens tid) för GUI:t, None utan display"""
+    best = None
+    with tempfile.TemporaryDirectory() as home:
+        # Egen HOME så att GUI:ts sparade inställningar inte påverkas
+        env = {**os.environ, 'HOME': home, 'USERPROFILE': home}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, str(GUI_DIR / 'package_manager_gui.py'), '--exit-after-paint', '--no-enrich'],
+                cwd=GUI_DIR, capture_output=True, text=True, env=env,
+            )
+            wall = time.perf_counter() - start
+            if result.returncode != 0:
+                return None
+            for line in result.stdout.splitlines():
+                if line.startswith('first_paint_ms='):
+                    paint = float(line.split('=', 1)[1]) / 1000
+                    if best is None or paint < best[0]:
+                        best = (paint, wall)
+    return best
+
+
+def measure_startup(record, repeat):
+    """Importtider för skripten och GUI:t samt time to first paint"""
+    scripts_dir = Path(__file__).resolve().parent
+    for module, cwd in (('update_packages', scripts_dir), ('package_manager_gui', GUI_DIR)):
+        seconds = _import_seconds(module, cwd, repeat)
+        if seconds is not None:
+            record(f'startup.import.{module}.seconds', seconds, 's')
+
+    paint = _first_paint_seconds(max(1, repeat // 2))
+    if paint is None:
+        print("  ℹ️  No display available, skipping time to first paint")
+    else:
+        record('startup.first_paint.seconds', paint[0], 's')
+        record('startup.gui_process.seconds', paint[1], 's')
+
+
+def bench_startup(args):
+    """Uppstartstid, exit 1 om en budget överskrids"""
+    metrics = {}
+
+    def record(name, value, unit):
+        metrics[name] = {'value': value, 'unit': unit}
+        print(f"  {name:<44} {value * 1000:>10.1f} ms")
+
+    print(f"🚀 Startup (best of {args.repeat})")
+    measure_startup(record, args.repeat)
+    if args.json:
+        Path(args.json).write_text(json.dumps({'metrics': metrics}, indent=2) + "\n", encoding='utf-8')
+
+    over = []
+    if args.max_import_ms is not None:
+        over += [
+            name for name, metric in metrics.items()
+            if name.startswith('startup.import.') and metric['value'] * 1000 > args.max_import_ms
+        ]
+    paint = metrics.get('startup.first_paint.seconds')
+    if args.max_paint_ms is not None and paint and paint['value'] * 1000 > args.max_paint_ms:
+        over.append('startup.first_paint.seconds')
+    if over:
+        print(f"❌ Over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+class _SyntheticScraper(PubDevScraper):
+    """Scraper utan nätverk: package_count packages i blandad ordning, direkt ur minnet"""
+
+    def __init__(self, package_count):
+        super().__init__('http://synthetic.invalid', rate=None)
+        self.package_count = package_count
+
+    def iter_packages_from_publisher(self, publisher, max_pages=0):
+        for i in range(self.package_count):
+            yield f"synthetic_package_{i * 7919 % self.package_count:07d}"
+
+    def get_package_info(self, package_name, timeout=None, scores=True):
+        return PackageRecord(package_name, '1.2.3', "A synthetic package used for pipeline benchmarks. " * 2,
+                             'pub.dev', 120, 42, 0.87)
+
+
+def _pipeline_child(args):
+    """Körs i en egen process så att ru_maxrss bara gäller en sync"""
+    import resource
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        sync_args = parse_args([
+            '--no-cache', '--max-age', '0', '--sources', str(tmp / 'none.json'),
+            '--db', str(tmp / 'packages.db'), '--output', str(tmp / 'README.md'),
+            '--html', str(tmp / 'index.html'), '--json', str(tmp / 'packages.json'),
+            '--sort-memory', str(args.sort_memory),
+            *(['--no-db'] if args.no_db else []),
+        ])
+        scraper = _SyntheticScraper(args.sizes[0])
+        start = time.perf_counter()
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            sync_once(sync_args, scraper, None)
+        elapsed = time.perf_counter() - start
+    # ru_maxrss är i KiB på Linux men i byte på macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    print(json.dumps({'seconds': elapsed, 'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale}))
+
+
+def bench_pipeline(args):
+    """Hela sync-pipelinen utan nätverk: tid och högsta RSS per katalogstorlek"""
+    if args.child:
+        _pipeline_child(args)
+        return
+    print(f"{'packages':>10} {'store':>6} {'seconds':>9} {'peak MB':>9}")
+    for size in args.sizes:
+        for no_db in (False, True):
+            result = subprocess.run(
+                [sys.executable, __file__, 'pipeline', '--child', '--sizes', str(size),
+                 '--sort-memory', str(args.sort_memory), *(['--no-db'] if no_db else [])],
+                capture_output=True, text=True,
+            )
+            if result.returncode != 0:
+                print(result.stderr)
+                sys.exit(1)
+            data = json.loads(result.stdout.splitlines()[-1])
+            print(f"{size:>10} {'no' if no_db else 'yes':>6} {data['seconds']:>9.2f} "
+                  f"{data['peak_rss'] / (1024 * 1024):>9.1f}")
+
+
+def bench_cassette(args):
+    """Full sync mot fejkservern med inspelning, sedan samma sync ur kassetten utan nätverk"""
+    fake = FakePubDev(package_count=args.packages, latency=args.latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        sources = tmp / 'sources.json'
+        sources.write_text(json.dumps({'publishers': [fake.publisher], 'packages': [], 'fallback': []}),
+                           encoding='utf-8')
+        cassette = tmp / 'pubdev.cassette'
+
+        def sync(run, base_url, *extra):
+            out = tmp / run
+            out.mkdir()
+            sync_args = parse_args([
+                '--base-url', base_url, '--sources', str(sources), '--no-cache', '--no-db', '--rate', '0',
+                '--output', str(out / 'README.md'), '--html', str(out / 'index.html'),
+                '--json', str(out / 'packages.json'), *extra,
+            ])
+            scraper, cache = build_scraper(sync_args)
+            start = time.perf_counter()
+            with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+                try:
+                    sync_once(sync_args, scraper, cache)
+                finally:
+                    scraper.close()
+            readme = (out / 'README.md').read_text(encoding='utf-8')
+            # Allt utom tidsstämpeln ska vara identiskt
+            return time.perf_counter() - start, [line for line in readme.splitlines()
+                                                 if not line.startswith('**Last updated:**')]
+
+        print(f"📦 {args.packages} packages, {args.latency * 1000:.0f} ms latency per request")
+        with fake as base_url:
+            live, expected = sync('record', base_url, '--record', str(cassette))
+        print(f"{'live + record':<16} {live:>9.3f} s")
+        print(f"{'cassette':<16} {cassette.stat().st_size / 1024:>9.1f} KiB")
+        # Servern är nere: allt måste komma ur kassetten
+        for run in range(args.repeat):
+            elapsed, readme = sync(f'replay{run}', 'http://cassette.invalid', '--replay', str(cassette))
+            same = '✅' if readme == expected else '❌ README differs'
+            print(f"{'replay':<16} {elapsed:>9.3f} s {same}")
+
+
+def _percentile(ordered, quantile):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * quantile))]
+
+
+def bench_faults(args):
+    """get_package_info mot en server som injicerar fel, med och utan omförsök/hedging"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    fake = FakePubDev(
+        package_count=args.packages,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        reset_rate=args.reset_rate,
+        truncate_rate=args.truncate_rate,
+        seed=args.seed,
+    )
+    with fake as base_url:
+        print(f"📦 {args.packages} packages: {args.slow_rate:.0%} slow ({args.slow_latency:.1f} s), "
+              f"{args.reset_rate:.0%} reset, {args.truncate_rate:.0%} truncated, {args.error_rate:.0%} 500")
+        print(f"{'mode':<10} {'seconds':>8} {'ok':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for mode, retries, hedge in (('single', 0, False), ('resilient', args.retries, True)):
+            scraper = PubDevScraper(base_url, pool_size=args.concurrency, rate=None, retries=retries, hedge=hedge)
+            latencies = []
+
+            def fetch(name):
+                start = time.perf_counter()
+                info = scraper.get_package_info(name)
+                latencies.append(time.perf_counter() - start)
+                return info
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(args.concurrency) as executor:
+                infos = list(executor.map(fetch, fake.package_names))
+            elapsed = time.perf_counter() - start
+            scraper.close()
+            latencies.sort()
+            ok = sum(1 for info in infos if info)
+            print(f"{mode:<10} {elapsed:>8.2f} {ok:>6} {_percentile(latencies, 0.5) * 1000:>8.1f} "
+                  f"{_percentile(latencies, 0.99) * 1000:>8.1f} {latencies[-1] * 1000:>8.1f}")
+
+
+def _batch_repos(tmp, count, publisher):
+    """count klonade repos med var sin bare remote och sources.json mot publisher"""
+    def git(*git_args, cwd=None):
+        subprocess.run(['git', *git_args], cwd=cwd, check=True, capture_output=True)
+
+    repos = []
+    for index in range(count):
+        remote = tmp / f'repo{index}.git'
+        repo = tmp / f'repo{index}'
+        git('init', '-q', '--bare', str(remote))
+        git('clone', '-q', str(remote), str(repo))
+        git('config', 'user.name', 'bench', cwd=repo)
+        git('config', 'user.email', 'bench@example.invalid', cwd=repo)
+        (repo / 'scripts').mkdir()
+        (repo / 'scripts' / 'sources.json').write_text(
+            json.dumps({'publishers': [publisher], 'packages': [], 'fallback': []}), encoding='utf-8'
+        )
+        git('add', '-A', cwd=repo)
+        git('commit', '-q', '-m', 'init', cwd=repo)
+        git('push', '-q', 'origin', 'HEAD', cwd=repo)
+        repos.append(repo)
+    return repos
+
+
+def bench_batch(args):
+    """pull/generate/commit/push i många repos: ett i taget mot batch_update"""
+    from batch_update import run_batch
+    from git_plumbing import pull
+
+    fake = FakePubDev(package_count=args.packages, latency=args.latency)
+    with tempfile.TemporaryDirectory() as tmp, fake as base_url:
+        tmp = Path(tmp)
+        print(f"📦 {args.repos} repos, {args.packages} packages, {args.latency * 1000:.0f} ms latency per request")
+        common = ['--base-url', base_url, '--no-cache', '--no-db', '--rate', '0']
+
+        # Som tidigare: update_packages.py i varje repo för sig, med egen hämtning
+        repos = _batch_repos(tmp / 'sequential', args.repos, fake.publisher)
+        start = time.perf_counter()
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            for repo in repos:
+                pull(repo, '--no-rebase')
+                sync_args = parse_args([
+                    *common, '--sources', str(repo / 'scripts' / 'sources.json'),
+                    '--output', str(repo / 'README.md'), '--html', str(repo / 'index.html'),
+                    '--json', str(repo / 'packages.json'), '--commit', 'bench', '--push',
+                ])
+                scraper, cache = build_scraper(sync_args)
+                try:
+                    sync_once(sync_args, scraper, cache)
+                finally:
+                    scraper.close()
+        print(f"{'one at a time':<16} {time.perf_counter() - start:>9.2f} s")
+
+        for label, count in (('batch, 1 repo', 1), (f'batch, {args.repos} repos', args.repos)):
+            repos = _batch_repos(tmp / f'batch{count}', count, fake.publisher)
+            start = time.perf_counter()
+            with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+                results = run_batch(repos, parse_args(common), args.jobs, commit='bench', push=True)
+            elapsed = time.perf_counter() - start
+            failed = sum(1 for result in results if result['status'] != 'ok')
+            print(f"{label:<16} {elapsed:>9.2f} s" + (f" ❌ {failed} failed" if failed else ""))
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).parent, capture_output=True, text=True,
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_suite(args):
+    """Kör hela sviten och returnera {metric: {'value', 'unit'}}"""
+    metrics = {}
+
+    def record(name, value, unit):
+        metrics[name] = {'value': value, 'unit': unit}
+        print(f"  {name:<32} {value:>14.6g} {unit}")
+
+    fake = FakePubDev(
+        package_count=args.packages,
+        latency=args.latency,
+        page_size=args.page_size,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    with fake as base_url:
+        scraper = PubDevScraper(base_url, pool_size=args.concurrency, rate=None)
+
+        names, elapsed = _timed(scraper.get_packages_from_publisher, fake.publisher)
+        record('discovery.seconds', elapsed, 's')
+        record('discovery.packages_per_second', len(names) / elapsed if elapsed else 0.0, 'ops/s')
+
+        infos, elapsed = _timed(scraper.get_package_infos, names, args.concurrency)
+        record('fetch.seconds', elapsed, 's')
+        record('fetch.packages_per_second', len(names) / elapsed if elapsed else 0.0, 'ops/s')
+        record('fetch.failed', float(sum(1 for info in infos if info is None)), 'count')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.render_sizes:
+            records = [PackageRecord(f"pkg_{i:07d}", '1.0.0') for i in range(size)]
+            content, elapsed = _timed(ReadmeGenerator.generate, records)
+            record(f'render.{size}.seconds', elapsed, 's')
+
+            # GUI:ts README-parse: kall läsning och cachad refresh
+            readme_path = Path(tmp) / f"README_{size}.md"
+            readme_path.write_text(content, encoding='utf-8')
+            cache = ReadmeTableCache(readme_path)
+            _, elapsed = _timed(cache.load)
+            record(f'readme_parse.{size}.cold_seconds', elapsed, 's')
+            _, elapsed = _timed(cache.load)
+            record(f'readme_parse.{size}.warm_seconds', elapsed, 's')
+
+    measure_startup(record, repeat=5)
+    return metrics
+
+
+def bench_suite(args):
+    """Hela sviten, resultat som JSON för jämförelse mellan commits"""
+    print(f"🏁 Benchmark suite: {args.packages} packages, {args.latency * 1000:.0f} ms latency, "
+          f"{args.error_rate:.0%} errors")
+    metrics = run_suite(args)
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {
+                'packages': args.packages,
+                'latency': args.latency,
+                'page_size': args.page_size,
+                'error_rate': args.error_rate,
+                'concurrency': args.concurrency,
+                'render_sizes': args.render_sizes,
+            },
+        },
+        'metrics': metrics,
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n", encoding='utf-8')
+        print(f"💾 Results written to {args.json}")
+
+
+def bench_compare(args):
+    """Jämför två resultatfiler, exit 1 vid regression över tröskeln"""
+    base = json.loads(Path(args.base).read_text(encoding='utf-8'))['metrics']
+    new = json.loads(Path(args.new).read_text(encoding='utf-8'))['metrics']
+
+    regressions = 0
+    print(f"{'metric':<34} {'base':>12} {'new':>12} {'change':>9}")
+    for name in sorted(set(base) & set(new)):
+        old_value, new_value = base[name]['value'], new[name]['value']
+        unit = new[name]['unit']
+        change = (new_value - old_value) / old_value if old_value else 0.0
+        # Tid: högre är sämre, genomströmning: lägre är sämre
+        worse = change if unit == 's' else -change if unit == 'ops/s' else 0.0
+        flag = ''
+        if worse > args.threshold:
+            flag = ' ❌'
+            regressions += 1
+        print(f"{name:<34} {old_value:>12.6g} {new_value:>12.6g} {change:>+8.1%}{flag}")
+
+    if regressions:
+        print(f"\n❌ {regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\n✅ No regressions above {args.threshold:.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks against a local fake pub.dev")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    fetch = sub.add_parser('fetch', help="package info fetch throughput")
+    fetch.add_argument('--packages', type=int, default=300)
+    fetch.add_argument('--latency', type=float, default=0.05, help="seconds per request")
+    fetch.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    fetch.set_defaults(func=bench_fetch)
+
+    parse = sub.add_parser('parse', help="publisher page extraction time and peak memory")
+    parse.add_argument('--packages', type=int, default=20000)
+    parse.set_defaults(func=bench_parse)
+
+    gui_log = sub.add_parser('gui-log', help="GUI log panel throughput (needs a display)")
+    gui_log.add_argument('--lines', type=int, default=100000)
+    gui_log.add_argument('--capacity', type=int, default=5000)
+    gui_log.set_defaults(func=bench_gui_log)
+
+    gui_table = sub.add_parser('gui-table', help="package table add/remove latency (needs a display)")
+    gui_table.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    gui_table.set_defaults(func=bench_gui_table)
+
+    gui_search = sub.add_parser('gui-search', help="search box keystroke latency (needs a display)")
+    gui_search.add_argument('--packages', type=int, default=50000)
+    gui_search.add_argument('--query', default="widget chart")
+    gui_search.add_argument('--seed', type=int, default=1)
+    gui_search.set_defaults(func=bench_gui_search)
+
+    registry = sub.add_parser('registry', help="package collection memory and add/lookup/remove cost")
+    registry.add_argument('--packages', type=int, default=50000)
+    registry.set_defaults(func=bench_registry)
+
+    startup = sub.add_parser('startup', help="import time and GUI time to first paint")
+    startup.add_argument('--repeat', type=int, default=5, help="runs per measurement, best is kept")
+    startup.add_argument('--max-import-ms', type=float, default=None, help="fail if an import takes longer")
+    startup.add_argument('--max-paint-ms', type=float, default=None, help="fail if first paint takes longer")
+    startup.add_argument('--json', help="write results to this file")
+    startup.set_defaults(func=bench_startup)
+
+    pipeline = sub.add_parser('pipeline', help="sync pipeline time and peak RSS without network")
+    pipeline.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    pipeline.add_argument('--sort-memory', type=int, default=DEFAULT_SORT_MEMORY,
+                          help="packages sorted in memory before spilling to disk")
+    pipeline.add_argument('--no-db', action='store_true', help=argparse.SUPPRESS)
+    pipeline.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    pipeline.set_defaults(func=bench_pipeline)
+
+    cassette = sub.add_parser('cassette', help="full sync recorded live, then replayed offline from the cassette")
+    cassette.add_argument('--packages', type=int, default=1000)
+    cassette.add_argument('--latency', type=float, default=0.02, help="seconds per request")
+    cassette.add_argument('--repeat', type=int, default=3, help="replay runs")
+    cassette.set_defaults(func=bench_cassette)
+
+    faults = sub.add_parser('faults', help="package fetch latency and failures against a fault-injecting server")
+    faults.add_argument('--packages', type=int, default=300)
+    faults.add_argument('--concurrency', type=int, default=8)
+    faults.add_argument('--slow-rate', type=float, default=0.05, help="share of requests answering slowly")
+    faults.add_argument('--slow-latency', type=float, default=2.0, help="extra seconds for a slow request")
+    faults.add_argument('--reset-rate', type=float, default=0.02, help="share of connections reset")
+    faults.add_argument('--truncate-rate', type=float, default=0.02, help="share of responses cut short")
+    faults.add_argument('--error-rate', type=float, default=0.02, help="share of API requests answering 500")
+    faults.add_argument('--retries', type=int, default=3, help="retries in resilient mode")
+    faults.add_argument('--seed', type=int, default=1)
+    faults.set_defaults(func=bench_faults)
+
+    batch = sub.add_parser('batch', help="many repos updated one at a time vs. batch_update with a shared fetch")
+    batch.add_argument('--repos', type=int, default=20)
+    batch.add_argument('--packages', type=int, default=200)
+    batch.add_argument('--latency', type=float, default=0.02, help="seconds per request")
+    batch.add_argument('--jobs', type=int, default=8, help="parallel repos in batch mode")
+    batch.set_defaults(func=bench_batch)
+
+    suite = sub.add_parser('suite', help="full suite against the fake server, JSON output")
+    suite.add_argument('--packages', type=int, default=500)
+    suite.add_argument('--latency', type=float, default=0.01, help="seconds per request")
+    suite.add_argument('--page-size', type=int, default=100, help="publisher page size")
+    suite.add_argument('--error-rate', type=float, default=0.0, help="share of API requests answering 500")
+    suite.add_argument('--seed', type=int, default=1)
+    suite.add_argument('--concurrency', type=int, default=32)
+    suite.add_argument('--render-sizes', type=int, nargs='+', default=[10, 1000, 100000])
+    suite.add_argument('--json', help="write results to this file")
+    suite.set_defaults(func=bench_suite)
+
+    compare = sub.add_parser('compare', help="compare two suite result files")
+    compare.add_argument('base')
+    compare.add_argument('new')
+    compare.add_argument('--threshold', type=float, default=0.10, help="allowed slowdown (default: 10%%)")
+    compare.set_defaults(func=bench_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
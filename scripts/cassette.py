@@ -0,0 +1,154 @@
+# scripts/cassette.py
+"""Kassettfil för inspelade HTTP-svar (bara stdlib)
+
+Format: MAGIC, sedan ett zlib-komprimerat block per svar (JSON-huvud,
+radbrytning, body), sedan ett index sorterat på nyckel med poster av fast
+storlek (16 byte nyckel, offset, längd) och sist en fot med indexets
+offset och antal. Läsaren mappar filen med mmap och binärsöker i indexet
+direkt i filen, så att öppna en kassett kostar samma sak oavsett storlek.
+
+Adaptrarna som spelar in och spelar upp via requests ligger i
+http_adapter.py.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+MAGIC = b'PUBCAS01'
+INDEX_ENTRY = struct.Struct('>16sQI')
+FOOTER = struct.Struct('>QI8s')
+
+
+class CassetteError(ValueError):
+    """Filen är ingen (hel) kassett"""
+
+
+def request_key(method, url):
+    """Nyckel för ett anrop: metod, sökväg och sorterad query
+
+    Host och port ingår inte, så en kassett inspelad mot en lokal
+    fejkserver kan spelas upp med vilken --base-url som helst.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    text = f"{method.upper()} {parts.path or '/'}?{query}"
+    return hashlib.sha256(text.encode('utf-8')).digest()[:16]
+
+
+class CassetteWriter:
+    """Spelar in svar till path (skrivs klart och byts in vid close)
+
+    Blocken skrivs direkt till en temporär fil; bara nycklar och offsets
+    hålls i minnet. Samma nyckel inspelad flera gånger ger det senaste
+    svaret. Trådsäker.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(MAGIC)
+        self._offset = len(MAGIC)
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._index)
+
+    def add(self, method, url, status, headers, body, reason=None):
+        meta = {'method': method, 'url': url, 'status': status, 'reason': reason, 'headers': dict(headers)}
+        blob = zlib.compress(json.dumps(meta).encode('utf-8') + b'\n' + body)
+        key = request_key(method, url)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(blob)
+            self._index[key] = (self._offset, len(blob))
+            self._offset += len(blob)
+
+    def close(self):
+        """Skriv index och fot och byt in filen (kan anropas flera gånger)"""
+        with self._lock:
+            if self._file is None:
+                return
+            index_offset = self._offset
+            for key in sorted(self._index):
+                self._file.write(INDEX_ENTRY.pack(key, *self._index[key]))
+            self._file.write(FOOTER.pack(index_offset, len(self._index), MAGIC))
+            self._file.close()
+            self._file = None
+            os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CassetteReader:
+    """Slår upp inspelade svar i en kassett via mmap
+
+    get() binärsöker i indexet i den mappade filen och dekomprimerar bara
+    det block som efterfrågas. Trådsäker (bara läsningar).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise CassetteError(f"{self.path} is empty") from None
+        size = len(self._map)
+        if size < len(MAGIC) + FOOTER.size or self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise CassetteError(f"{self.path} is not a cassette")
+        self._index_offset, self._count, magic = FOOTER.unpack_from(self._map, size - FOOTER.size)
+        if magic != MAGIC or self._index_offset + self._count * INDEX_ENTRY.size != size - FOOTER.size:
+            self.close()
+            raise CassetteError(f"{self.path} is truncated")
+
+    def __len__(self):
+        return self._count
+
+    def _key_at(self, position):
+        start = self._index_offset + position * INDEX_ENTRY.size
+        return self._map[start:start + 16]
+
+    def get(self, method, url):
+        """(meta, body) för anropet, eller None om det inte finns inspelat"""
+        key = request_key(method, url)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._count or self._key_at(low) != key:
+            return None
+        _, offset, length = INDEX_ENTRY.unpack_from(self._map, self._index_offset + low * INDEX_ENTRY.size)
+        data = zlib.decompress(self._map[offset:offset + length])
+        header, _, body = data.partition(b'\n')
+        return json.loads(header), body
+
+    def close(self):
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
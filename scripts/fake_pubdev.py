@@ -0,0 +1,240 @@
+# scripts/fake_pubdev.py
+"""Lokal fejk-pub.dev för benchmarks (ingen nätverkstrafik mot riktiga pub.dev)"""
+import hashlib
+import json
+import random
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Default-backlog (5) tappar anslutningar när många workers ansluter samtidigt
+    request_queue_size = 256
+
+
+class FakePubDev:
+    """Serverar syntetiska publisher-sidor och /api/packages/<name>
+
+    Storlek (package_count, page_size), fördröjning (latency, sekunder per
+    anrop), felfrekvens (error_rate: andel API-anrop som svarar 500) och
+    throttling (max_rps) är konfigurerbara; seed gör felen reproducerbara.
+
+    Fel som injiceras i alla anrop (andelar, dras oberoende av error_rate):
+    slow_rate svarar efter ytterligare slow_latency sekunder (svanslatens),
+    reset_rate stänger anslutningen med RST utan svar och truncate_rate
+    skickar bara halva bodyn. down kan sättas medan servern kör och får
+    alla anrop att svara 503, som ett avbrott hos pub.dev.
+
+    Användning:
+        with FakePubDev(package_count=500, latency=0.05) as base_url:
+            scraper = PubDevScraper(base_url)
+    """
+
+    def __init__(self, package_count=100, latency=0.0, publisher='gllb-apps.github.io', port=0,
+                 page_size=None, max_rps=None, error_rate=0.0, seed=None, slow_rate=0.0, slow_latency=2.0,
+                 reset_rate=0.0, truncate_rate=0.0):
+        self.package_count = package_count
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.reset_rate = reset_rate
+        self.truncate_rate = truncate_rate
+        self.down = False
+        self._random = random.Random(seed)
+        self.latency = latency
+        self.page_size = page_size
+        self.max_rps = max_rps
+        self.publisher = publisher
+        self.package_names = [f"fake_package_{i:05d}" for i in range(package_count)]
+        self._known = set(self.package_names)
+        self._server = _Server(('127.0.0.1', port), self._make_handler())
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.requests_served = 0
+        self.bytes_sent = 0
+        self.throttled = 0
+        self.errors = 0
+        self.faults = {'slow': 0, 'reset': 0, 'truncate': 0, 'down': 0}
+        self._window = []
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _over_rate_limit(self):
+        """Glidande 1 s-fönster, som pub.dev:s throttling vid max_rps"""
+        if not self.max_rps:
+            return False
+        with self._stats_lock:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.max_rps:
+                self.throttled += 1
+                return True
+            self._window.append(now)
+            return False
+
+    def _inject_error(self):
+        if not self.error_rate:
+            return False
+        with self._stats_lock:
+            if self._random.random() < self.error_rate:
+                self.errors += 1
+                return True
+            return False
+
+    def _pick_fault(self):
+        """'slow', 'reset', 'truncate' eller None för ett anrop"""
+        if self.down:
+            with self._stats_lock:
+                self.faults['down'] += 1
+            return 'down'
+        if not (self.slow_rate or self.reset_rate or self.truncate_rate):
+            return None
+        with self._stats_lock:
+            draw = self._random.random()
+            for fault, rate in (('reset', self.reset_rate), ('truncate', self.truncate_rate),
+                                ('slow', self.slow_rate)):
+                if draw < rate:
+                    self.faults[fault] += 1
+                    return fault
+                draw -= rate
+        return None
+
+    def publisher_html(self, page=1):
+        """Publisher-sida med samma struktur som pub.dev (paginerad om page_size är satt)"""
+        names = self.package_names
+        pagination = ''
+        if self.page_size:
+            start = (page - 1) * self.page_size
+            names = names[start:start + self.page_size]
+            if start + self.page_size < self.package_count:
+                next_href = f"/publishers/{self.publisher}/packages?page={page + 1}"
+                pagination = f'<ul class="pagination"><li><a href="{next_href}" rel="next">»</a></li></ul>'
+
+        rows = [
+            f'<div class="packages-item"><h3 class="packages-title">'
+            f'<a href="/packages/{name}">{name}</a></h3>'
+            f'<p class="packages-description">Synthetic package {name}</p>'
+            f'<a href="/packages/{name}/score">score</a></div>'
+            for name in names
+        ]
+        return f"<html><body><div class=\"packages\">{''.join(rows)}</div>{pagination}</body></html>"
+
+    def package_json(self, name):
+        return {
+            'name': name,
+            'latest': {
+                'version': '1.0.0',
+                'pubspec': {'name': name, 'description': f"Synthetic package {name}"},
+            },
+        }
+
+    def score_json(self, name):
+        # Deterministiska värden per package
+        seed = int(hashlib.sha1(name.encode('utf-8')).hexdigest()[:8], 16)
+        return {
+            'grantedPoints': 100 + seed % 61,
+            'maxPoints': 160,
+            'likeCount': seed % 500,
+            'popularityScore': (seed % 1000) / 1000,
+        }
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Buffra headers + body i ett paket (undviker Nagle/delayed ACK-fördröjning)
+            wbufsize = -1
+            _fault = None
+
+            def do_GET(self):
+                if fake._over_rate_limit():
+                    self.send_response(429)
+                    self.send_header('Retry-After', '1')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self._fault = fake._pick_fault()
+                if self._fault == 'down':
+                    self._send(503, 'text/plain', 'service unavailable')
+                    return
+                if self._fault == 'reset':
+                    # SO_LINGER 0 gör att close skickar RST istället för FIN
+                    self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                    self.close_connection = True
+                    return
+
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if self._fault == 'slow':
+                    time.sleep(fake.slow_latency)
+
+                path, _, query = self.path.partition('?')
+                if path == f"/publishers/{fake.publisher}/packages":
+                    page = int(parse_qs(query).get('page', ['1'])[0])
+                    self._send(200, 'text/html; charset=utf-8', fake.publisher_html(page))
+                elif path.startswith('/api/packages/'):
+                    name, _, sub = path[len('/api/packages/'):].partition('/')
+                    if fake._inject_error():
+                        self._send(500, 'application/json', '{"error": "injected"}')
+                    elif name in fake._known and sub == 'score':
+                        self._send(200, 'application/json', json.dumps(fake.score_json(name)))
+                    elif name in fake._known and not sub:
+                        self._send(200, 'application/json', json.dumps(fake.package_json(name)))
+                    else:
+                        self._send(404, 'application/json', '{"error": "not found"}')
+                else:
+                    self._send(404, 'text/plain', 'not found')
+
+            def _send(self, status, content_type, body):
+                data = body.encode('utf-8')
+                etag = f'"{hashlib.sha1(data).hexdigest()}"'
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    status, data = 304, b''
+
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                if status in (200, 304):
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                if self._fault == 'truncate' and data:
+                    # Utlovad längd men bara halva bodyn, sedan stängs anslutningen
+                    data = data[:len(data) // 2]
+                    self.close_connection = True
+                self.wfile.write(data)
+
+                with fake._stats_lock:
+                    fake.requests_served += 1
+                    fake.bytes_sent += len(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
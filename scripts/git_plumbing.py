@@ -0,0 +1,125 @@
+# scripts/git_plumbing.py
+"""Snabb commit-väg med git plumbing, delad av sync-skriptet och GUI:t
+
+Blob-hashen räknas i minnet och jämförs mot HEAD i ett enda anrop; är
+filerna oförändrade startas inga fler processer alls. Annars byggs
+committen med update-index, write-tree, commit-tree och update-ref,
+utan porcelain-kommandon och hooks. Trädet byggs i ett temporärt index
+så att det användaren har stage:at varken följer med eller skrivs över.
+"""
+import hashlib
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+
+
+class GitError(RuntimeError):
+    """Ett git-kommando misslyckades"""
+
+
+def _run(args, cwd, input=None, env=None):
+    return subprocess.run(args, cwd=cwd, input=input, env=env, capture_output=True, text=True)
+
+
+def _check(result, what):
+    if result.returncode != 0:
+        raise GitError(f"{what} failed:\n{(result.stderr or '').strip()}")
+    return result.stdout.strip()
+
+
+def blob_hash(data):
+    """Samma hash som `git hash-object` (SHA-1-repo)"""
+    digest = hashlib.sha1()
+    digest.update(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def head_entries(repo, paths, run=_run):
+    """(HEAD-commit, {path: blob-hash}) i ett anrop
+
+    Commit eller blob är None om HEAD saknas (tomt repo) eller filen inte
+    finns i HEAD. Sökvägarna är relativa till repo (cwd).
+    """
+    paths = list(paths)
+    query = "HEAD\n" + "".join(f"HEAD:./{Path(path).as_posix()}\n" for path in paths)
+    lines = _check(run(["git", "cat-file", "--batch-check"], repo, input=query), "git cat-file").splitlines()
+
+    def sha(line):
+        fields = line.split()
+        return fields[0] if len(fields) == 3 else None  # "<name> missing"
+
+    head = sha(lines[0]) if lines else None
+    return head, {path: sha(line) for path, line in zip(paths, lines[1:])}
+
+
+def commit_files(repo, files, message, run=_run, ref="HEAD"):
+    """Committa files ({relativ sökväg: bytes}) om de skiljer sig från HEAD
+
+    Returnerar den nya committens hash, eller None om allt redan är
+    committat (då har inget skrivits). Filer som ändrats skrivs till
+    arbetskatalogen. Trädet byggs i ett temporärt index (GIT_INDEX_FILE,
+    fyllt med read-tree HEAD), så andra stage:ade ändringar committas inte.
+    Som `git commit -- <paths>` uppdateras sedan bara de committade
+    sökvägarna i det riktiga indexet, så att `git status` förblir rent.
+    """
+    repo = Path(repo)
+    head, blobs = head_entries(repo, files, run)
+    changed = [path for path, data in files.items() if blob_hash(data) != blobs.get(path)]
+    if not changed:
+        return None
+
+    for path in changed:
+        target = repo / path
+        try:
+            current = target.read_bytes()
+        except OSError:
+            current = None
+        if current != files[path]:
+            target.write_bytes(files[path])
+
+    tree = _write_tree(repo, head, changed, run)
+    parents = ["-p", head] if head else []
+    commit = _check(run(["git", "commit-tree", tree, *parents, "-m", message], repo), "git commit-tree")
+    # Gamla värdet gör uppdateringen atomisk: misslyckas om HEAD flyttats under tiden
+    subject = message.splitlines()[0] if message else ""
+    _check(
+        run(["git", "update-ref", "-m", f"commit: {subject}", ref, commit, head or ""], repo),
+        "git update-ref",
+    )
+    _check(run(["git", "update-index", "--add", "--", *changed], repo), "git update-index")
+    return commit
+
+
+def _write_tree(repo, head, paths, run):
+    """Träd = HEAD + paths från arbetskatalogen, byggt i ett temporärt index"""
+    with tempfile.TemporaryDirectory(prefix="git-index-") as tmp:
+        env = {**os.environ, "GIT_INDEX_FILE": os.path.join(tmp, "index")}
+        if head:
+            _check(run(["git", "read-tree", head], repo, env=env), "git read-tree")
+        _check(run(["git", "update-index", "--add", "--", *paths], repo, env=env), "git update-index")
+        return _check(run(["git", "write-tree"], repo, env=env), "git write-tree")
+
+
+def pull(repo, *args, run=_run):
+    """git pull; kastar GitError om det misslyckas"""
+    return _check(run(["git", "pull", *args], repo), "git pull")
+
+
+def push(repo, *args, run=_run):
+    """git push; kastar GitError om det misslyckas"""
+    return _check(run(["git", "push", *args], repo), "git push")
+
+
+def read_files(repo, paths):
+    """{relativ sökväg: bytes} för filer på disk (saknade hoppas över)"""
+    repo = Path(repo)
+    files = {}
+    for path in paths:
+        rel = os.path.relpath(path, repo) if Path(path).is_absolute() else str(path)
+        try:
+            files[Path(rel).as_posix()] = (repo / rel).read_bytes()
+        except OSError:
+            continue
+    return files
@@ -0,0 +1,413 @@
+# scripts/http_adapter.py
+"""requests-adapters: rate limiting, omförsök, hedging, circuit breaker och kassetter"""
+import io
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from urllib.parse import urlsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ChunkedEncodingError, ConnectionError, Timeout
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from metrics import metrics
+from cassette import CassetteReader, CassetteWriter
+from rate_limit import DEFAULT_MAX_RATE, DEFAULT_RATE, TokenBucket, parse_retry_after
+from resilience import (
+    CONNECT_TIMEOUT, DEFAULT_REQUEST_BUDGET, DEFAULT_RETRIES, READ_TIMEOUT, RETRY_STATUSES, CircuitBreaker,
+    LatencyTracker, backoff_delay,
+)
+
+# Fel där ett nytt försök kan lyckas (anslutning, timeout, avbruten body)
+RETRY_EXCEPTIONS = (ConnectionError, Timeout, ChunkedEncodingError)
+# Hedge-anrop får vara högst så här stor andel av alla anrop (plus HEDGE_BURST)
+HEDGE_BUDGET = 0.1
+HEDGE_BURST = 10
+HEDGE_METHODS = frozenset({'GET', 'HEAD'})
+# Max duplikat per försök (ett nytt skickas bara om ett tidigare felat)
+MAX_HEDGES = 2
+HEDGE_THREADS_PER_CONNECTION = 4
+
+
+class CircuitOpenError(ConnectionError):
+    """Hosten har felat för många gånger i rad; anropet görs inte alls"""
+
+
+def _close_result(future):
+    if future.exception() is None:
+        future.result()[0].close()
+
+
+class _SendClock:
+    """När ett försök senast fick sin token i bucketen
+
+    Hedge-timern och latensproven räknas härifrån: väntan på en token är
+    vår egen kö, inte hostens svarstid, och ska inte ge hedge-anrop. Efter
+    ett 429 nollställs klockan tills nästa token tagits.
+    """
+
+    def __init__(self):
+        self.started = None
+        self._sent = threading.Event()
+
+    def start(self):
+        self.started = time.monotonic()
+        self._sent.set()
+
+    def pause(self):
+        self.started = None
+        self._sent.clear()
+
+    def wake(self, _future=None):
+        """Släpp den som väntar (försöket är klart utan att ha skickats om)"""
+        self._sent.set()
+
+    def wait(self):
+        self._sent.wait()
+
+    def elapsed(self):
+        return 0.0 if self.started is None else time.monotonic() - self.started
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter med rate limiting, omförsök, hedging och circuit breaker
+
+    Sitter under sessionen, så cache och alla anrop går automatiskt genom
+    den. Per anrop, utifrån och in:
+
+    - circuit breaker per host: när hosten felat för många gånger i rad
+      ger anrop CircuitOpenError direkt istället för att vänta ut timeouts
+    - omförsök på anslutningsfel, timeouts och 5xx med exponentiell
+      backoff och jitter, inom request_budget sekunder totalt
+    - hedging (GET): har svaret inte kommit efter p95 av de senaste
+      svarstiderna skickas ett duplikat och det första svaret vinner
+    - token bucket per host och omförsök på 429 + Retry-After
+
+    Utan stream läses bodyn inuti försöket, så att en anslutning som hänger
+    mitt i ett svar också täcks av timeout, hedging och omförsök.
+    rate=None stänger av rate limiting, retries=0 omförsöken.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, max_rate=DEFAULT_MAX_RATE, max_throttle_retries=3,
+                 retries=DEFAULT_RETRIES, hedge=True, request_budget=DEFAULT_REQUEST_BUDGET, **kwargs):
+        self.limit_rate = rate
+        self.limit_max_rate = max_rate
+        self.max_throttle_retries = max_throttle_retries
+        self.retries = retries
+        self.hedge = hedge
+        self.request_budget = request_budget
+        self.latency = LatencyTracker()
+        self._buckets = {}
+        self._breakers = {}
+        self._buckets_lock = threading.Lock()
+        self._hedge_executor = None
+        self._attempts = 0
+        self._hedges = 0
+        super().__init__(**kwargs)
+
+    def bucket(self, host):
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.limit_rate, max_rate=self.limit_max_rate)
+                self._buckets[host] = bucket
+            return bucket
+
+    def breaker(self, host):
+        with self._buckets_lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker()
+            return breaker
+
+    def throttled_count(self):
+        """Antal 429-svar över alla hosts"""
+        with self._buckets_lock:
+            return sum(bucket.throttled for bucket in self._buckets.values())
+
+    def circuit_open_count(self):
+        """Antal gånger en krets har öppnats, över alla hosts"""
+        with self._buckets_lock:
+            return sum(breaker.opened for breaker in self._breakers.values())
+
+    def _send_once(self, request, **kwargs):
+        metrics.incr('http.requests')
+        try:
+            with metrics.span('http.request'):
+                response = super().send(request, **kwargs)
+                if not kwargs.get('stream'):
+                    response.content
+        except Exception:
+            metrics.incr('http.errors')
+            raise
+        # Content-Length = faktiskt överförda bytes (0 vid 304)
+        metrics.incr('http.bytes', int(response.headers.get('Content-Length') or 0))
+        if response.status_code >= 400:
+            metrics.incr('http.errors')
+        return response
+
+    def _send_throttled(self, request, clock=None, **kwargs):
+        if not self.limit_rate:
+            if clock is not None:
+                clock.start()
+            return self._send_once(request, **kwargs)
+
+        bucket = self.bucket(urlsplit(request.url).netloc)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            if clock is not None:
+                clock.start()
+            response = self._send_once(request, **kwargs)
+            if response.status_code != 429:
+                bucket.on_success()
+                return response
+            if attempt >= self.max_throttle_retries:
+                return response
+
+            attempt += 1
+            metrics.incr('http.retries')
+            if clock is not None:
+                clock.pause()
+            bucket.on_throttled(parse_retry_after(response.headers.get('Retry-After')))
+            response.close()
+
+    def _hedge_pool(self):
+        with self._buckets_lock:
+            if self._hedge_executor is None:
+                # Förlorare i en hedge kör klart i bakgrunden (tills servern svarar
+                # eller read-timeout) och håller en tråd under tiden; med för få
+                # trådar köar nya anrop bakom dem
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=HEDGE_THREADS_PER_CONNECTION * self._pool_maxsize,
+                    thread_name_prefix='http-hedge',
+                )
+            return self._hedge_executor
+
+    def _take_hedge(self):
+        with self._buckets_lock:
+            if self._hedges >= HEDGE_BUDGET * self._attempts + HEDGE_BURST:
+                return False
+            self._hedges += 1
+            return True
+
+    def _timed_send(self, request, clock, **kwargs):
+        """(svar, sekunder från att token tagits till att svaret lästs)"""
+        response = self._send_throttled(request, clock=clock, **kwargs)
+        return response, clock.elapsed()
+
+    def _submit_timed(self, executor, request, **kwargs):
+        clock = _SendClock()
+        future = executor.submit(self._timed_send, request, clock, **kwargs)
+        future.add_done_callback(clock.wake)
+        return future, clock
+
+    def _wait_for_hedge(self, primary, clock):
+        """primary:s (svar, tid) om det kommer inom hedge-fördröjningen, annars None
+
+        Fördröjningen räknas från att primary fått sin token, så anrop som
+        köar i bucketen (eller väntar ut ett 429) inte dupliceras.
+        """
+        delay = self.latency.hedge_delay()
+        while True:
+            clock.wait()
+            try:
+                return primary.result(timeout=max(0.0, delay - clock.elapsed()))
+            except FutureTimeout:
+                if clock.started is not None and clock.elapsed() >= delay:
+                    return None
+
+    def _send_hedged(self, request, **kwargs):
+        if not self.hedge or request.method not in HEDGE_METHODS:
+            return self._send_throttled(request, **kwargs)
+
+        with self._buckets_lock:
+            self._attempts += 1
+        executor = self._hedge_pool()
+        primary, clock = self._submit_timed(executor, request, **kwargs)
+        result = self._wait_for_hedge(primary, clock)
+        if result is not None:
+            response, elapsed = result
+            if response.status_code not in RETRY_STATUSES:
+                self.latency.add(elapsed)
+            return response
+        if not self._take_hedge():
+            return primary.result()[0]
+
+        # Duplikaten går också genom bucketen och tar var sin token
+        metrics.incr('http.hedges')
+        hedges = [self._submit_timed(executor, request.copy(), **kwargs)[0]]
+        pending = {primary, *hedges}
+        failed = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and future.result()[0].status_code not in RETRY_STATUSES:
+                    # Första användbara svaret vinner; förloraren stängs när den blir klar.
+                    # Bara vinnarens egen tid räknas, annars drar de långsamma
+                    # svaren som hedgingen ska runda upp fördröjningen till sig.
+                    for other in pending:
+                        other.add_done_callback(_close_result)
+                    for other in failed:
+                        _close_result(other)
+                    if future is not primary:
+                        metrics.incr('http.hedge_wins')
+                    response, elapsed = future.result()
+                    self.latency.add(elapsed)
+                    return response
+                failed.append(future)
+            if failed and pending and len(hedges) < MAX_HEDGES and self._take_hedge():
+                # Ett duplikat som felar snabbt hjälper inte mot det långsamma: skicka ett till
+                metrics.incr('http.hedges')
+                hedges.append(self._submit_timed(executor, request.copy(), **kwargs)[0])
+                pending.add(hedges[-1])
+        # Alla misslyckades: låt omförsöken ta det senaste felet
+        for other in failed[:-1]:
+            _close_result(other)
+        return failed[-1].result()[0]
+
+    def _attempt_timeout(self, timeout, started):
+        """(connect, read) för ett försök, begränsat av det som är kvar av budgeten"""
+        remaining = max(0.001, self.request_budget - (time.monotonic() - started))
+        if timeout is None:
+            timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        if isinstance(timeout, tuple):
+            return tuple(None if part is None else min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).netloc
+        breaker = self.breaker(host)
+        started = time.monotonic()
+        timeout = kwargs.pop('timeout', None)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                metrics.incr('http.circuit_open')
+                raise CircuitOpenError(f"Circuit open for {host}, failing fast", request=request)
+            error = response = None
+            try:
+                response = self._send_hedged(request, timeout=self._attempt_timeout(timeout, started), **kwargs)
+            except RETRY_EXCEPTIONS as e:
+                error = e
+            except BaseException:
+                # Annars förblir ett provanrop i half-open taget och kretsen släpper aldrig igenom något mer
+                breaker.release_probe()
+                raise
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                breaker.on_success()
+                return response
+            breaker.on_failure()
+
+            delay = backoff_delay(attempt)
+            if attempt >= self.retries or time.monotonic() - started + delay >= self.request_budget:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            attempt += 1
+            metrics.incr('http.retries')
+            time.sleep(delay)
+
+    def close(self):
+        with self._buckets_lock:
+            executor, self._hedge_executor = self._hedge_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        super().close()
+
+
+# Headers som inte stämmer längre när body sparats avkodad
+_RECORD_DROP_HEADERS = ('Content-Encoding', 'Transfer-Encoding', 'Connection', 'Keep-Alive')
+_CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+
+class CassetteMiss(ConnectionError):
+    """Anropet finns inte i kassetten (replay gör aldrig nätverksanrop)"""
+
+
+class RecordingAdapter(RateLimitedAdapter):
+    """RateLimitedAdapter som även spelar in varje slutligt svar i en kassett
+
+    Villkorliga headers tas bort innan anropet skickas, så att kassetten
+    alltid får hela bodyn (ett 304 går inte att spela upp utan cache).
+    Kassetten skrivs klart när adaptern stängs (session.close()).
+    """
+
+    def __init__(self, path, **kwargs):
+        self.recorder = CassetteWriter(path)
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        for header in _CONDITIONAL_HEADERS:
+            request.headers.pop(header, None)
+        response = super().send(request, **kwargs)
+        # Läser hela bodyn; iter_content fungerar sedan som vanligt ur minnet
+        body = response.content
+        headers = {key: value for key, value in response.headers.items() if key not in _RECORD_DROP_HEADERS}
+        headers['Content-Length'] = str(len(body))
+        self.recorder.add(request.method, request.url, response.status_code, headers, body, response.reason)
+        metrics.incr('cassette.recorded')
+        return response
+
+    def close(self):
+        self.recorder.close()
+        super().close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Spelar upp svar ur en kassett utan några nätverksanrop
+
+    Ett anrop som saknas i kassetten ger CassetteMiss (en ConnectionError,
+    så det hanteras som ett nätverksfel). If-None-Match mot inspelad ETag
+    ger 304, så HTTP-cachen beter sig som mot servern.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.reader = CassetteReader(path)
+
+    def throttled_count(self):
+        return 0
+
+    def circuit_open_count(self):
+        return 0
+
+    def send(self, request, **kwargs):
+        metrics.incr('http.requests')
+        found = self.reader.get(request.method, request.url)
+        if found is None:
+            metrics.incr('cassette.misses')
+            metrics.incr('http.errors')
+            raise CassetteMiss(f"{request.method} {request.url} not in cassette {self.reader.path}", request=request)
+        metrics.incr('cassette.hits')
+        meta, body = found
+
+        headers = CaseInsensitiveDict(meta['headers'])
+        status = meta['status']
+        etag = headers.get('ETag')
+        if status == 200 and etag and request.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+            headers['Content-Length'] = '0'
+        metrics.incr('http.bytes', len(body))
+        if status >= 400:
+            metrics.incr('http.errors')
+
+        response = Response()
+        response.status_code = status
+        response.reason = 'Not Modified' if status == 304 else meta.get('reason')
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        self.reader.close()
@@ -0,0 +1,228 @@
+# scripts/http_cache.py
+"""Persistent HTTP-cache med villkorliga anrop (ETag / Last-Modified)"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from metrics import metrics
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+class HttpCache:
+    """Disk-cache för GET-svar, nyckel = URL
+
+    Sparade svar revalideras med If-None-Match / If-Modified-Since och
+    återanvänds vid 304. Med ttl (sekunder) används ett färskt svar direkt
+    utan något anrop alls. Totalstorleken hålls under max_bytes genom
+    LRU-eviction.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, ttl=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / 'index.json'
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            data = json.loads(self.index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+
+        # Indexet sparas i LRU-ordning (äldst först)
+        for url, entry in data.get('entries', []):
+            if (self.directory / entry['file']).exists():
+                self._entries[url] = entry
+                self._total_bytes += entry['size']
+
+    def save(self):
+        """Skriv indexet till disk (atomiskt)"""
+        with self._lock:
+            data = {'entries': list(self._entries.items())}
+        tmp_path = self.index_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, session, url, timeout, stream=False):
+        """GET via cachen, returnerar ett requests.Response
+
+        Med stream=True läses bodyn inte in här: ett 200-svar strömmas till
+        anroparen och skrivs samtidigt till cachefilen, som registreras
+        först när hela bodyn lästs.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry:
+                self._entries.move_to_end(url)
+
+        if entry and self.ttl is not None and time.time() - entry['stored_at'] < self.ttl:
+            cached = self._cached_response(url, entry)
+            if cached is not None:
+                self._count(hit=True)
+                return cached
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = session.get(url, timeout=timeout, headers=headers, stream=stream)
+
+        if response.status_code == 304 and entry:
+            # 304:an har ingen body; stäng den så att connectionen går tillbaka
+            # till poolen (med stream=True görs det annars aldrig)
+            response.close()
+            cached = self._cached_response(url, entry)
+            if cached is not None:
+                with self._lock:
+                    entry['stored_at'] = time.time()
+                self._count(hit=True)
+                return cached
+            # Body saknas på disk: hämta om utan villkor
+            response = session.get(url, timeout=timeout, stream=stream)
+
+        self._count(hit=False)
+        if response.status_code == 200:
+            if stream:
+                self._tee(url, response)
+            else:
+                self._store(url, response)
+        return response
+
+    def _count(self, hit):
+        metrics.incr('cache.hits' if hit else 'cache.misses')
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _cached_response(self, url, entry):
+        import requests  # redan laddat av sessionen som anropar get()
+
+        try:
+            body = (self.directory / entry['file']).read_bytes()
+        except OSError:
+            self._remove(url)
+            return None
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        response._content_consumed = True
+        response.encoding = entry.get('encoding')
+        if entry.get('content_type'):
+            response.headers['Content-Type'] = entry['content_type']
+        return response
+
+    def _cacheable(self, response):
+        return bool(response.headers.get('ETag') or response.headers.get('Last-Modified') or self.ttl is not None)
+
+    def _store(self, url, response):
+        if not self._cacheable(response):
+            return
+        file_name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        body = response.content
+        (self.directory / file_name).write_bytes(body)
+        self._add_entry(url, file_name, response, len(body))
+
+    def _tee(self, url, response):
+        """Låt iter_content (och content) skriva bodyn till cachen medan den läses"""
+        if not self._cacheable(response):
+            return
+        from requests.utils import stream_decode_response_unicode  # redan laddat av sessionen
+
+        read_chunks = response.iter_content
+
+        def iter_content(chunk_size=1, decode_unicode=False):
+            chunks = self._teed(url, response, read_chunks(chunk_size))
+            if decode_unicode:
+                return stream_decode_response_unicode(chunks, response)
+            return chunks
+
+        response.iter_content = iter_content
+
+    def _teed(self, url, response, chunks):
+        """Ger chunks vidare och skriver dem till en temporär fil
+
+        Filen byts in och registreras bara om hela bodyn lästs; avbryts
+        läsningen (fel, eller anroparen slutar) tas den bort.
+        """
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        size = 0
+        complete = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            if complete:
+                file_name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+                os.replace(tmp_name, self.directory / file_name)
+                self._add_entry(url, file_name, response, size)
+            else:
+                os.unlink(tmp_name)
+
+    def _add_entry(self, url, file_name, response, size):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self._lock:
+            old = self._entries.pop(url, None)
+            if old:
+                self._total_bytes -= old['size']
+            self._entries[url] = {
+                'file': file_name,
+                'etag': etag,
+                'last_modified': last_modified,
+                'content_type': response.headers.get('Content-Type'),
+                'encoding': response.encoding,
+                'stored_at': time.time(),
+                'size': size,
+            }
+            self._total_bytes += size
+            evicted = self._evict()
+
+        for entry in evicted:
+            (self.directory / entry['file']).unlink(missing_ok=True)
+
+    def _evict(self):
+        """Släng minst nyligen använda poster tills storleken ryms (kräver lock)"""
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry['size']
+            evicted.append(entry)
+        return evicted
+
+    def _remove(self, url):
+        with self._lock:
+            entry = self._entries.pop(url, None)
+            if entry:
+                self._total_bytes -= entry['size']
+
+    def summary(self):
+        """Kort rad med hit/miss-statistik"""
+        total = self.hits + self.misses
+        ratio = (self.hits / total * 100) if total else 0.0
+        return f"{self.hits} hits / {self.misses} misses ({ratio:.0f}% hit ratio)"
@@ -0,0 +1,151 @@
+# scripts/metrics.py
+"""Lätt instrumentering: tidsspann och räknare med JSON/Prometheus-rapport
+
+Avstängd som standard; då är span() och incr() i princip gratis.
+
+    from metrics import metrics
+
+    metrics.enable()
+    with metrics.span('discovery'):
+        ...
+    metrics.incr('http.requests')
+    metrics.write_json('metrics.json')
+"""
+import json
+import os
+import re
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ('_metrics', '_name', '_start')
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.observe(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class Metrics:
+    """Aggregerade spann (antal, total, max per namn) och räknare, trådsäkert"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+        self._started = time.time()
+
+    def enable(self):
+        self.enabled = True
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._started = time.time()
+
+    def span(self, name):
+        """Context manager som tar tid på blocket under namnet name"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                self._spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    def incr(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def report(self):
+        """Ögonblicksbild som dict"""
+        with self._lock:
+            return {
+                'started': self._started,
+                'duration_seconds': time.time() - self._started,
+                'spans': {
+                    name: {'count': count, 'total_seconds': total, 'max_seconds': peak}
+                    for name, (count, total, peak) in sorted(self._spans.items())
+                },
+                'counters': dict(sorted(self._counters.items())),
+            }
+
+    def summary_lines(self):
+        """Läsbar sammanfattning, en rad per spann/räknare"""
+        report = self.report()
+        lines = []
+        for name, stats in report['spans'].items():
+            lines.append(
+                f"⏱  {name}: {stats['total_seconds']:.3f}s total, "
+                f"{stats['count']}x, max {stats['max_seconds'] * 1000:.1f} ms"
+            )
+        for name, value in report['counters'].items():
+            lines.append(f"🔢 {name}: {value}")
+        return lines
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.report(), indent=2) + "\n")
+
+    def write_prometheus(self, path, prefix='reporead'):
+        """Textfil för node_exporters textfile collector"""
+        report = self.report()
+        lines = [
+            f"# TYPE {prefix}_span_seconds_total counter",
+            *(
+                f'{prefix}_span_seconds_total{{span="{name}"}} {stats["total_seconds"]:.6f}'
+                for name, stats in report['spans'].items()
+            ),
+            f"# TYPE {prefix}_span_count_total counter",
+            *(
+                f'{prefix}_span_count_total{{span="{name}"}} {stats["count"]}'
+                for name, stats in report['spans'].items()
+            ),
+            f"# TYPE {prefix}_span_max_seconds gauge",
+            *(
+                f'{prefix}_span_max_seconds{{span="{name}"}} {stats["max_seconds"]:.6f}'
+                for name, stats in report['spans'].items()
+            ),
+        ]
+        for name, value in report['counters'].items():
+            metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_run_timestamp_seconds {report['started'] + report['duration_seconds']:.0f}")
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+
+def _write_atomic(path, text):
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+# Delad instans för sync-skriptet och GUI:t
+metrics = Metrics()
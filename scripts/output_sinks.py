@@ -0,0 +1,253 @@
+# scripts/output_sinks.py
+"""Ett pass över packages, flera utdataformat (README, index.html, JSON, NDJSON)
+
+Varje sink skriver strömmande till en temporär fil bredvid målet och
+byter in den med os.replace först när alla sinks är klara, så en läsare
+ser aldrig en halvskriven fil. Inget format bygger upp hela utdatan i
+minnet, och ett nytt format är bara en ny sink i samma pass:
+
+    meta = {'timestamp': ..., 'fallback_used': False}
+    run_pipeline(packages, [MarkdownSink(readme), HtmlSink(index), JsonSink(catalogue)], meta)
+"""
+import hashlib
+import html
+import io
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from readme_table import render_row, table_header
+
+
+def default_meta(fallback_used=False, timestamp=None):
+    return {
+        'timestamp': timestamp or datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+        'fallback_used': fallback_used,
+    }
+
+
+class Sink:
+    """Bas: skriv till path via en temporär fil, eller till en given stream"""
+
+    def __init__(self, path=None, stream=None):
+        self.path = Path(path) if path is not None else None
+        self._stream = stream
+        self._tmp_path = None
+        self._out = None
+        self._digest = hashlib.sha256()
+
+    @property
+    def digest(self):
+        """sha256 av allt som skrivits (samma som hash av filens text)"""
+        return self._digest.hexdigest()
+
+    def open(self):
+        if self._stream is not None:
+            self._out = self._stream
+        else:
+            self._tmp_path = self.path.with_name(self.path.name + '.tmp')
+            self._out = open(self._tmp_path, 'w', encoding='utf-8', newline='\n')
+        return self
+
+    def _write(self, text):
+        self._digest.update(text.encode('utf-8'))
+        self._out.write(text)
+
+    def begin(self, meta):
+        pass
+
+    def write(self, pkg):
+        raise NotImplementedError
+
+    def end(self, meta):
+        pass
+
+    def commit(self):
+        if self._tmp_path is None:
+            return
+        self._out.close()
+        os.replace(self._tmp_path, self.path)
+        self._tmp_path = None
+
+    def abort(self):
+        if self._tmp_path is None:
+            return
+        self._out.close()
+        self._tmp_path.unlink(missing_ok=True)
+        self._tmp_path = None
+
+
+class MarkdownSink(Sink):
+    """README.md; rows kan innehålla färdigrenderade rader som återanvänds"""
+
+    def __init__(self, path=None, stream=None, badges=False, rows=None):
+        super().__init__(path, stream)
+        self.badges = badges
+        self.rows = rows if rows is not None else {}
+        self._first = True
+        self._count = 0
+
+    def _line(self, text):
+        # Samma resultat som "\n".join(lines): ingen avslutande radbrytning
+        self._write(text if self._first else "\n" + text)
+        self._first = False
+
+    def begin(self, meta):
+        self._line("# 📦 GLLB-Apps Dart Packages\n")
+        self._line("My published packages on pub.dev\n")
+        if meta.get('fallback_used'):
+            self._line("⚠️ *Using fallback package list (auto-discovery unavailable)*\n")
+
+    def write(self, pkg):
+        if self._count == 0:
+            for line in table_header(self.badges):
+                self._line(line)
+        self._count += 1
+        row = self.rows.get(pkg['package'])
+        self._line(row if row is not None else render_row(pkg, self.badges))
+
+    def end(self, meta):
+        if self._count == 0:
+            self._line("*No packages found.*\n")
+        self._line("\n---")
+        self._line(f"**Last updated:** `{meta['timestamp']} UTC` 🤖")
+        self._line("\n*Auto-updated daily at 03:00 UTC via GitHub Actions*")
+
+
+class HtmlSink(Sink):
+    """index.html för GitHub Pages med en enkel package-tabell"""
+
+    HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <meta name="description" content="GLLB-Apps verified publisher for pub.dev packages">
+  <!-- Lägg till verification meta tag här efter du får den från pub.dev -->
+  <!-- <meta name="google-site-verification" content="DIN_VERIFICATION_CODE"> -->
+  <title>GLLB-Apps Dart Packages</title>
+  <style>
+    body {
+      font-family: system-ui, -apple-system, sans-serif;
+      max-width: 800px;
+      margin: 50px auto;
+      padding: 20px;
+      line-height: 1.6;
+    }
+    h1 { color: #0175C2; }
+    a { color: #13B9FD; }
+    table { border-collapse: collapse; width: 100%; }
+    th, td { text-align: left; padding: 4px 8px; border-bottom: 1px solid #ddd; }
+  </style>
+</head>
+<body>
+  <h1> GLLB-Apps Dart Packages</h1>
+  <p>Verified publisher for pub.dev packages</p>
+  <p><a href="https://github.com/GLLB-Apps/dart-packages-handbook">View package list </a></p>
+  <p><a href="https://pub.dev/publishers/gllb-apps.github.io/packages">pub.dev packages </a></p>
+  <table>
+    <tr><th>Package</th><th>Version</th><th>Pub Points</th><th>Likes</th><th>Description</th></tr>
+"""
+
+    def begin(self, meta):
+        self._write(self.HEAD)
+
+    def write(self, pkg):
+        name = html.escape(pkg['package'])
+        cells = [
+            f'<a href="https://pub.dev/packages/{name}">{name}</a>',
+            html.escape(str(pkg.get('version') or '')),
+            '' if pkg.get('points') is None else str(pkg.get('points')),
+            '' if pkg.get('likes') is None else str(pkg.get('likes')),
+            html.escape(pkg.get('description') or ''),
+        ]
+        self._write("    <tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>\n")
+
+    def end(self, meta):
+        self._write(
+            "  </table>\n"
+            f"  <p><small>Last updated: {html.escape(meta['timestamp'])} UTC</small></p>\n"
+            "</body>\n"
+            "</html>\n"
+        )
+
+
+def _record_dict(pkg):
+    return {
+        'package': pkg['package'],
+        'version': pkg.get('version'),
+        'description': pkg.get('description', ''),
+        'points': pkg.get('points'),
+        'likes': pkg.get('likes'),
+        'popularity': pkg.get('popularity'),
+    }
+
+
+class JsonSink(Sink):
+    """Katalog som ett JSON-objekt; arrayen skrivs element för element"""
+
+    def __init__(self, path=None, stream=None):
+        super().__init__(path, stream)
+        self._count = 0
+
+    def begin(self, meta):
+        self._write('{"generated": ' + json.dumps(meta['timestamp'] + 'Z') + ', "packages": [')
+
+    def write(self, pkg):
+        self._write(("\n  " if self._count == 0 else ",\n  ") + json.dumps(_record_dict(pkg), ensure_ascii=False))
+        self._count += 1
+
+    def end(self, meta):
+        self._write("\n]}\n" if self._count else "]}\n")
+
+
+class NdjsonSink(Sink):
+    """En JSON-rad per package (lätt att strömma vidare med t.ex. jq)"""
+
+    def write(self, pkg):
+        self._write(json.dumps(_record_dict(pkg), ensure_ascii=False) + "\n")
+
+
+def run_pipeline(packages, sinks, meta, commit=True):
+    """Skicka packages (vilken iterable som helst) genom alla sinks i ett pass
+
+    Antingen byts alla filer in eller ingen: vid fel tas de temporära
+    filerna bort och undantaget kastas vidare. Med commit=False ligger
+    filerna kvar som temporära tills anroparen kör commit_all eller
+    abort_all (t.ex. när det först i slutet går att avgöra om något ändrats).
+    """
+    opened = []
+    try:
+        for sink in sinks:
+            opened.append(sink.open())
+            sink.begin(meta)
+        for pkg in packages:
+            for sink in sinks:
+                sink.write(pkg)
+        for sink in sinks:
+            sink.end(meta)
+    except BaseException:
+        abort_all(opened)
+        raise
+    if commit:
+        commit_all(sinks)
+    return sinks
+
+
+def commit_all(sinks):
+    for sink in sinks:
+        sink.commit()
+
+
+def abort_all(sinks):
+    for sink in sinks:
+        sink.abort()
+
+
+def render_markdown(packages, fallback_used=False, badges=False, rows=None, timestamp=None):
+    """README som sträng (samma rendering som MarkdownSink till fil)"""
+    stream = io.StringIO()
+    run_pipeline(packages, [MarkdownSink(stream=stream, badges=badges, rows=rows)],
+                 default_meta(fallback_used, timestamp))
+    return stream.getvalue()
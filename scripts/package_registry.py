@@ -0,0 +1,126 @@
+# scripts/package_registry.py
+"""Kompakt package-samling som delas av update_packages.py och GUI:t"""
+from bisect import bisect_left
+
+
+class PackageRecord:
+    """Ett package (__slots__ istället för dict för lägre minne per post)
+
+    Stödjer läsning som en dict (record['package'], record.get('version'))
+    så att kod som tidigare tog emot dicts fungerar oförändrad.
+    """
+
+    __slots__ = ('package', 'version', 'description', 'source', 'points', 'likes', 'popularity')
+
+    def __init__(self, package, version='Unknown', description='', source='',
+                 points=None, likes=None, popularity=None):
+        self.package = package
+        self.version = version
+        self.description = description
+        self.source = source
+        # Från score-API:t, None om okänt
+        self.points = points
+        self.likes = likes
+        self.popularity = popularity
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if not isinstance(other, PackageRecord):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"PackageRecord({self.package!r}, version={self.version!r}, source={self.source!r})"
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['package'],
+            data.get('version', 'Unknown'),
+            data.get('description', ''),
+            data.get('source', ''),
+            data.get('points'),
+            data.get('likes'),
+            data.get('popularity'),
+        )
+
+
+class PackageCollection:
+    """Packages sorterade på namn med ett dict-index
+
+    Uppslag och dubblettkontroll är O(1) via indexet, sorteringen hålls
+    inkrementellt med bisect så att iteration alltid ger namnordning utan
+    att sortera om.
+    """
+
+    def __init__(self, records=()):
+        self._names = []
+        self._by_name = {}
+        for record in records:
+            self.upsert(record)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        by_name = self._by_name
+        return (by_name[name] for name in self._names)
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def get(self, name, default=None):
+        return self._by_name.get(name, default)
+
+    def names(self):
+        """Namnen i sorterad ordning (kopia)"""
+        return list(self._names)
+
+    def index(self, name):
+        """Position i sorteringsordningen"""
+        if name not in self._by_name:
+            raise KeyError(name)
+        return bisect_left(self._names, name)
+
+    def add(self, record):
+        """Lägg till om namnet inte redan finns, returnerar False vid dubblett"""
+        if record.package in self._by_name:
+            return False
+        self._names.insert(bisect_left(self._names, record.package), record.package)
+        self._by_name[record.package] = record
+        return True
+
+    def upsert(self, record):
+        """Lägg till eller ersätt"""
+        if record.package in self._by_name:
+            self._by_name[record.package] = record
+        else:
+            self.add(record)
+
+    def remove(self, name):
+        """Ta bort och returnera posten, eller None om den saknas"""
+        record = self._by_name.pop(name, None)
+        if record is not None:
+            del self._names[bisect_left(self._names, name)]
+        return record
+
+    def clear(self):
+        self._names.clear()
+        self._by_name.clear()
@@ -0,0 +1,266 @@
+# scripts/package_store.py
+"""Lokal SQLite-databas (WAL) med package-metadata och versionshistorik"""
+import sqlite3
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from package_registry import PackageRecord
+
+DEFAULT_DB_PATH = Path(__file__).parent / '.cache' / 'packages.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    package_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS packages (
+    name TEXT PRIMARY KEY,
+    version TEXT,
+    description TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    points INTEGER,
+    likes INTEGER,
+    popularity REAL,
+    fetched_at REAL,
+    updated_at REAL,
+    last_seen_run INTEGER
+);
+CREATE INDEX IF NOT EXISTS packages_last_seen ON packages (last_seen_run, name);
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    run_id INTEGER,
+    PRIMARY KEY (name, version)
+);
+CREATE INDEX IF NOT EXISTS versions_run ON versions (run_id);
+"""
+
+# Kolumner som lagts till efter första versionen av schemat
+MIGRATIONS = {
+    'points': "ALTER TABLE packages ADD COLUMN points INTEGER",
+    'likes': "ALTER TABLE packages ADD COLUMN likes INTEGER",
+    'popularity': "ALTER TABLE packages ADD COLUMN popularity REAL",
+}
+COLUMNS = "name, version, description, source, points, likes, popularity"
+
+
+def default_db_path(repo_root):
+    """Databasen i ett annat repo (t.ex. det GUI:t pekar på)"""
+    return Path(repo_root) / 'scripts' / '.cache' / 'packages.db'
+
+
+class PackageStore:
+    """Packages, versioner och körningar i SQLite
+
+    Skrivningar görs i en transaktion per anrop (executemany), läsningar
+    är indexerade frågor. WAL gör att GUI:t kan läsa samtidigt som en
+    sync skriver.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(packages)")}
+        with self.conn:
+            for column, statement in MIGRATIONS.items():
+                if column not in existing:
+                    self.conn.execute(statement)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- Körningar ----------------
+
+    def begin_run(self):
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, package_count):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET finished_at = ?, package_count = ? WHERE id = ?",
+                (time.time(), package_count, run_id),
+            )
+
+    def last_run(self, before=None):
+        """Senaste avslutade körning (före run-id before), eller None"""
+        query = "SELECT id, started_at, finished_at, package_count FROM runs WHERE finished_at IS NOT NULL"
+        params = ()
+        if before is not None:
+            query += " AND id < ?"
+            params = (before,)
+        row = self.conn.execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        return {'id': row[0], 'started_at': row[1], 'finished_at': row[2], 'package_count': row[3]}
+
+    # ---------------- Skrivningar ----------------
+
+    def stale_names(self, names, max_age):
+        """Namn som saknas eller hämtades för mer än max_age sekunder sedan"""
+        names = list(names)
+        if max_age is None or max_age <= 0:
+            return names
+        cutoff = time.time() - max_age
+        fresh = set()
+        for chunk in _chunks(names, 500):
+            placeholders = ",".join("?" * len(chunk))
+            fresh.update(
+                row[0]
+                for row in self.conn.execute(
+                    f"SELECT name FROM packages WHERE name IN ({placeholders}) AND fetched_at >= ?",
+                    (*chunk, cutoff),
+                )
+            )
+        return [name for name in names if name not in fresh]
+
+    def save_run(self, run_id, records, seen_names, commit=True):
+        """Skriv hämtade packages och markera alla listade som sedda, i en transaktion
+
+        Med commit=False lämnas transaktionen öppen så att en strömmande
+        sync kan spara i omgångar; finish_run committar allt på en gång och
+        läsare (GUI:t) ser aldrig en halvsparad körning.
+        """
+        now = time.time()
+        rows = [
+            (
+                record.package, record.version, record.description or '', record.source or '', now, run_id,
+                record.points, record.likes, record.popularity,
+            )
+            for record in records
+        ]
+        with self.conn if commit else nullcontext():
+            self.conn.executemany(
+                """
+                INSERT INTO packages (name, version, description, source, fetched_at, updated_at, last_seen_run,
+                                      points, likes, popularity)
+                VALUES (?1, ?2, ?3, ?4, ?5, ?5, ?6, ?7, ?8, ?9)
+                ON CONFLICT (name) DO UPDATE SET
+                    updated_at = CASE
+                        WHEN packages.version IS NOT excluded.version
+                          OR packages.description IS NOT excluded.description
+                        THEN excluded.updated_at ELSE packages.updated_at END,
+                    version = excluded.version,
+                    description = excluded.description,
+                    source = excluded.source,
+                    points = COALESCE(excluded.points, packages.points),
+                    likes = COALESCE(excluded.likes, packages.likes),
+                    popularity = COALESCE(excluded.popularity, packages.popularity),
+                    fetched_at = excluded.fetched_at,
+                    last_seen_run = COALESCE(excluded.last_seen_run, packages.last_seen_run)
+                """,
+                rows,
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO versions (name, version, first_seen, run_id) VALUES (?, ?, ?, ?)",
+                [(row[0], row[1], now, run_id) for row in rows],
+            )
+            self.conn.executemany(
+                "UPDATE packages SET last_seen_run = ? WHERE name = ?",
+                [(run_id, name) for name in seen_names],
+            )
+
+    def save_records(self, records):
+        """Skriv packages som hämtats utanför en sync-körning (t.ex. från GUI:t)"""
+        self.save_run(None, records, ())
+
+    # ---------------- Läsningar ----------------
+
+    def get_records(self, names=None, run_id=None):
+        """PackageRecords sorterade på namn
+
+        Utan argument: packages som fanns med i senaste körningen.
+        """
+        if names is not None:
+            records = []
+            for chunk in _chunks(list(names), 500):
+                placeholders = ",".join("?" * len(chunk))
+                records.extend(
+                    self._records(
+                        f"SELECT {COLUMNS} FROM packages WHERE name IN ({placeholders})",
+                        chunk,
+                    )
+                )
+            records.sort(key=lambda record: record.package)
+            return records
+
+        if run_id is None:
+            last = self.last_run()
+            if last is None:
+                return []
+            run_id = last['id']
+        return list(self.iter_records(run_id))
+
+    def iter_records(self, run_id):
+        """Packages i körningen run_id, en i taget i namnordning (direkt från cursorn)"""
+        return self._iter_records(
+            f"SELECT {COLUMNS} FROM packages WHERE last_seen_run = ? ORDER BY name",
+            (run_id,),
+        )
+
+    def run_names(self, run_id):
+        """Namn på packages som fanns med i körningen run_id (eller senare), sorterade"""
+        return [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT name FROM packages WHERE last_seen_run >= ? ORDER BY name", (run_id,)
+            )
+        ]
+
+    def run_size(self, run_id):
+        """Antal packages som fanns med i körningen run_id"""
+        return self.conn.execute("SELECT COUNT(*) FROM packages WHERE last_seen_run = ?", (run_id,)).fetchone()[0]
+
+    def _records(self, query, params):
+        return list(self._iter_records(query, params))
+
+    def _iter_records(self, query, params):
+        for name, version, description, source, points, likes, popularity in self.conn.execute(query, params):
+            yield PackageRecord(name, version or 'Unknown', description, source, points, likes, popularity)
+
+    def changes_since(self, run_id):
+        """Versioner som dykt upp efter körningen run_id: [(namn, version)]"""
+        return self.conn.execute(
+            "SELECT name, version FROM versions WHERE run_id > ? ORDER BY name, first_seen",
+            (run_id or 0,),
+        ).fetchall()
+
+    def removed_since(self, old_run_id, new_run_id):
+        """Packages som fanns i old_run_id men inte i new_run_id"""
+        return [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT name FROM packages WHERE last_seen_run >= ? AND last_seen_run < ? ORDER BY name",
+                (old_run_id, new_run_id),
+            )
+        ]
+
+    def history(self, name):
+        """Alla versioner av ett package, äldst först"""
+        return self.conn.execute(
+            "SELECT version, first_seen FROM versions WHERE name = ? ORDER BY first_seen",
+            (name,),
+        ).fetchall()
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
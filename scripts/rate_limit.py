@@ -0,0 +1,89 @@
+# scripts/rate_limit.py
+"""Adaptiv rate limiting per host (token bucket, bara stdlib)
+
+Adaptern som kopplar in detta i requests ligger i http_adapter.py så att
+konstanterna här kan importeras utan att dra in requests.
+"""
+import threading
+import time
+
+DEFAULT_RATE = 20.0
+DEFAULT_MAX_RATE = 50.0
+MAX_RETRY_AFTER = 60.0
+
+
+def parse_retry_after(value, default=1.0):
+    """Retry-After i sekunder (heltal eller HTTP-datum)"""
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        from email.utils import parsedate_to_datetime  # ovanligt, ~5 ms importtid
+
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return default
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """Token bucket som anpassar takten (AIMD)
+
+    Varje lyckat svar höjer takten lite (additivt) upp till max_rate, ett
+    429 halverar den och pausar alla anrop tills Retry-After har passerat.
+    Utan explicit burst följer bucketens storlek den aktuella takten, så en
+    sänkt takt inte släpps igenom som en skur efter pausen.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=None, min_rate=1.0, max_rate=DEFAULT_MAX_RATE,
+                 increase=0.5, decrease=0.5):
+        self.rate = rate
+        self._burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.increase = increase
+        self.decrease = decrease
+
+        self.throttled = 0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def burst(self):
+        return self._burst or max(1.0, self.rate)
+
+    def acquire(self):
+        """Blockera tills ett anrop får göras"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self, retry_after):
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            # Parallella anrop får ofta 429 i samma skur: sänk bara en gång per paus
+            if now >= self._paused_until:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0
+            self._paused_until = max(self._paused_until, now + retry_after)
+            # Ingen påfyllning under pausen: efter den börjar bucketen tom
+            self._updated = self._paused_until
@@ -0,0 +1,120 @@
+# scripts/readme_table.py
+"""Läs och rendera package-tabellen i README.md"""
+import hashlib
+import os
+import re
+from pathlib import Path
+
+# | **name** | ... (samma mönster som GUI:t alltid använt)
+ROW_PATTERN = re.compile(r"\|\s*\*\*([^*]+)\*\*\s*\|")
+
+
+def iter_table_packages(lines):
+    """Package-namn ur tabellrader, i filordning"""
+    for line in lines:
+        if '**' not in line:
+            continue
+        for match in ROW_PATTERN.finditer(line):
+            yield match.group(1).strip()
+
+
+# Statiska kolumner: ren text, inga bildanrop när README visas
+STATIC_HEADER = [
+    "| Package | Version | Pub Points | Likes | Popularity | Link |",
+    "|---------|---------|------------|-------|------------|------|",
+]
+BADGE_HEADER = [
+    "| Package | Version | Pub Points | Popularity | Link |",
+    "|---------|---------|------------|------------|------|",
+]
+MISSING = "–"
+
+
+def table_header(badges=False):
+    return BADGE_HEADER if badges else STATIC_HEADER
+
+
+def has_metrics(pkg):
+    """Om raden har det som de statiska kolumnerna visar (annars blir det "–")"""
+    version = pkg.get('version')
+    return bool(version) and version != 'Unknown' and pkg.get('points') is not None
+
+
+def render_row(pkg, badges=False):
+    """En tabellrad; badges=True ger shields.io-bilder som hämtas vid visning"""
+    name = pkg['package']
+    if badges:
+        return (
+            f"| **{name}** | "
+            f"![version](https://img.shields.io/pub/v/{name}.svg?color=blue) | "
+            f"![points](https://img.shields.io/pub/points/{name}?color=green) | "
+            f"![popularity](https://img.shields.io/pub/popularity/{name}?color=orange) | "
+            f"[pub.dev](https://pub.dev/packages/{name}) |"
+        )
+
+    version = pkg.get('version')
+    points = pkg.get('points')
+    likes = pkg.get('likes')
+    popularity = pkg.get('popularity')
+    return (
+        f"| **{name}** | "
+        f"{version if version and version != 'Unknown' else MISSING} | "
+        f"{points if points is not None else MISSING} | "
+        f"{likes if likes is not None else MISSING} | "
+        f"{f'{round(popularity * 100)}%' if popularity is not None else MISSING} | "
+        f"[pub.dev](https://pub.dev/packages/{name}) |"
+    )
+
+
+class ReadmeTableCache:
+    """Cachar package-namnen i en README
+
+    Oförändrad mtime/storlek betyder att filen inte läses alls. Ändrad stat
+    men samma innehållshash (t.ex. touch eller checkout av samma innehåll)
+    ger också cachade namn. Annars strömmas filen rad för rad en gång.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.names = []
+        self._stat_key = None
+        self._digest = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def changed_on_disk(self):
+        """Billig koll (bara stat) om filen kan ha ändrats sedan senaste load()"""
+        return self._stat() != self._stat_key
+
+    def load(self):
+        """Returnerar (names, changed)
+
+        Kastar FileNotFoundError om README saknas.
+        """
+        stat_key = self._stat()
+        if stat_key is None:
+            raise FileNotFoundError(self.path)
+        if stat_key == self._stat_key:
+            return self.names, False
+
+        digest = hashlib.sha256()
+        names = []
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                digest.update(raw)
+                if b'**' in raw:
+                    names.extend(iter_table_packages([raw.decode('utf-8', errors='replace')]))
+
+        self._stat_key = stat_key
+        digest = digest.hexdigest()
+        if digest == self._digest:
+            return self.names, False
+
+        self._digest = digest
+        self.names = names
+        return names, True
@@ -0,0 +1,119 @@
+# scripts/resilience.py
+"""Omförsök, circuit breaker och latensmätning för HTTP-anrop (bara stdlib)
+
+Adaptern som använder detta ligger i http_adapter.py, så att konstanterna
+här kan importeras utan att dra in requests (samma uppdelning som
+rate_limit.py).
+"""
+import random
+import threading
+import time
+from collections import deque
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+DEFAULT_RETRIES = 3
+# Max sekunder för ett logiskt anrop inklusive omförsök och väntan
+DEFAULT_REQUEST_BUDGET = 30.0
+# Statuskoder som räknas som tillfälliga fel (429 sköts av rate limitern)
+RETRY_STATUSES = frozenset({500, 502, 503, 504, 408})
+
+
+def backoff_delay(attempt, base=0.1, cap=2.0, rng=random):
+    """Väntetid före omförsök nummer attempt (0 = första): exponentiell med full jitter"""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Circuit breaker för en host
+
+    Efter failure_threshold fel i rad öppnas kretsen och allow() svarar
+    False i reset_timeout sekunder, så att anrop mot en host som ligger
+    nere misslyckas direkt istället för att vänta ut timeouts. Därefter
+    släpps ett provanrop igenom (half-open): lyckas det stängs kretsen,
+    annars öppnas den igen med dubbelt så lång paus (max max_reset_timeout).
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=5.0, max_reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._reset_timeout = reset_timeout
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Om ett anrop får göras nu (i half-open bara ett i taget)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() < self._open_until:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def on_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+            self._reset_timeout = self.base_reset_timeout
+
+    def release_probe(self):
+        """Släpp provanropet utan att döma hosten (felet låg i anropet, t.ex. en ogiltig URL)"""
+        with self._lock:
+            self._probing = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                self._reset_timeout = min(self.max_reset_timeout, self._reset_timeout * 2)
+            elif self.state == self.OPEN or self.failures < self.failure_threshold:
+                return
+            self.state = self.OPEN
+            self.opened += 1
+            self._probing = False
+            self._open_until = time.monotonic() + self._reset_timeout
+
+
+class LatencyTracker:
+    """Rullande fönster med svarstider, ger fördröjningen före ett hedge-anrop
+
+    Ett duplikatanrop skickas när det första tagit längre tid än
+    quantile-percentilen av de senaste svaren, så bara svansen dupliceras.
+    Innan min_samples svar finns används default.
+    """
+
+    def __init__(self, window=256, quantile=0.95, min_samples=20, default=1.0, floor=0.05):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.default = default
+        self.floor = floor
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self):
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.default
+            ordered = sorted(self._samples)
+        return max(self.floor, ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))])
@@ -0,0 +1,232 @@
+# scripts/streaming.py
+"""Strömmande steg för sync-pipelinen (bara stdlib)
+
+discovery -> dedupe -> fetch -> sortering -> rendering -> skrivning går som
+generatorer med begränsade buffertar mellan stegen, så minnet beror på
+buffertstorlekarna och inte på hur stor katalogen är:
+
+    names = unique(external_sort(merge_threads(producers)))
+    for name, record in fetch_window(fetch, names, concurrency=8):
+        ...
+
+Sorteringen sker i minnet upp till max_in_memory poster; större data skrivs
+som sorterade körningar till temporära filer som slås ihop med heapq.merge.
+"""
+import heapq
+import json
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from itertools import islice
+
+# Max poster som väntar mellan två steg (kö eller anrop i flykt)
+DEFAULT_BUFFER = 256
+# Max poster som sorteras i minnet innan external sort spiller till disk
+DEFAULT_SORT_MEMORY = 20_000
+# Max körningar som slås ihop samtidigt (en öppen fil per körning)
+MAX_MERGE_RUNS = 64
+
+_DONE = object()
+
+
+def batched(items, size):
+    """Listor med högst size poster (sista kan vara kortare)"""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def unique(sorted_items):
+    """Hoppa över dubbletter i en sorterad ström"""
+    previous = _DONE
+    for item in sorted_items:
+        if item != previous:
+            yield item
+            previous = item
+
+
+def merge_threads(producers, buffer=DEFAULT_BUFFER, workers=None):
+    """Kör producenter (funktioner som returnerar iterables) i trådar
+
+    Allt de producerar yieldas i den ordning det blir klart, via en kö med
+    högst buffer poster: en snabb producent väntar på konsumenten istället
+    för att fylla minnet. Ett undantag i en producent kastas vidare här.
+    """
+    producers = list(producers)
+    if not producers:
+        return
+    items = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(producer):
+        try:
+            for item in producer():
+                if not put((None, item)):
+                    return
+        except BaseException as e:
+            put((e, None))
+        finally:
+            put((_DONE, None))
+
+    executor = ThreadPoolExecutor(max_workers=workers or len(producers))
+    try:
+        for producer in producers:
+            executor.submit(run, producer)
+        remaining = len(producers)
+        while remaining:
+            error, item = items.get()
+            if error is _DONE:
+                remaining -= 1
+            elif error is not None:
+                raise error
+            else:
+                yield item
+    finally:
+        # Konsumenten kan sluta i förtid: släpp producenter som väntar på kön
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_window(fetch, names, concurrency, window=None, deadline=None, stats=None):
+    """Anropa fetch(name) parallellt med högst window anrop i flykt åt gången
+
+    Yieldar (name, resultat) i samma ordning som names. Efter deadline
+    (sekunder från start) startas inga nya anrop, och de som inte hunnit
+    bli klara ger None; antalet räknas i stats['skipped'] om stats ges.
+    """
+    stats = {} if stats is None else stats
+    names = iter(names)
+    window = max(1, window or concurrency * 4)
+    stop_at = time.monotonic() + deadline if deadline is not None else None
+    stats.setdefault('skipped', 0)
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+
+    def expired():
+        return stop_at is not None and time.monotonic() >= stop_at
+
+    def fill():
+        if expired():
+            return
+        for name in islice(names, window - len(pending)):
+            pending.append((name, executor.submit(fetch, name)))
+
+    try:
+        fill()
+        while pending:
+            name, future = pending.popleft()
+            try:
+                timeout = None if stop_at is None else max(0.0, stop_at - time.monotonic())
+                result = future.result(timeout=timeout)
+            except TimeoutError:
+                result = None
+                stats['skipped'] += 1
+            yield name, result
+            fill()
+        # Deadline passerad: resten hämtas inte alls
+        for name in names:
+            stats['skipped'] += 1
+            yield name, None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _spill(items, encode, tmp_dir):
+    """Skriv en sorterad körning till en temporär fil (en rad per post)"""
+    run = tempfile.TemporaryFile('w+', encoding='utf-8', dir=tmp_dir)
+    for item in items:
+        run.write(encode(item))
+        run.write("\n")
+    run.seek(0)
+    return run
+
+
+def _read_run(run, decode):
+    for line in run:
+        yield decode(line)
+
+
+def external_sort(items, key=None, max_in_memory=DEFAULT_SORT_MEMORY, encode=json.dumps, decode=json.loads,
+                  tmp_dir=None):
+    """Sortera en ström som inte behöver få plats i minnet
+
+    Upp till max_in_memory poster sorteras i minnet. Fler skrivs som
+    sorterade körningar till temporära filer (encode/decode gör om en post
+    till en rad utan radbrytningar och tillbaka) som sedan slås ihop med
+    heapq.merge. Får allt plats blir det en vanlig sort utan diskåtkomst.
+    Sorteringen är stabil.
+    """
+    runs = []
+    try:
+        buffer = []
+        for item in items:
+            buffer.append(item)
+            if len(buffer) >= max_in_memory:
+                buffer.sort(key=key)
+                runs.append(_spill(buffer, encode, tmp_dir))
+                buffer = []
+                if len(runs) >= MAX_MERGE_RUNS:
+                    # Slå ihop i förväg så att antalet öppna filer hålls nere
+                    merged = _spill(heapq.merge(*(_read_run(run, decode) for run in runs), key=key),
+                                    encode, tmp_dir)
+                    for run in runs:
+                        run.close()
+                    runs = [merged]
+        buffer.sort(key=key)
+        if not runs:
+            yield from buffer
+            return
+        # Sista körningen behöver inte gå via disk
+        yield from heapq.merge(*(_read_run(run, decode) for run in runs), buffer, key=key)
+    finally:
+        for run in runs:
+            run.close()
+
+
+class SortedLookup:
+    """Slå upp stigande nycklar i en sorterad ström av (nyckel, värde)
+
+    Merge-join mot t.ex. en tidigare genererad fil: varje post läses en
+    gång och inget sparas i minnet. Poster vars nyckel aldrig efterfrågas
+    räknas i skipped.
+    """
+
+    def __init__(self, pairs):
+        self._pairs = iter(pairs)
+        self._current = next(self._pairs, None)
+        self.skipped = 0
+
+    def pop(self, key, default=None):
+        while self._current is not None and self._current[0] < key:
+            self._advance()
+            self.skipped += 1
+        if self._current is not None and self._current[0] == key:
+            value = self._current[1]
+            self._advance()
+            return value
+        return default
+
+    def _advance(self):
+        self._current = next(self._pairs, None)
+
+    def drain(self):
+        """Läs resten av strömmen, returnerar antalet poster som inte efterfrågades"""
+        while self._current is not None:
+            self._advance()
+            self.skipped += 1
+        return self.skipped
@@ -0,0 +1,236 @@
+# scripts/sync_daemon.py
+"""Långlivad sync: pollar pub.dev med jitter och skriver om bara vid ändringar
+
+Istället för en full körning per natt gör demonen ett varv var
+--interval sekund (± --jitter). Scraper, connection pool och HTTP-cache
+lever mellan varven, så varje varv är i princip bara villkorliga
+anrop (If-None-Match -> 304 utan body). README och övriga filer skrivs
+bara när något faktiskt ändrats (manifestet avgör), och med --commit/--push
+committas och pushas bara de varven.
+
+Exempel:
+    python scripts/sync_daemon.py --interval 300 --status-port 8765 -- --commit "🤖 Auto-update packages" --push
+    curl localhost:8765/status
+
+Argument efter -- (eller okända argument) skickas vidare till
+update_packages.py. Utan --max-age där revalideras alla packages varje
+varv, så nya versioner syns inom ett intervall. --metrics-json och
+--metrics-prom skrivs om efter varje varv (räknare sedan demonen startade).
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from metrics import metrics
+from update_packages import build_scraper, parse_args, sync_once
+
+DEFAULT_INTERVAL = 300.0
+DEFAULT_JITTER = 0.2
+MAX_BACKOFF = 3600.0
+DEFAULT_STATUS_PATH = Path(__file__).parent / '.cache' / 'daemon-status.json'
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def next_delay(interval, jitter, failures=0, rng=random):
+    """Väntetid till nästa varv
+
+    Jitter sprider varven så att flera demoner inte pollar i takt;
+    efter misslyckade varv dubblas intervallet (max MAX_BACKOFF).
+    """
+    base = min(interval * (2 ** failures), MAX_BACKOFF) if failures else interval
+    return max(1.0, base * (1 + rng.uniform(-jitter, jitter)))
+
+
+class SyncDaemon:
+    """Kör sync_once i en loop och håller en status-dict uppdaterad"""
+
+    def __init__(self, sync_args, interval=DEFAULT_INTERVAL, jitter=DEFAULT_JITTER, status_path=None):
+        self.sync_args = sync_args
+        self.interval = interval
+        self.jitter = jitter
+        self.status_path = Path(status_path) if status_path else None
+        self.scraper, self.cache = build_scraper(sync_args)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.status = {
+            'state': 'starting',
+            'pid': os.getpid(),
+            'started_at': _now_iso(),
+            'interval_seconds': interval,
+            'cycles': 0,
+            'changes': 0,
+            'consecutive_failures': 0,
+            'last_sync': None,
+            'last_change_at': None,
+            'next_run_at': None,
+        }
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self.status))
+
+    def _update(self, **values):
+        with self._lock:
+            self.status.update(values)
+            data = json.dumps(self.status, indent=2) + "\n"
+        if self.status_path is not None:
+            self.status_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.status_path.with_name(self.status_path.name + '.tmp')
+            tmp_path.write_text(data, encoding='utf-8')
+            os.replace(tmp_path, self.status_path)
+
+    def run_cycle(self):
+        """Ett varv; fel fångas och räknas så att demonen fortsätter"""
+        self._update(state='syncing')
+        started = time.perf_counter()
+        started_at = _now_iso()
+        hits_before = self.cache.hits if self.cache else 0
+        misses_before = self.cache.misses if self.cache else 0
+        error = None
+        result = {}
+        try:
+            result = sync_once(self.sync_args, self.scraper, self.cache)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"❌ Sync failed: {error}")
+
+        self.failures = self.failures + 1 if error else 0
+        last_sync = {
+            'started_at': started_at,
+            'finished_at': _now_iso(),
+            'duration_seconds': round(time.perf_counter() - started, 3),
+            'ok': error is None,
+            'error': error,
+            **result,
+        }
+        if self.cache is not None:
+            # Träff = 304 eller färskt cachat svar, alltså ingen body över nätet
+            last_sync['cache_hits'] = self.cache.hits - hits_before
+            last_sync['cache_misses'] = self.cache.misses - misses_before
+
+        with self._lock:
+            cycles = self.status['cycles'] + 1
+            changes = self.status['changes'] + (1 if result.get('changed') else 0)
+            last_change_at = last_sync['finished_at'] if result.get('changed') else self.status['last_change_at']
+        self._update(
+            state='idle',
+            cycles=cycles,
+            changes=changes,
+            consecutive_failures=self.failures,
+            last_sync=last_sync,
+            last_change_at=last_change_at,
+        )
+        self.write_metrics()
+        return last_sync
+
+    def write_metrics(self):
+        """Metrics enligt --metrics/--metrics-json/--metrics-prom efter ett varv"""
+        if not metrics.enabled:
+            return
+        if self.sync_args.metrics:
+            for line in metrics.summary_lines():
+                print(line)
+        try:
+            if self.sync_args.metrics_json:
+                metrics.write_json(self.sync_args.metrics_json)
+            if self.sync_args.metrics_prom:
+                metrics.write_prometheus(self.sync_args.metrics_prom)
+        except OSError as e:
+            print(f"⚠️  Could not write metrics: {e}")
+
+    def run(self, once=False):
+        while not self._stop.is_set():
+            self.run_cycle()
+            if once:
+                break
+            delay = next_delay(self.interval, self.jitter, self.failures)
+            self._update(next_run_at=datetime.fromtimestamp(time.time() + delay, timezone.utc)
+                         .strftime('%Y-%m-%dT%H:%M:%SZ'))
+            print(f"💤 Next sync in {delay:.0f}s")
+            self._stop.wait(delay)
+        # Skriver klart en kassett om scrapern spelar in (--record)
+        self.scraper.close()
+        self._update(state='stopped', next_run_at=None)
+
+
+def serve_status(daemon, port, host='127.0.0.1'):
+    """GET /status (eller /) ger demonens status som JSON, i en egen tråd"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ('/', '/status'):
+                self.send_error(404)
+                return
+            data = (json.dumps(daemon.snapshot(), indent=2) + "\n").encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='status-server', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Poll pub.dev continuously and regenerate output only when something changed",
+        epilog="Other arguments (e.g. after --) are passed on to update_packages.py.",
+    )
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between syncs (default: %(default)s)")
+    parser.add_argument('--jitter', type=float, default=DEFAULT_JITTER,
+                        help="random spread of the interval as a fraction (default: %(default)s)")
+    parser.add_argument('--status', type=Path, default=DEFAULT_STATUS_PATH,
+                        help="status JSON written after every sync (default: %(default)s)")
+    parser.add_argument('--status-port', type=int, default=None,
+                        help="also serve the status as JSON on http://127.0.0.1:PORT/status")
+    parser.add_argument('--once', action='store_true', help="run a single sync and exit")
+    args, rest = parser.parse_known_args(argv)
+    if rest and rest[0] == '--':
+        rest = rest[1:]
+
+    sync_args = parse_args(rest)
+    if sync_args.metrics or sync_args.metrics_json or sync_args.metrics_prom:
+        metrics.enable()
+    if not any(arg == '--max-age' or arg.startswith('--max-age=') for arg in rest):
+        sync_args.max_age = 0
+
+    daemon = SyncDaemon(sync_args, args.interval, args.jitter, args.status)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: daemon.stop())
+
+    server = None
+    if args.status_port is not None:
+        server = serve_status(daemon, args.status_port)
+        print(f"📡 Status on http://127.0.0.1:{server.server_address[1]}/status")
+
+    print(f"👁 Syncing every {args.interval:.0f}s (±{args.jitter:.0%})")
+    try:
+        daemon.run(once=args.once)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
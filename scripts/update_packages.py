@@ -1,169 +1,928 @@
 # scripts/update_packages.py
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import hashlib
+import heapq
 import json
-from datetime import datetime
+import os
+import re
+import time
+from html.parser import HTMLParser
+from itertools import chain
+from operator import attrgetter
 from pathlib import Path
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+from git_plumbing import commit_files, push, read_files
+from http_cache import DEFAULT_MAX_BYTES, HttpCache
+from metrics import metrics
+from package_registry import PackageCollection, PackageRecord
+from output_sinks import (
+    HtmlSink, JsonSink, MarkdownSink, NdjsonSink, Sink, abort_all, commit_all, default_meta, render_markdown,
+    run_pipeline,
+)
+from package_store import DEFAULT_DB_PATH, PackageStore
+from rate_limit import DEFAULT_MAX_RATE, DEFAULT_RATE
+from resilience import CONNECT_TIMEOUT, DEFAULT_RETRIES, READ_TIMEOUT, RETRY_STATUSES, backoff_delay
+from readme_table import render_row
+from streaming import (
+    DEFAULT_BUFFER, DEFAULT_SORT_MEMORY, SortedLookup, batched, external_sort, fetch_window, merge_threads, unique,
+)
+
+DEFAULT_BASE_URL = 'https://pub.dev'
+DEFAULT_CONCURRENCY = 8
+# (connect, read): en host som inte svarar upptäcks snabbt, ett långsamt svar får mer tid
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+DEFAULT_CACHE_DIR = Path(__file__).parent / '.cache' / 'http'
+DEFAULT_README_PATH = Path(__file__).parent.parent / 'README.md'
+DEFAULT_HTML_PATH = Path(__file__).parent.parent / 'index.html'
+DEFAULT_JSON_PATH = Path(__file__).parent.parent / 'packages.json'
+MANIFEST_NAME = '.readme-manifest.json'
+MAX_PUBLISHER_PAGES = 100
+DEFAULT_SOURCES_PATH = Path(__file__).parent / 'sources.json'
+DEFAULT_SOURCES = {
+    'publishers': ['gllb-apps.github.io'],
+    'packages': [],
+    'exclude': [],
+    'fallback': ['flux_wireframe_theme_cli', 'wireframe_theme'],
+}
+# Hämta inte om packages som hämtades för mindre än så här länge sedan
+DEFAULT_MAX_AGE = 3600
+# Antal hosts vars connection pools hålls öppna samtidigt
+POOL_HOSTS = 4
+# Packages per skrivning till databasen under en strömmande sync
+STORE_BATCH = 500
+
+
+def _package_name_from_href(href):
+    """'/packages/foo/versions?x' -> 'foo'"""
+    parts = href.split('/packages/')
+    if len(parts) > 1:
+        package_name = parts[1].split('/')[0].split('?')[0]
+        if package_name and '/' not in package_name:
+            return package_name
+    return None
+
+
+def _page_number(href):
+    """Sidnummer i en publisher-pagineringslänk, annars None"""
+    parts = urlsplit(href)
+    if '/publishers/' not in parts.path:
+        return None
+    try:
+        return int(parse_qs(parts.query)['page'][0])
+    except (KeyError, ValueError):
+        return None
+
+
+def _unseen(names, seen):
+    for name in names:
+        if name not in seen:
+            seen.add(name)
+            yield name
+
+
+class PublisherPageParser(HTMLParser):
+    """Inkrementell single-pass-parser för publisher-sidor
+    
+    Bygger inget DOM: HTML matas i bitar med feed() och package-länkar
+    plockas upp direkt. Nya namn hämtas med take_new(), länken till nästa
+    sida hamnar i next_href (rel="next") eller page_hrefs (?page=N).
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.packages = {}  # dict som ordnad mängd
+        self.next_href = None
+        self.page_hrefs = {}
+        self._new = []
+        self._containers = []
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        
+        if tag != 'a':
+            # Motsvarar selektorerna 'h3.packages-title a' och '.package-name a'
+            classes = (attrs.get('class') or '').split()
+            if (tag == 'h3' and 'packages-title' in classes) or 'package-name' in classes:
+                self._containers.append(tag)
+            return
+        
+        href = attrs.get('href') or ''
+        if 'next' in (attrs.get('rel') or '').split():
+            self.next_href = href
+        page = _page_number(href)
+        if page is not None:
+            self.page_hrefs.setdefault(page, href)
+        
+        if '/packages/' not in href:
+            return
+        if not (href.startswith('/packages/') or self._containers):
+            return
+        
+        package_name = _package_name_from_href(href)
+        if package_name and package_name not in self.packages:
+            self.packages[package_name] = None
+            self._new.append(package_name)
+    
+    def handle_endtag(self, tag):
+        if self._containers and self._containers[-1] == tag:
+            self._containers.pop()
+    
+    def take_new(self):
+        """Namn som hittats sedan förra anropet"""
+        new, self._new = self._new, []
+        return new
+
 
 class PubDevScraper:
     """Scraper för att hämta packages från pub.dev"""
     
-    def __init__(self):
+    def __init__(self, base_url=DEFAULT_BASE_URL, pool_size=DEFAULT_CONCURRENCY, cache=None,
+                 rate=DEFAULT_RATE, max_rate=DEFAULT_MAX_RATE, record=None, replay=None,
+                 timeout=REQUEST_TIMEOUT, retries=DEFAULT_RETRIES, hedge=True):
+        # requests importeras först här: --help, README-rendering och
+        # benchmarks som inte gör HTTP slipper ~100 ms importtid
+        import requests
+        from http_adapter import RateLimitedAdapter, RecordingAdapter, ReplayAdapter
+        
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache
+        self.timeout = timeout
+        self.retries = retries
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # En connection per worker och host (två med hedging, för duplikatet);
+        # pool_block låter extra trådar vänta på en ledig connection istället
+        # för att öppna och slänga nya. Med hedging blockerar poolen inte:
+        # ett långsamt anrop som förlorat mot sitt duplikat håller kvar sin
+        # connection tills servern svarar, och att vänta på den skulle
+        # äta upp vinsten. Adaptern rate-limitar per host, gör om tillfälliga
+        # fel, hedgar långsamma svar och slutar försöka mot en host som
+        # ligger nere (circuit breaker).
+        # Med record spelas svaren dessutom in i en kassett; med replay
+        # kommer allt ur kassetten och inget går över nätet.
+        if replay is not None:
+            self.adapter = ReplayAdapter(replay)
+            # Proxy- och .netrc-uppslag i miljön kostar mer än själva uppspelningen
+            self.session.trust_env = False
+        else:
+            options = dict(
+                rate=rate,
+                max_rate=max_rate,
+                retries=retries,
+                hedge=hedge,
+                pool_connections=POOL_HOSTS,
+                pool_maxsize=pool_size * (2 if hedge else 1),
+                pool_block=not hedge,
+            )
+            if record is not None:
+                self.adapter = RecordingAdapter(record, **options)
+            else:
+                self.adapter = RateLimitedAdapter(**options)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+    
+    def close(self):
+        """Stäng sessionen (och skriv klart en kassett som spelas in)"""
+        self.session.close()
+    
+    def _get(self, url, timeout=None, stream=False):
+        """GET via cachen om den är aktiverad"""
+        timeout = timeout or self.timeout
+        if self.cache is not None:
+            return self.cache.get(self.session, url, timeout, stream=stream)
+        return self.session.get(url, timeout=timeout, stream=stream)
     
     def get_packages_from_publisher(self, publisher):
         """Hämta alla packages från en publisher"""
-        url = f"https://pub.dev/publishers/{publisher}/packages"
+        return list(self.scan_publisher(publisher))
+    
+    def scan_publisher(self, publisher, errors=None):
+        """Som get_packages_from_publisher men strömmande
+        
+        Fel loggas och avslutar strömmen; med errors läggs felet dessutom
+        till där, så att anroparen vet att listan är ofullständig.
+        """
+        url = f"{self.base_url}/publishers/{publisher}/packages"
         print(f"🔍 Checking publisher: {url}")
         
+        count = 0
         try:
-            response = self.session.get(url, timeout=10)
-            if response.status_code == 200:
-                packages = self._extract_packages_from_html(response.text)
-                if packages:
-                    print(f"✓ Found {len(packages)} packages from publisher")
-                    return packages
+            for name in self.iter_packages_from_publisher(publisher):
+                count += 1
+                yield name
         except Exception as e:
             print(f"⚠️  Publisher check failed: {e}")
+            if errors is not None:
+                errors.append((publisher, e))
         
-        return []
+        if count:
+            print(f"✓ Found {count} packages from publisher")
+    
+    def iter_packages_from_publisher(self, publisher, max_pages=MAX_PUBLISHER_PAGES):
+        """Strömma package-namn från en publisher, sida för sida
+        
+        Namnen yieldas medan sidan fortfarande laddas ner, och
+        pagineringslänkar följs tills det inte finns fler sidor. Avbryts en
+        sida (anslutningen bryts, 5xx) läses den om med backoff; namn som
+        redan yieldats hoppas över. Andra fel än tillfälliga kastas.
+        """
+        from requests import RequestException  # redan laddat av sessionen
+        
+        url = f"{self.base_url}/publishers/{publisher}/packages"
+        seen = set()
+        visited = set()
+        page = 1
+        
+        while url and page <= max_pages and url not in visited:
+            visited.add(url)
+            attempt = 0
+            while True:
+                parser = PublisherPageParser()
+                try:
+                    yield from self._scan_page(url, parser, seen)
+                    break
+                except RequestException as e:
+                    if attempt >= self.retries or not self._transient(e):
+                        raise
+                    metrics.incr('publisher.page_retries')
+                    print(f"⚠️  Publisher page {page} interrupted ({e}), retrying...")
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+            
+            next_href = parser.next_href or parser.page_hrefs.get(page + 1)
+            url = urljoin(url, next_href) if next_href else None
+            page += 1
+    
+    def _scan_page(self, url, parser, seen):
+        response = self._get(url, stream=True)
+        try:
+            if response.status_code != 200:
+                # 5xx som överlevt adapterns omförsök, 404 osv: listan vore ofullständig
+                response.raise_for_status()
+                return
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            for chunk in response.iter_content(chunk_size=16384, decode_unicode=True):
+                with metrics.span('parse.publisher_page'):
+                    parser.feed(chunk)
+                yield from _unseen(parser.take_new(), seen)
+            parser.close()
+            yield from _unseen(parser.take_new(), seen)
+        finally:
+            response.close()
+    
+    @staticmethod
+    def _transient(error):
+        """Om ett fel kan gå över av sig självt (inte 4xx, öppen krets eller saknat i kassetten)"""
+        from http_adapter import CassetteMiss, CircuitOpenError
+        
+        if isinstance(error, (CassetteMiss, CircuitOpenError)):
+            return False
+        response = getattr(error, 'response', None)
+        return response is None or response.status_code in RETRY_STATUSES
     
     def _extract_packages_from_html(self, html_content):
         """Extrahera package-namn från HTML"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        packages = set()
-        
-        selectors = [
-            ('a', {'href': lambda x: x and x.startswith('/packages/')}),
-            ('h3.packages-title a', {}),
-            ('.package-name a', {}),
-        ]
-        
-        for tag, attrs in selectors:
-            links = soup.find_all(tag, attrs) if attrs else soup.select(tag)
-            for link in links:
-                href = link.get('href', '')
-                if '/packages/' in href:
-                    parts = href.split('/packages/')
-                    if len(parts) > 1:
-                        package_name = parts[1].split('/')[0].split('?')[0]
-                        if package_name and '/' not in package_name:
-                            packages.add(package_name)
-        
-        return list(packages)
-    
-    def get_package_info(self, package_name):
-        """Hämta detaljerad info om ett package"""
-        url = f"https://pub.dev/api/packages/{package_name}"
+        parser = PublisherPageParser()
+        parser.feed(html_content)
+        parser.close()
+        return list(parser.packages)
+    
+    def get_package_score(self, package_name, timeout=None):
+        """Pub points, likes och popularity, eller None om score-API:t inte svarar"""
+        url = f"{self.base_url}/api/packages/{package_name}/score"
         
         try:
-            response = self.session.get(url, timeout=10)
+            response = self._get(url, timeout)
             if response.status_code == 200:
-                data = response.json()
+                with metrics.span('parse.score_json'):
+                    data = response.json()
                 return {
-                    'package': package_name,
-                    'version': data['latest']['version'],
-                    'description': data['latest'].get('pubspec', {}).get('description', ''),
+                    'points': data.get('grantedPoints'),
+                    'likes': data.get('likeCount'),
+                    'popularity': data.get('popularityScore'),
                 }
+        except Exception as e:
+            print(f"⚠️  Error fetching score for {package_name}: {e}")
+        
+        metrics.incr('scores.failed')
+        return None
+    
+    def get_package_info(self, package_name, timeout=None, scores=True):
+        """Hämta detaljerad info om ett package (och score om scores=True)"""
+        url = f"{self.base_url}/api/packages/{package_name}"
+        
+        try:
+            response = self._get(url, timeout)
+            if response.status_code == 200:
+                with metrics.span('parse.package_json'):
+                    data = response.json()
+                record = PackageRecord(
+                    package_name,
+                    data['latest']['version'],
+                    data['latest'].get('pubspec', {}).get('description', ''),
+                    source='pub.dev',
+                )
+                # Ett saknat score gör inte hela package:t ogiltigt
+                score = self.get_package_score(package_name, timeout) if scores else None
+                if score:
+                    record.points = score['points']
+                    record.likes = score['likes']
+                    record.popularity = score['popularity']
+                return record
         except Exception as e:
             print(f"⚠️  Error fetching {package_name}: {e}")
         
+        metrics.incr('packages.failed')
+        return None
+    
+    def get_package_infos(self, package_names, concurrency=DEFAULT_CONCURRENCY, deadline=None):
+        """Hämta info för flera packages parallellt
+        
+        Resultatet har samma ordning som package_names. Packages som
+        misslyckas, eller inte hinner bli klara inom deadline (sekunder för
+        hela anropet), blir None.
+        """
+        stats = {}
+        results = [info for _, info in self.iter_package_infos(package_names, concurrency, deadline, stats=stats)]
+        if stats['skipped']:
+            print(f"⚠️  Deadline reached, skipped {stats['skipped']} packages")
+        return results
+    
+    def iter_package_infos(self, package_names, concurrency=DEFAULT_CONCURRENCY, deadline=None, window=None,
+                           stats=None):
+        """Strömmande get_package_infos: (namn, record eller None) i samma ordning
+        
+        package_names får vara en generator; högst window namn (standard fyra
+        per worker) är hämtade ur den och i flykt samtidigt. Antalet som
+        hoppades över p.g.a. deadline hamnar i stats['skipped'].
+        """
+        stop_at = time.monotonic() + deadline if deadline is not None else None
+        
+        def fetch(name):
+            timeout = self.timeout
+            if stop_at is not None:
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0:
+                    return None
+                timeout = tuple(min(part, remaining) for part in timeout)
+            return self.get_package_info(name, timeout=timeout)
+        
+        return fetch_window(fetch, package_names, concurrency, window, deadline, stats)
+
+
+class ManifestSink(Sink):
+    """Manifestet för generate_incremental
+    
+    En JSON-rad per package (namn, version, innehållshash) i samma ordning
+    som README, sist en rad med README-hashen. Radformatet gör att det kan
+    läsas parallellt med nästa körnings ström utan att laddas i minnet.
+    """
+    
+    def write(self, entry):
+        self._write(json.dumps(entry, sort_keys=True) + "\n")
+    
+    def end(self, meta):
+        self._write(json.dumps(meta, sort_keys=True) + "\n")
+
+
+def _read_manifest(path, trailer):
+    """(namn, hash) ur manifestet i filens ordning, sista raden hamnar i trailer
+    
+    Saknas filen eller är den i det äldre formatet (ett enda JSON-objekt)
+    blir det inga poster, och allt renderas om en gång.
+    """
+    try:
+        f = open(path, encoding='utf-8')
+    except OSError:
+        return
+    with f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                return
+            if not isinstance(entry, dict):
+                return
+            if 'package' in entry:
+                yield entry['package'], entry.get('hash')
+            else:
+                trailer.update(entry)
+
+
+def read_manifest(path):
+    """({namn: version}, meta) ur manifestet, eller None om det saknas eller är i äldre format"""
+    try:
+        f = open(path, encoding='utf-8')
+    except OSError:
+        return None
+    versions = {}
+    meta = {}
+    with f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                return None
+            if not isinstance(entry, dict):
+                return None
+            if 'package' in entry:
+                versions[entry['package']] = entry.get('version')
+            else:
+                meta.update(entry)
+    return versions, meta
+
+
+def readme_file_hash(path):
+    """README-hashen som den står i manifestets readme_hash, eller None om filen saknas"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                digest.update(line.encode('utf-8'))
+    except OSError:
         return None
+    return digest.hexdigest()
+
+
+def _readme_rows(path, digest):
+    """(namn, rad) för tabellraderna i en befintlig README; hela texten hashas i digest"""
+    if digest is None:
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            digest.update(line.encode('utf-8'))
+            match = ReadmeGenerator.ROW_PATTERN.match(line)
+            if match:
+                yield match.group(1), line.rstrip('\n')
 
 
 class ReadmeGenerator:
     """Generera README.md från package data"""
     
+    # Höj när radformatet ändras så att alla rader renderas om
+    ROW_FORMAT = 2
+    ROW_PATTERN = re.compile(r"^\| \*\*([^*]+)\*\* \|")
+    
     @staticmethod
-    def generate(packages, fallback_used=False):
-        """Skapa README innehåll"""
-        timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    def render_row(pkg, badges=False):
+        """En tabellrad för ett package"""
+        return render_row(pkg, badges)
+    
+    @staticmethod
+    def generate(packages, fallback_used=False, rows=None, badges=False):
+        """Skapa README innehåll
         
-        lines = [
-            "# 📦 GLLB-Apps Dart Packages\n",
-            "My published packages on pub.dev\n",
-        ]
+        rows kan innehålla färdigrenderade rader per package-namn som
+        återanvänds istället för att renderas om. Som standard skrivs
+        version, points, likes och popularity som text; badges=True ger
+        shields.io-bilder istället.
+        """
+        if not isinstance(packages, PackageCollection):
+            packages = sorted(packages, key=lambda x: x['package'])
+        return render_markdown(packages, fallback_used, badges, rows)
+    
+    @staticmethod
+    def package_hash(pkg, badges=False):
+        """Innehållshash för det som är relevant för en rad"""
+        data = json.dumps([
+            ReadmeGenerator.ROW_FORMAT, badges, pkg['package'], pkg.get('version'), pkg.get('description', ''),
+            pkg.get('points'), pkg.get('likes'), pkg.get('popularity'),
+        ])
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+    
+    @staticmethod
+    def generate_incremental(packages, readme_path, manifest_path, fallback_used=False, badges=False,
+                             sinks=()):
+        """Skriv README (och övriga sinks) bara om något faktiskt ändrats
         
-        if fallback_used:
-            lines.append("⚠️ *Using fallback package list (auto-discovery unavailable)*\n")
+        packages ska vara sorterade på namn och får vara en ström; allt görs
+        i ett pass utan att samla packages i minnet. Manifestet (namn,
+        version och innehållshash per package) och befintlig README läses
+        parallellt med strömmen som en merge-join, och rader för oförändrade
+        packages återanvänds. Utdatan skrivs till temporära filer som byts in
+        i slutet, men bara om något package ändrats, README ändrats för hand
+        eller någon sinks fil saknas; annars tas de bort och filerna lämnas
+        orörda. Returnerar True om något skrevs.
+        """
+        readme_path = Path(readme_path)
+        manifest_path = Path(manifest_path)
+        sinks_exist = all(sink.path.exists() for sink in sinks)
         
-        if not packages:
-            lines.append("*No packages found.*\n")
-        else:
-            packages.sort(key=lambda x: x['package'])
-            
-            lines.extend([
-                "| Package | Version | Pub Points | Popularity | Link |",
-                "|---------|---------|------------|------------|------|",
-            ])
-            
+        old_meta = {}
+        old_hashes = SortedLookup(_read_manifest(manifest_path, old_meta))
+        readme_digest = hashlib.sha256() if readme_path.exists() else None
+        old_rows = SortedLookup(_readme_rows(readme_path, readme_digest))
+        rows = {}
+        unchanged = True
+        manifest = ManifestSink(manifest_path).open()
+        
+        def annotated():
+            nonlocal unchanged
             for pkg in packages:
                 name = pkg['package']
-                lines.append(
-                    f"| **{name}** | "
-                    f"![version](https://img.shields.io/pub/v/{name}.svg?color=blue) | "
-                    f"![points](https://img.shields.io/pub/points/{name}?color=green) | "
-                    f"![popularity](https://img.shields.io/pub/popularity/{name}?color=orange) | "
-                    f"[pub.dev](https://pub.dev/packages/{name}) |"
-                )
+                digest = ReadmeGenerator.package_hash(pkg, badges)
+                old_hash = old_hashes.pop(name)
+                old_row = old_rows.pop(name)
+                # MarkdownSink slår upp raden i rows för just det här package:t
+                rows.clear()
+                if old_hash != digest:
+                    unchanged = False
+                elif old_row is not None:
+                    rows[name] = old_row
+                manifest.write({'package': name, 'version': pkg.get('version'), 'hash': digest})
+                yield pkg
         
-        lines.extend([
-            "\n---",
-            f"**Last updated:** `{timestamp} UTC` 🤖",
-            "\n*Auto-updated daily at 03:00 UTC via GitHub Actions*",
-        ])
+        readme = MarkdownSink(readme_path, badges=badges, rows=rows)
+        outputs = [readme, *sinks, manifest]
+        try:
+            with metrics.span('render'):
+                run_pipeline(annotated(), outputs[:-1], default_meta(fallback_used), commit=False)
+            manifest.end({'fallback_used': fallback_used, 'readme_hash': readme.digest})
+            old_rows.drain()
+            removed = old_hashes.drain()
+        except BaseException:
+            abort_all(outputs)
+            raise
         
-        return "\n".join(lines)
+        if (
+            unchanged
+            and not removed
+            and old_meta.get('fallback_used') == fallback_used
+            and readme_digest is not None
+            and readme_digest.hexdigest() == old_meta.get('readme_hash')
+            and sinks_exist
+        ):
+            abort_all(outputs)
+            return False
+        commit_all(outputs)
+        return True
 
 
-def main():
-    """Main script execution"""
-    print("=" * 60)
-    print("📦 GLLB-Apps Package Updater")
-    print("=" * 60)
+def load_sources(path):
+    """Läs källkonfigurationen (publishers, packages, exclude, fallback)"""
+    sources = dict(DEFAULT_SOURCES)
+    if path is not None and Path(path).exists():
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+        for key in DEFAULT_SOURCES:
+            if key in data:
+                sources[key] = list(data[key])
+    return sources
+
+
+def discover_packages(scraper, sources, concurrency=DEFAULT_CONCURRENCY, buffer=DEFAULT_BUFFER,
+                      max_in_memory=DEFAULT_SORT_MEMORY, known=None):
+    """Hämta package-namn från alla källor parallellt
+    
+    Returnerar (names, timings, fallback_used): names är en sorterad ström
+    utan dubbletter och exkluderingar, timings är en lista med (källa,
+    antal packages, sekunder). Publishers läses i trådar in i en kö med
+    högst buffer namn, och dubbletter tas bort med en external sort.
     
-    scraper = PubDevScraper()
+    known är en funktion som ger förra körningens namn sorterade. Om en
+    publisher misslyckas slås de ihop med det som hittades, så att ett
+    tillfälligt fel inte tar bort packages (eller tar till fallback-listan).
+    """
+    timings = []
+    errors = []
     
-    all_package_names = []
+    def publisher_source(publisher):
+        def produce():
+            start = time.perf_counter()
+            count = 0
+            for name in scraper.scan_publisher(publisher, errors):
+                count += 1
+                yield name
+            timings.append((f"publisher:{publisher}", count, time.perf_counter() - start))
+        return produce
     
-    packages = scraper.get_packages_from_publisher('gllb-apps.github.io')
-    if packages:
-        all_package_names.extend(packages)
+    publishers = sources['publishers']
+    discovered = merge_threads(
+        [publisher_source(publisher) for publisher in publishers],
+        buffer,
+        workers=max(1, min(concurrency, len(publishers))),
+    )
+    names = unique(external_sort(chain(discovered, sources['packages']), max_in_memory=max_in_memory))
+    
+    # Första namnet kommer först när alla källor är klara (sorteringen kräver det)
+    first = next(names, None)
+    if sources['packages']:
+        timings.append(('packages', len(sources['packages']), 0.0))
+    
+    found = first is not None
+    names = chain([first], names) if found else iter(())
+    if errors and known is not None:
+        previous = list(known())
+        if previous:
+            print(f"⚠️  {len(errors)} source(s) failed, keeping {len(previous)} packages from the previous run")
+            metrics.incr('discovery.kept_previous', len(previous))
+            names = unique(heapq.merge(names, previous))
+            found = True
     
     fallback_used = False
-    if not all_package_names:
+    if not found and sources['fallback']:
         print("\n⚠️  Scraping failed, using fallback list...")
-        all_package_names = [
-            'flux_wireframe_theme_cli',
-            'wireframe_theme',
-        ]
+        names = iter(sorted(set(sources['fallback'])))
         fallback_used = True
     
-    all_package_names = list(set(all_package_names))
-    print(f"\n📦 Processing {len(all_package_names)} packages...")
+    excluded = set(sources['exclude'])
+    return (name for name in names if name not in excluded), timings, fallback_used
+
+
+def _encode_record(record):
+    return json.dumps(record.to_dict())
+
+
+def _decode_record(line):
+    return PackageRecord.from_dict(json.loads(line))
+
+
+def report_changed(changed):
+    """Exponera om körningen ändrade något som steg-output i GitHub Actions"""
+    output_path = os.environ.get('GITHUB_OUTPUT')
+    if output_path:
+        with open(output_path, 'a', encoding='utf-8') as f:
+            f.write(f"changed={'true' if changed else 'false'}\n")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Update README with packages from pub.dev")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="max parallel package requests (default: %(default)s)")
+    parser.add_argument('--deadline', type=float, default=None,
+                        help="max seconds for fetching package info (default: no limit)")
+    parser.add_argument('--buffer', type=int, default=DEFAULT_BUFFER,
+                        help="max packages queued or in flight between pipeline stages (default: %(default)s)")
+    parser.add_argument('--sort-memory', type=int, default=DEFAULT_SORT_MEMORY,
+                        help="max packages sorted in memory before spilling to disk (default: %(default)s)")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL,
+                        help="pub.dev base URL (default: %(default)s)")
+    parser.add_argument('--sources', type=Path, default=DEFAULT_SOURCES_PATH,
+                        help="JSON with publishers, packages, exclude and fallback (default: %(default)s)")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help="initial requests/second per host, 0 disables rate limiting (default: %(default)s)")
+    parser.add_argument('--max-rate', type=float, default=DEFAULT_MAX_RATE,
+                        help="upper bound for the adaptive rate (default: %(default)s)")
+    parser.add_argument('--connect-timeout', type=float, default=CONNECT_TIMEOUT,
+                        help="seconds to wait for a connection (default: %(default)s)")
+    parser.add_argument('--read-timeout', type=float, default=READ_TIMEOUT,
+                        help="seconds to wait for data on an open connection (default: %(default)s)")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help="retries per request on connection errors, timeouts and 5xx (default: %(default)s)")
+    parser.add_argument('--no-hedge', action='store_true',
+                        help="never send a duplicate request when a response is slower than usual")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument('--record', type=Path, default=None, metavar='CASSETTE',
+                          help="record every HTTP response to a cassette file")
+    cassette.add_argument('--replay', type=Path, default=None, metavar='CASSETTE',
+                          help="serve HTTP responses from a recorded cassette, without network access")
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                        help="HTTP cache directory (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true', help="disable the HTTP cache")
+    parser.add_argument('--cache-ttl', type=float, default=None,
+                        help="reuse cached responses younger than this many seconds without revalidating")
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="max cache size in MB (default: %(default)s)")
+    parser.add_argument('--db', type=Path, default=DEFAULT_DB_PATH,
+                        help="SQLite metadata store (default: %(default)s)")
+    parser.add_argument('--no-db', action='store_true',
+                        help="fetch every package and skip the metadata store")
+    parser.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE,
+                        help="seconds before a stored package is fetched again, 0 always fetches (default: %(default)s)")
+    parser.add_argument('--output', type=Path, default=DEFAULT_README_PATH,
+                        help="README to write (default: %(default)s)")
+    parser.add_argument('--html', type=Path, default=DEFAULT_HTML_PATH,
+                        help="index.html to regenerate in the same pass (default: %(default)s)")
+    parser.add_argument('--json', type=Path, default=DEFAULT_JSON_PATH,
+                        help="JSON package catalogue (default: %(default)s)")
+    parser.add_argument('--ndjson', type=Path, default=None,
+                        help="also write the catalogue as NDJSON, one package per line")
+    parser.add_argument('--readme-only', action='store_true',
+                        help="write only the README (no index.html, JSON or NDJSON)")
+    parser.add_argument('--manifest', type=Path, default=None,
+                        help=f"render manifest (default: {MANIFEST_NAME} next to the README)")
+    parser.add_argument('--badges', action='store_true',
+                        help="render shields.io badges instead of static version/points/likes/popularity text")
+    parser.add_argument('--force', action='store_true',
+                        help="always rewrite the README, even when nothing changed")
+    parser.add_argument('--commit', metavar='MESSAGE', default=None,
+                        help="commit the README and manifest with git plumbing if they differ from HEAD")
+    parser.add_argument('--push', action='store_true',
+                        help="git push after a new commit (requires --commit)")
+    parser.add_argument('--metrics', action='store_true',
+                        help="collect timing spans and counters and print a summary")
+    parser.add_argument('--metrics-json', type=Path, default=None,
+                        help="write the metrics report as JSON (implies --metrics)")
+    parser.add_argument('--metrics-prom', type=Path, default=None,
+                        help="write the metrics as a Prometheus textfile (implies --metrics)")
+    return parser.parse_args(argv)
+
+
+def build_scraper(args):
+    """(scraper, cache) enligt CLI-argumenten"""
+    cache = None
+    if not args.no_cache:
+        cache = HttpCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024), args.cache_ttl)
+    
+    scraper = PubDevScraper(
+        args.base_url,
+        pool_size=args.concurrency,
+        cache=cache,
+        rate=args.rate or None,
+        max_rate=args.max_rate,
+        record=args.record,
+        replay=args.replay,
+        timeout=(args.connect_timeout, args.read_timeout),
+        retries=args.retries,
+        hedge=not args.no_hedge,
+    )
+    return scraper, cache
+
+
+def sync_once(args, scraper, cache):
+    """Ett sync-varv: discovery, hämtning, output och ev. commit
+    
+    Returnerar en dict med changed, packages, fetched, failed och commit.
+    Används både av main() och av sync_daemon.py (som återanvänder samma
+    scraper och cache mellan varven).
+    """
+    store = None if args.no_db else PackageStore(args.db)
+    previous_run = store.last_run() if store is not None else None
+    known = None
+    if previous_run is not None:
+        # Om en källa fallerar behålls förra körningens packages istället
+        known = lambda: store.run_names(previous_run['id'])
+    
+    try:
+        sources = load_sources(args.sources)
+        with metrics.span('discovery'):
+            names, timings, fallback_used = discover_packages(
+                scraper, sources, args.concurrency, args.buffer, args.sort_memory, known
+            )
+        for source, count, elapsed in timings:
+            print(f"⏱  {source}: {count} packages in {elapsed:.2f}s")
+        
+        print("\n📦 Processing packages...")
+        
+        counts = {'listed': 0, 'stale': 0, 'fetched': 0}
+        
+        def counted(items, key):
+            for item in items:
+                counts[key] += 1
+                yield item
+        
+        stale_names = counted(names, 'listed')
+        if store is not None:
+            run_id = store.begin_run()
+            
+            def stale(listed):
+                # Markera listade som sedda och hämta bara de som är gamla; allt
+                # committas först i finish_run
+                for chunk in batched(listed, STORE_BATCH):
+                    store.save_run(run_id, (), chunk, commit=False)
+                    yield from store.stale_names(chunk, args.max_age)
+            
+            stale_names = stale(stale_names)
+        
+        def fetched_records():
+            fetch_stats = {}
+            infos = scraper.iter_package_infos(
+                counted(stale_names, 'stale'), args.concurrency, args.deadline, args.buffer, fetch_stats
+            )
+            for name, info in infos:
+                if info:
+                    counts['fetched'] += 1
+                    print(f"  ✓ {name} v{info['version']}")
+                    yield info
+                else:
+                    print(f"  ✗ {name} (failed)")
+            if fetch_stats['skipped']:
+                print(f"⚠️  Deadline reached, skipped {fetch_stats['skipped']} packages")
+        
+        start = time.perf_counter()
+        with metrics.span('fetch'):
+            if store is not None:
+                # Misslyckade hämtningar faller tillbaka på senast lagrade data
+                for batch in batched(fetched_records(), STORE_BATCH):
+                    with metrics.span('store'):
+                        store.save_run(run_id, batch, (), commit=False)
+            else:
+                packages = external_sort(
+                    fetched_records(), key=attrgetter('package'), max_in_memory=args.sort_memory,
+                    encode=_encode_record, decode=_decode_record,
+                )
+                # Sorteringen läser hela strömmen innan första posten kommer
+                first = next(packages, None)
+                packages = chain([first], packages) if first is not None else iter(())
+        print(f"⏱  package info: {counts['stale']} packages in {time.perf_counter() - start:.2f}s")
+        
+        if store is not None:
+            print(f"🗄  {counts['listed'] - counts['stale']} packages fresh in {args.db}, "
+                  f"fetched {counts['stale']}")
+            with metrics.span('store'):
+                package_count = store.run_size(run_id)
+                store.finish_run(run_id, package_count)
+            if previous_run is not None:
+                for name, version in store.changes_since(previous_run['id']):
+                    print(f"  ⬆ {name} v{version}")
+                for name in store.removed_since(previous_run['id'], run_id):
+                    print(f"  − {name} (no longer listed)")
+            packages = store.iter_records(run_id)
+        else:
+            package_count = counts['fetched']
+        
+        print("\n📝 Generating README...")
+        readme_path = args.output
+        manifest_path = args.manifest or readme_path.with_name(MANIFEST_NAME)
+        if args.force:
+            manifest_path.unlink(missing_ok=True)
+        sinks = []
+        if not args.readme_only:
+            sinks.append(HtmlSink(args.html))
+            sinks.append(JsonSink(args.json))
+            if args.ndjson:
+                sinks.append(NdjsonSink(args.ndjson))
+        changed = ReadmeGenerator.generate_incremental(
+            packages, readme_path, manifest_path, fallback_used, args.badges, sinks
+        )
+    finally:
+        if store is not None:
+            store.close()
     
-    package_infos = []
-    for name in all_package_names:
-        info = scraper.get_package_info(name)
-        if info:
-            package_infos.append(info)
-            print(f"  ✓ {name} v{info['version']}")
+    if changed:
+        print(f"✅ Updated {package_count} packages!")
+        print("📄 README updated with timestamp")
+        for sink in sinks:
+            print(f"📄 {sink.path.name} written")
+    else:
+        print("ℹ️  No changes, README left untouched (no-op)")
+    # Före git: ett commit- eller push-fel ska inte kasta cacheindexet för lyckade hämtningar
+    if cache is not None:
+        cache.save()
+        print(f"💾 HTTP cache: {cache.summary()}")
+    commit = None
+    if args.commit:
+        repo = readme_path.resolve().parent
+        with metrics.span('git.commit'):
+            paths = [readme_path, manifest_path, *(sink.path for sink in sinks)]
+            commit = commit_files(repo, read_files(repo, [path.resolve() for path in paths]), args.commit)
+        if commit is None:
+            print("ℹ️  README matches HEAD, nothing to commit")
         else:
-            print(f"  ✗ {name} (failed)")
+            print(f"💾 Committed {commit[:7]} {args.commit}")
+            if args.push:
+                with metrics.span('git.push'):
+                    push(repo)
+                print("🚀 Pushed")
+    throttled = scraper.adapter.throttled_count()
+    if throttled:
+        print(f"🐢 Throttled (429) {throttled} times")
+    opened = scraper.adapter.circuit_open_count()
+    if opened:
+        print(f"🔌 Circuit opened {opened} times (upstream failing)")
+    
+    return {
+        'changed': changed,
+        'packages': package_count,
+        'fetched': counts['fetched'],
+        'failed': counts['stale'] - counts['fetched'],
+        'commit': commit,
+    }
+
+
+def main(argv=None):
+    """Main script execution"""
+    args = parse_args(argv)
+    if args.metrics or args.metrics_json or args.metrics_prom:
+        metrics.enable()
     
-    print(f"\n📝 Generating README...")
-    readme_content = ReadmeGenerator.generate(package_infos, fallback_used)
+    print("=" * 60)
+    print("📦 GLLB-Apps Package Updater")
+    print("=" * 60)
     
-    readme_path = Path(__file__).parent.parent / 'README.md'
-    readme_path.write_text(readme_content, encoding='utf-8')
+    scraper, cache = build_scraper(args)
+    try:
+        result = sync_once(args, scraper, cache)
+    finally:
+        scraper.close()
+    if args.record:
+        print(f"📼 Recorded {len(scraper.adapter.recorder)} responses to {args.record}")
+    report_changed(result['changed'])
     
-    print(f"✅ Updated {len(package_infos)} packages!")
-    print(f"📄 README updated with timestamp")
+    if metrics.enabled:
+        for line in metrics.summary_lines():
+            print(line)
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+            print(f"📊 Metrics written to {args.metrics_json}")
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+            print(f"📊 Prometheus metrics written to {args.metrics_prom}")
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,9 @@
+# tests/conftest.py
+"""Skripten och GUI-modulerna importeras som toppnivåmoduler, som i appen"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT / 'scripts', ROOT / 'apps' / 'reporead_py'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
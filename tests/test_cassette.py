@@ -0,0 +1,86 @@
+# tests/test_cassette.py
+"""Kassettformatet: inspelning, uppslag och trasiga filer"""
+import pytest
+
+from cassette import CassetteError, CassetteReader, CassetteWriter
+
+
+def _record(path, *responses):
+    with CassetteWriter(path) as writer:
+        for method, url, status, body in responses:
+            writer.add(method, url, status, {'Content-Type': 'application/json'}, body, 'OK')
+    return path
+
+
+def test_round_trip(tmp_path):
+    path = _record(
+        tmp_path / 'run.cas',
+        ('GET', 'http://127.0.0.1:8000/api/packages/alpha', 200, b'{"name": "alpha"}'),
+        ('GET', 'http://127.0.0.1:8000/api/packages/beta', 404, b''),
+    )
+    with CassetteReader(path) as reader:
+        assert len(reader) == 2
+        meta, body = reader.get('GET', 'http://127.0.0.1:8000/api/packages/alpha')
+        assert body == b'{"name": "alpha"}'
+        assert (meta['status'], meta['reason']) == (200, 'OK')
+        assert meta['headers'] == {'Content-Type': 'application/json'}
+        assert reader.get('GET', 'http://127.0.0.1:8000/api/packages/beta')[0]['status'] == 404
+        assert reader.get('GET', 'http://127.0.0.1:8000/api/packages/gamma') is None
+        assert reader.get('HEAD', 'http://127.0.0.1:8000/api/packages/alpha') is None
+
+
+def test_duplicate_key_last_one_wins(tmp_path):
+    path = _record(
+        tmp_path / 'run.cas',
+        ('GET', 'http://x/api/packages/alpha', 500, b'first'),
+        ('GET', 'http://x/api/packages/alpha', 200, b'second'),
+    )
+    with CassetteReader(path) as reader:
+        assert len(reader) == 1
+        meta, body = reader.get('GET', 'http://x/api/packages/alpha')
+        assert (meta['status'], body) == (200, b'second')
+
+
+def test_key_ignores_query_order_host_and_method_case(tmp_path):
+    path = _record(tmp_path / 'run.cas', ('GET', 'http://a:1/publishers/p/packages?page=2&sort=name', 200, b'page 2'))
+    with CassetteReader(path) as reader:
+        assert reader.get('get', 'https://b:2/publishers/p/packages?sort=name&page=2')[1] == b'page 2'
+        assert reader.get('GET', 'http://a:1/publishers/p/packages?page=3&sort=name') is None
+
+
+def test_empty_cassette_round_trips(tmp_path):
+    with CassetteReader(_record(tmp_path / 'run.cas')) as reader:
+        assert len(reader) == 0
+        assert reader.get('GET', 'http://x/') is None
+
+
+def test_empty_file_raises(tmp_path):
+    path = tmp_path / 'empty.cas'
+    path.write_bytes(b'')
+    with pytest.raises(CassetteError):
+        CassetteReader(path)
+
+
+@pytest.mark.parametrize('cut', [1, 8, 20])
+def test_truncated_file_raises(tmp_path, cut):
+    path = _record(tmp_path / 'run.cas', ('GET', 'http://x/api/packages/alpha', 200, b'{}'))
+    data = path.read_bytes()
+    path.write_bytes(data[:-cut])
+    with pytest.raises(CassetteError):
+        CassetteReader(path)
+
+
+def test_other_file_raises(tmp_path):
+    path = tmp_path / 'other.cas'
+    path.write_bytes(b'{"not": "a cassette"}' * 4)
+    with pytest.raises(CassetteError):
+        CassetteReader(path)
+
+
+def test_unclosed_writer_leaves_no_cassette(tmp_path):
+    writer = CassetteWriter(tmp_path / 'run.cas')
+    writer.add('GET', 'http://x/', 200, {}, b'body')
+    assert not (tmp_path / 'run.cas').exists()
+    writer.close()
+    writer.close()
+    assert (tmp_path / 'run.cas').exists()
@@ -0,0 +1,149 @@
+# tests/test_http_adapter.py
+"""Omförsök, circuit breaker och hedging i RateLimitedAdapter mot FakePubDev"""
+import functools
+import time
+
+import pytest
+import requests
+
+import http_adapter
+from fake_pubdev import FakePubDev
+from http_adapter import CircuitOpenError, RateLimitedAdapter
+from metrics import metrics
+from rate_limit import TokenBucket
+from resilience import CircuitBreaker, LatencyTracker
+
+
+@pytest.fixture
+def counters():
+    """Slå på metrics för testet och ge räknarna efteråt"""
+    enabled = metrics.enabled
+    metrics.enable()
+    metrics.reset()
+    yield lambda: metrics.report()['counters']
+    metrics.enabled = enabled
+    metrics.reset()
+
+
+def _session(adapter):
+    session = requests.Session()
+    session.mount('http://', adapter)
+    return session
+
+
+def _package_url(base_url, i=0):
+    return f"{base_url}/api/packages/fake_package_{i:05d}"
+
+
+def test_retries_recover_from_resets_and_truncated_bodies(counters):
+    fake = FakePubDev(package_count=20, reset_rate=0.2, truncate_rate=0.2, seed=3)
+    with fake as base_url, _session(RateLimitedAdapter(rate=None, hedge=False, retries=6)) as session:
+        for i in range(20):
+            response = session.get(_package_url(base_url, i), timeout=2)
+            assert response.status_code == 200
+            assert response.json()['name'] == f"fake_package_{i:05d}"
+
+    faults = fake.faults['reset'] + fake.faults['truncate']
+    assert faults > 0
+    assert counters()['http.retries'] == faults
+
+
+def test_breaker_opens_and_probes_half_open(monkeypatch, counters):
+    monkeypatch.setattr(http_adapter, 'CircuitBreaker',
+                        functools.partial(CircuitBreaker, failure_threshold=3, reset_timeout=0.2))
+    adapter = RateLimitedAdapter(rate=None, hedge=False, retries=0)
+    fake = FakePubDev(package_count=1)
+    with fake as base_url, _session(adapter) as session:
+        url = _package_url(base_url)
+        fake.down = True
+        for _ in range(3):
+            assert session.get(url, timeout=2).status_code == 503
+        # Öppen: inga anrop når servern
+        with pytest.raises(CircuitOpenError):
+            session.get(url, timeout=2)
+        assert fake.faults['down'] == 3
+
+        # Half-open: ett provanrop, som felar och öppnar kretsen igen med dubbel paus
+        time.sleep(0.25)
+        assert session.get(url, timeout=2).status_code == 503
+        assert fake.faults['down'] == 4
+        with pytest.raises(CircuitOpenError):
+            session.get(url, timeout=2)
+
+        # Hosten är uppe igen: provanropet lyckas och kretsen stängs
+        fake.down = False
+        time.sleep(0.45)
+        assert session.get(url, timeout=2).status_code == 200
+        assert session.get(url, timeout=2).status_code == 200
+
+    breaker = adapter.breaker(base_url.split('//', 1)[1])
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.opened == 2
+    assert counters()['http.circuit_open'] == 2
+
+
+def test_probe_that_raises_does_not_wedge_breaker(monkeypatch):
+    monkeypatch.setattr(http_adapter, 'CircuitBreaker',
+                        functools.partial(CircuitBreaker, failure_threshold=2, reset_timeout=0.1))
+    adapter = RateLimitedAdapter(rate=None, hedge=False, retries=0)
+    fake = FakePubDev(package_count=1)
+    with fake as base_url, _session(adapter) as session:
+        url = _package_url(base_url)
+        fake.down = True
+        for _ in range(2):
+            assert session.get(url, timeout=2).status_code == 503
+        fake.down = False
+        time.sleep(0.15)
+
+        # Provanropet kastar ett fel som inte är ett omförsöksfel
+        send_hedged = adapter._send_hedged
+
+        def broken(request, **kwargs):
+            monkeypatch.setattr(adapter, '_send_hedged', send_hedged)
+            raise requests.exceptions.ContentDecodingError("bad gzip")
+
+        monkeypatch.setattr(adapter, '_send_hedged', broken)
+        with pytest.raises(requests.exceptions.ContentDecodingError):
+            session.get(url, timeout=2)
+        # Nästa anrop får bli nytt provanrop, lyckas och stänger kretsen
+        assert session.get(url, timeout=2).status_code == 200
+
+    assert adapter.breaker(base_url.split('//', 1)[1]).state == CircuitBreaker.CLOSED
+
+
+def test_hedge_fires_on_slow_upstream(monkeypatch, counters):
+    acquired = []
+    acquire = TokenBucket.acquire
+    monkeypatch.setattr(TokenBucket, 'acquire', lambda bucket: (acquired.append(1), acquire(bucket)))
+
+    adapter = RateLimitedAdapter(rate=50, retries=0)
+    adapter.latency = LatencyTracker(min_samples=1000, default=0.1)
+    # seed=1: första anropet blir långsamt, duplikatet inte
+    fake = FakePubDev(package_count=1, slow_rate=0.5, slow_latency=1.0, seed=1)
+    with fake as base_url, _session(adapter) as session:
+        started = time.monotonic()
+        response = session.get(_package_url(base_url), timeout=5)
+        elapsed = time.monotonic() - started
+
+    assert response.status_code == 200
+    assert elapsed < fake.slow_latency
+    assert fake.faults['slow'] == 1
+    assert counters()['http.hedge_wins'] == 1
+    # Duplikatet tar en egen token
+    assert len(acquired) == 2
+
+
+def test_hedge_ignores_waiting_for_tokens(counters):
+    # 2 anrop/s: de flesta anrop väntar längre på en token än hedge-fördröjningen
+    adapter = RateLimitedAdapter(rate=2, max_rate=2, retries=0)
+    adapter.latency = LatencyTracker(min_samples=1000, default=0.1)
+    fake = FakePubDev(package_count=6)
+    with fake as base_url, _session(adapter) as session:
+        started = time.monotonic()
+        for i in range(6):
+            assert session.get(_package_url(base_url, i), timeout=5).status_code == 200
+        elapsed = time.monotonic() - started
+
+    assert elapsed >= 1.5
+    assert 'http.hedges' not in counters()
+    assert fake.requests_served == 6
@@ -0,0 +1,149 @@
+# tests/test_http_cache.py
+"""HttpCache mot FakePubDev: villkorliga anrop, 304 och connection-poolen"""
+import io
+import json
+import threading
+
+import pytest
+import requests
+
+from fake_pubdev import FakePubDev
+from git_plumbing import GitError
+from http_cache import HttpCache
+from update_packages import build_scraper, parse_args, sync_once
+
+
+def _sync_args(tmp_path, base_url, *extra):
+    sources = tmp_path / 'sources.json'
+    sources.write_text(json.dumps({'publishers': ['gllb-apps.github.io'], 'packages': [], 'exclude': [],
+                                   'fallback': []}))
+    return parse_args([
+        '--base-url', base_url, '--sources', str(sources), '--output', str(tmp_path / 'README.md'),
+        '--readme-only', '--no-db', '--cache-dir', str(tmp_path / 'cache'), *extra,
+    ])
+
+
+def _run_sync(args, timeout=30):
+    """(cache, klar i tid) för ett sync-varv på en egen tråd, så att ett häng inte låser testet"""
+    scraper, cache = build_scraper(args)
+    thread = threading.Thread(target=sync_once, args=(args, scraper, cache), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    finished = not thread.is_alive()
+    if finished:
+        scraper.close()
+    return cache, finished
+
+
+def test_cached_sync_releases_pooled_connections(tmp_path):
+    # Fler publisher-sidor än connections i en blockerande pool (--no-hedge):
+    # en 304 som inte stängs håller sin connection och nästa sync hänger
+    with FakePubDev(package_count=40, page_size=4) as base_url:
+        args = _sync_args(tmp_path, base_url, '--no-hedge', '--concurrency', '2')
+        cache, finished = _run_sync(args)
+        assert finished
+        assert cache.hits == 0
+
+        cache, finished = _run_sync(args)
+        assert finished
+        assert cache.misses == 0
+        assert cache.hits > 10
+
+
+def test_cache_index_saved_when_commit_fails(tmp_path):
+    # tmp_path är inget git-repo: commit-steget misslyckas efter lyckade hämtningar
+    with FakePubDev(package_count=5) as base_url:
+        args = _sync_args(tmp_path, base_url, '--commit', 'update')
+        scraper, cache = build_scraper(args)
+        try:
+            with pytest.raises(GitError):
+                sync_once(args, scraper, cache)
+        finally:
+            scraper.close()
+
+    index = json.loads((tmp_path / 'cache' / 'index.json').read_text(encoding='utf-8'))
+    assert len(index['entries']) > 5
+
+
+class _StubSession:
+    """Svarar med förinspelade (status, headers, body) och sparar request-headers"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.sent = []
+
+    def get(self, url, timeout=None, headers=None, stream=False):
+        status, reply_headers, body = self.replies.pop(0)
+        self.sent.append(dict(headers or {}))
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.headers.update(reply_headers)
+        response.raw = io.BytesIO(body)
+        return response
+
+
+def test_last_modified_round_trip(tmp_path):
+    stamp = 'Wed, 21 Oct 2026 07:28:00 GMT'
+    session = _StubSession((200, {'Last-Modified': stamp}, b'body'), (304, {}, b''))
+    cache = HttpCache(tmp_path)
+    assert cache.get(session, 'http://x/a', 1).content == b'body'
+    assert cache.get(session, 'http://x/a', 1).content == b'body'
+    assert session.sent[1] == {'If-Modified-Since': stamp}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_uncacheable_response_is_not_stored(tmp_path):
+    session = _StubSession((200, {}, b'one'), (200, {}, b'two'))
+    cache = HttpCache(tmp_path)
+    assert cache.get(session, 'http://x/a', 1).content == b'one'
+    assert cache.get(session, 'http://x/a', 1).content == b'two'
+    assert session.sent[1] == {}
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_etag_304_serves_cached_body_and_releases_connection(tmp_path, stream):
+    with FakePubDev(package_count=1) as base_url, requests.Session() as session:
+        url = f"{base_url}/api/packages/fake_package_00000"
+        sent = []
+        get = session.get
+
+        def spy(*args, **kwargs):
+            response = get(*args, **kwargs)
+            sent.append((kwargs.get('headers') or {}, response))
+            return response
+
+        session.get = spy
+        cache = HttpCache(tmp_path)
+        first = cache.get(session, url, 2, stream=stream)
+        assert first.json()['name'] == 'fake_package_00000'
+        etag = first.headers['ETag']
+
+        second = cache.get(session, url, 2, stream=stream)
+        assert second.status_code == 200
+        assert second.json()['name'] == 'fake_package_00000'
+
+    headers, not_modified = sent[1]
+    assert headers['If-None-Match'] == etag
+    assert not_modified.status_code == 304
+    # Connectionen har lämnats tillbaka till poolen
+    assert not_modified.raw.closed
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_missing_body_on_disk_is_refetched(tmp_path):
+    with FakePubDev(package_count=1) as base_url, requests.Session() as session:
+        url = f"{base_url}/api/packages/fake_package_00000"
+        cache = HttpCache(tmp_path)
+        body = cache.get(session, url, 2).content
+        for path in tmp_path.iterdir():
+            if path.name != 'index.json':
+                path.unlink()
+
+        refetched = cache.get(session, url, 2)
+        assert refetched.status_code == 200
+        assert refetched.content == body
+        assert cache.misses == 2
+        # Svaret sparas igen, så nästa anrop är en 304-träff
+        assert cache.get(session, url, 2).content == body
+        assert cache.hits == 1
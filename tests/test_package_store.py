@@ -0,0 +1,76 @@
+# tests/test_package_store.py
+"""PackageStore: körningar, tillagda och borttagna packages och omgångsvis sparande"""
+from package_registry import PackageRecord
+from package_store import PackageStore
+
+
+def _record(name, version):
+    return PackageRecord(name, version, f"About {name}", 'pub.dev', points=100, likes=1, popularity=0.1)
+
+
+def _sync(store, listed, fetched, batch=None):
+    """Ett sync-varv som i sync_once: listade markeras sedda, hämtade sparas, allt committas i finish_run"""
+    run_id = store.begin_run()
+    batch = batch or len(listed) or 1
+    for i in range(0, len(listed), batch):
+        store.save_run(run_id, (), listed[i:i + batch], commit=False)
+    for i in range(0, len(fetched), batch):
+        store.save_run(run_id, fetched[i:i + batch], (), commit=False)
+    store.finish_run(run_id, store.run_size(run_id))
+    return run_id
+
+
+def test_runs_track_added_changed_and_removed_packages(tmp_path):
+    with PackageStore(tmp_path / 'packages.db') as store:
+        assert store.last_run() is None
+        first = _sync(store, ['alpha', 'beta'], [_record('alpha', '1.0.0'), _record('beta', '1.0.0')])
+        second = _sync(store, ['alpha', 'gamma'], [_record('alpha', '1.1.0'), _record('gamma', '0.1.0')])
+
+        assert store.last_run()['id'] == second
+        assert store.last_run(before=second)['id'] == first
+        assert store.last_run()['package_count'] == 2
+        assert store.changes_since(first) == [('alpha', '1.1.0'), ('gamma', '0.1.0')]
+        assert store.removed_since(first, second) == ['beta']
+        assert store.run_names(second) == ['alpha', 'gamma']
+        assert [(r.package, r.version) for r in store.get_records()] == [('alpha', '1.1.0'), ('gamma', '0.1.0')]
+        assert [version for version, _ in store.history('alpha')] == ['1.0.0', '1.1.0']
+
+
+def test_listed_but_not_refetched_package_stays_in_run(tmp_path):
+    with PackageStore(tmp_path / 'packages.db') as store:
+        _sync(store, ['alpha', 'beta'], [_record('alpha', '1.0.0'), _record('beta', '1.0.0')])
+        # beta är färsk och hämtas inte om, men listas fortfarande
+        second = _sync(store, ['alpha', 'beta'], [_record('alpha', '1.0.1')])
+        assert [(r.package, r.version) for r in store.iter_records(second)] == [
+            ('alpha', '1.0.1'), ('beta', '1.0.0'),
+        ]
+        assert store.stale_names(['alpha', 'beta', 'new'], max_age=3600) == ['new']
+        assert store.stale_names(['alpha'], max_age=0) == ['alpha']
+
+
+def test_uncommitted_batches_are_invisible_until_finish_run(tmp_path):
+    path = tmp_path / 'packages.db'
+    with PackageStore(path) as writer, PackageStore(path) as reader:
+        _sync(writer, ['alpha'], [_record('alpha', '1.0.0')])
+
+        run_id = writer.begin_run()
+        names = [f"pkg_{i:03d}" for i in range(25)]
+        for i in range(0, 25, 10):
+            writer.save_run(run_id, [_record(name, '1.0.0') for name in names[i:i + 10]], names[i:i + 10],
+                            commit=False)
+        # Läsaren (GUI:t) ser fortfarande förra körningen, inget halvsparat
+        assert [r.package for r in reader.get_records()] == ['alpha']
+        assert reader.get_records(names) == []
+
+        writer.finish_run(run_id, writer.run_size(run_id))
+        assert reader.last_run()['id'] == run_id
+        assert [r.package for r in reader.get_records()] == names
+        assert reader.removed_since(reader.last_run(before=run_id)['id'], run_id) == ['alpha']
+
+
+def test_save_records_keeps_score_when_missing(tmp_path):
+    with PackageStore(tmp_path / 'packages.db') as store:
+        store.save_records([_record('alpha', '1.0.0')])
+        store.save_records([PackageRecord('alpha', '1.0.1')])
+        (record,) = store.get_records(['alpha'])
+        assert (record.version, record.points) == ('1.0.1', 100)
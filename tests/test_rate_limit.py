@@ -0,0 +1,48 @@
+# tests/test_rate_limit.py
+"""TokenBucket: takt, paus efter 429 och burst"""
+import time
+
+from rate_limit import TokenBucket, parse_retry_after
+
+
+def _time_acquires(bucket, count):
+    started = time.monotonic()
+    for _ in range(count):
+        bucket.acquire()
+    return time.monotonic() - started
+
+
+def test_burst_follows_adapted_rate():
+    bucket = TokenBucket(rate=20, max_rate=20)
+    assert bucket.burst == 20
+    bucket.on_throttled(0)
+    assert bucket.rate == 10
+    assert bucket.burst == 10
+
+
+def test_explicit_burst_is_kept():
+    bucket = TokenBucket(rate=20, burst=5)
+    bucket.on_throttled(0)
+    assert bucket.burst == 5
+
+
+def test_no_refill_during_retry_after_pause():
+    bucket = TokenBucket(rate=20, max_rate=20)
+    bucket.on_throttled(0.2)
+    time.sleep(0.25)
+    # Halverad takt (10/s) från en tom bucket: tre anrop tar minst ~0.3 s,
+    # inte en skur av allt som hade fyllts på under pausen
+    assert _time_acquires(bucket, 3) >= 0.25
+
+
+def test_pause_blocks_until_retry_after():
+    bucket = TokenBucket(rate=100)
+    bucket.on_throttled(0.1)
+    assert _time_acquires(bucket, 1) >= 0.09
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(None) == 1.0
+    assert parse_retry_after('garbage') == 1.0
+    assert parse_retry_after('600') == 60.0
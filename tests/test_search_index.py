@@ -0,0 +1,72 @@
+# tests/test_search_index.py
+"""SearchIndex: prefix- och substring-sök, flera termer och uppdateringar (ingen Tk)"""
+import pytest
+
+from search_index import SearchIndex
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add("flutter_widget_kit", "Reusable widgets for dashboards")
+    index.add("wireframe_theme", "A sketchy Material theme")
+    index.add("json_tools", "Encode and decode JSON quickly")
+    return index
+
+
+def test_empty_query_means_no_filter(index):
+    assert index.search("") is None
+    assert index.search("   ") is None
+
+
+def test_word_prefix_in_name_and_description(index):
+    assert index.search("wi") == {"flutter_widget_kit", "wireframe_theme"}
+    assert index.search("dash") == {"flutter_widget_kit"}
+    assert index.search("Sketch") == {"wireframe_theme"}
+
+
+def test_substring_inside_name(index):
+    # "idge" är inget ordprefix men finns i namnet (trigram)
+    assert index.search("idge") == {"flutter_widget_kit"}
+    assert index.search("_the") == {"wireframe_theme"}
+    # Korta termer matchar bara ordprefix, inte mitt i ett ord
+    assert index.search("dg") == set()
+
+
+def test_all_terms_must_match(index):
+    assert index.search("json dec") == {"json_tools"}
+    assert index.search("json widget") == set()
+    assert index.search("theme wire") == {"wireframe_theme"}
+
+
+def test_matches_agrees_with_search(index):
+    for query in ("wi", "idge", "json dec", "theme material", "nothing"):
+        found = index.search(query)
+        assert {name for name in index.names() if index.matches(name, query)} == found
+
+
+def test_updates_after_reload_invalidate_cached_terms(index):
+    assert index.search("sketchy") == {"wireframe_theme"}
+    assert index.search("json") == {"json_tools"}
+
+    # Omläsning: beskrivningen ändrad, ett package borta och ett nytt
+    index.add("wireframe_theme", "A clean Material theme")
+    index.remove("json_tools")
+    index.add("json_schema", "Validate JSON documents")
+
+    assert index.search("sketchy") == set()
+    assert index.search("clean") == {"wireframe_theme"}
+    assert index.search("json") == {"json_schema"}
+    assert index.search("tools") == set()
+    assert "json_tools" not in index
+    assert len(index) == 3
+
+
+def test_remove_drops_all_postings():
+    index = SearchIndex()
+    index.add("alpha_beta", "gamma")
+    index.remove("alpha_beta")
+    index.remove("missing")
+    assert len(index) == 0
+    for query in ("alp", "pha", "gam", "a"):
+        assert index.search(query) == set()
@@ -0,0 +1,38 @@
+# tests/test_startup.py
+"""Importbudget för GUI:t (samma mätning som `benchmarks.py startup`)"""
+import pytest
+
+from benchmarks import GUI_DIR, _import_seconds, _import_times
+
+IMPORT_BUDGET_MS = 80
+# Per modul, mätt inuti GUI-importen (det den själv drar in räknas med)
+EAGER_BUDGET_MS = 25
+
+# Importeras på toppnivå i package_manager_gui och räknas in i budgeten
+EAGER_MODULES = [
+    'metrics', 'package_registry', 'package_store', 'output_sinks', 'readme_table',
+    'enrichment', 'jobs', 'log_sink', 'package_table', 'search_index',
+]
+# Får bara laddas när de behövs (sync, git, batch), aldrig vid uppstart
+LAZY_MODULES = ['requests', 'bs4', 'update_packages', 'http_adapter', 'git_plumbing', 'batch_panel']
+
+
+def test_gui_import_within_budget():
+    seconds = _import_seconds('package_manager_gui', GUI_DIR)
+    assert seconds is not None
+    assert seconds * 1000 <= IMPORT_BUDGET_MS
+
+
+@pytest.fixture(scope='module')
+def gui_imports():
+    return _import_times('package_manager_gui', GUI_DIR)
+
+
+@pytest.mark.parametrize('module', EAGER_MODULES)
+def test_eager_module_import_within_budget(gui_imports, module):
+    assert module in gui_imports
+    assert gui_imports[module] * 1000 <= EAGER_BUDGET_MS
+
+
+def test_gui_import_skips_lazy_modules(gui_imports):
+    assert not set(LAZY_MODULES) & set(gui_imports)
@@ -0,0 +1,37 @@
+# tests/test_sync_daemon.py
+"""sync_daemon: ett varv mot FakePubDev med metrics-filer"""
+import json
+
+import pytest
+
+import sync_daemon
+from fake_pubdev import FakePubDev
+from metrics import metrics
+
+
+@pytest.fixture
+def restore_metrics():
+    enabled = metrics.enabled
+    yield
+    metrics.enabled = enabled
+    metrics.reset()
+
+
+def test_daemon_writes_metrics_after_each_cycle(tmp_path, restore_metrics):
+    sources = tmp_path / 'sources.json'
+    sources.write_text(json.dumps({'publishers': ['gllb-apps.github.io'], 'packages': [], 'exclude': [],
+                                   'fallback': []}))
+    metrics_json = tmp_path / 'metrics.json'
+    metrics_prom = tmp_path / 'metrics.prom'
+    with FakePubDev(package_count=5) as base_url:
+        sync_daemon.main([
+            '--once', '--status', str(tmp_path / 'status.json'), '--',
+            '--base-url', base_url, '--sources', str(sources), '--output', str(tmp_path / 'README.md'),
+            '--readme-only', '--no-db', '--no-cache',
+            '--metrics-json', str(metrics_json), '--metrics-prom', str(metrics_prom),
+        ])
+
+    status = json.loads((tmp_path / 'status.json').read_text(encoding='utf-8'))
+    assert status['last_sync']['ok']
+    assert json.loads(metrics_json.read_text(encoding='utf-8'))['counters']['http.requests'] > 0
+    assert 'reporead_' in metrics_prom.read_text(encoding='utf-8')
@@ -0,0 +1,100 @@
+# tests/test_update_packages.py
+"""Publisher-discovery (streaming-parser, paginering, omläsning) och inkrementell README"""
+import pytest
+
+from fake_pubdev import FakePubDev
+from metrics import metrics
+from package_registry import PackageRecord
+from update_packages import PublisherPageParser, PubDevScraper, ReadmeGenerator
+
+
+@pytest.fixture
+def counters():
+    enabled = metrics.enabled
+    metrics.enable()
+    metrics.reset()
+    yield lambda: metrics.report()['counters']
+    metrics.enabled = enabled
+    metrics.reset()
+
+
+def test_parser_handles_arbitrary_chunks():
+    fake = FakePubDev(package_count=30, page_size=10)
+    html = fake.publisher_html(page=2)
+    parser = PublisherPageParser()
+    found = []
+    for i in range(0, len(html), 7):
+        parser.feed(html[i:i + 7])
+        found += parser.take_new()
+    parser.close()
+    found += parser.take_new()
+
+    assert found == fake.package_names[10:20]
+    assert parser.next_href == f"/publishers/{fake.publisher}/packages?page=3"
+
+
+def test_multi_page_discovery_is_complete():
+    fake = FakePubDev(package_count=53, page_size=7)
+    with fake as base_url:
+        scraper = PubDevScraper(base_url, rate=None)
+        try:
+            names = scraper.get_packages_from_publisher(fake.publisher)
+        finally:
+            scraper.close()
+
+    assert names == fake.package_names
+
+
+def test_interrupted_pages_are_reread_without_duplicates(counters):
+    # Halva sidor och brutna anslutningar: sidan läses om, redan yieldade namn hoppas över
+    fake = FakePubDev(package_count=60, page_size=10, truncate_rate=0.3, reset_rate=0.1, seed=7)
+    with fake as base_url:
+        scraper = PubDevScraper(base_url, rate=None, hedge=False, retries=8)
+        try:
+            names = scraper.get_packages_from_publisher(fake.publisher)
+        finally:
+            scraper.close()
+
+    assert names == fake.package_names
+    assert fake.faults['truncate'] > 0
+    assert counters()['publisher.page_retries'] >= fake.faults['truncate']
+
+
+def _records(versions):
+    return [
+        PackageRecord(name, version, f"About {name}", 'pub.dev', points=120, likes=3, popularity=0.5)
+        for name, version in sorted(versions.items())
+    ]
+
+
+def test_incremental_render_is_noop_for_unchanged_input(tmp_path):
+    readme = tmp_path / 'README.md'
+    manifest = tmp_path / '.readme-manifest.json'
+    versions = {'alpha': '1.0.0', 'beta': '2.0.0', 'gamma': '0.1.0'}
+
+    assert ReadmeGenerator.generate_incremental(_records(versions), readme, manifest)
+    content = readme.read_text(encoding='utf-8')
+    stat = readme.stat()
+
+    assert not ReadmeGenerator.generate_incremental(_records(versions), readme, manifest)
+    assert readme.read_text(encoding='utf-8') == content
+    assert readme.stat().st_mtime_ns == stat.st_mtime_ns
+
+    versions['beta'] = '2.1.0'
+    assert ReadmeGenerator.generate_incremental(_records(versions), readme, manifest)
+    assert '| 2.1.0 |' in readme.read_text(encoding='utf-8')
+
+
+def test_incremental_render_notices_removed_package_and_hand_edits(tmp_path):
+    readme = tmp_path / 'README.md'
+    manifest = tmp_path / '.readme-manifest.json'
+    versions = {'alpha': '1.0.0', 'beta': '2.0.0'}
+    ReadmeGenerator.generate_incremental(_records(versions), readme, manifest)
+
+    del versions['beta']
+    assert ReadmeGenerator.generate_incremental(_records(versions), readme, manifest)
+    assert '**beta**' not in readme.read_text(encoding='utf-8')
+
+    readme.write_text(readme.read_text(encoding='utf-8') + "\nhand edit\n", encoding='utf-8')
+    assert ReadmeGenerator.generate_incremental(_records(versions), readme, manifest)
+    assert 'hand edit' not in readme.read_text(encoding='utf-8')